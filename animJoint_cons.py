@@ -1,5 +1,10 @@
+import json
+import os.path
+import re
 import maya.cmds as cmds
-from .muscle_units import createJnt
+from .muscle_units import createJoints
+from .muscle_units import sideName
+from . import tracing
 
 def undo(fun):
 
@@ -16,142 +21,107 @@ def undo(fun):
         cmds.undoInfo(closeChunk=1)
     return undo_fun
 
-class AnimationJoint(object):
 
-    def __init__(self, jointName, jointScale=1):
+SKELETON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skeletons")
+_skeletonCache = {}
+
+
+def skeletonTemplates():
+    """
+    :return: names of the skeleton templates in data/skeletons
+    """
+    return sorted(os.path.splitext(fileName)[0] for fileName in os.listdir(SKELETON_DIR)
+                  if fileName.endswith(".json"))
+
+
+def loadSkeletonTemplate(template="biped"):
+    """
+    :param template: template name in data/skeletons or a json file path
+    :return: dict with "label", "height" and "joints", each joint has "name", "parent", "position" and "group"
+    """
+    filePath = template if template.endswith(".json") else os.path.join(SKELETON_DIR, template + ".json")
+    if filePath not in _skeletonCache:
+        if not os.path.exists(filePath):
+            raise RuntimeError("Skeleton template '{0}' not found".format(template))
+        with open(filePath) as fp:
+            _skeletonCache[filePath] = json.load(fp)
+    return _skeletonCache[filePath]
+
+
+def mirrorMatrix(matrix, mirrorAxis="x"):
+    """
+    behavior mirror of a world matrix across the plane facing mirrorAxis, like Maya's mirror joint tool
+    :param matrix: flat list of 16 values
+    :return: flat list of 16 values
+    """
+    index = "xyz".index(mirrorAxis)
+    rows = [list(matrix[i * 4:i * 4 + 4]) for i in range(4)]
+    for row in rows:
+        row[index] = -row[index]
+    # flipping every axis back keeps the rotation right handed and the mirrored side rotating the same way
+    for row in rows[:3]:
+        row[:3] = [-value for value in row[:3]]
+    return [value for row in rows for value in row]
+
 
+class AnimationJoint(object):
+
+    def __init__(self, jointName, jointScale=1, template="biped", height=None, mirror=False, mirrorAxis="x"):
+        """
+        :param jointName: name prefix of every joint
+        :param jointScale: joint radius
+        :param template: skeleton template name or json file, see skeletonTemplates()
+        :param height: scale the template positions to this height
+        :param mirror: also create the R_ side of every L_ joint
+        :param mirrorAxis: axis facing the mirror plane
+        """
         self.jointName = jointName
         self.jointScale = jointScale
+        self.template = template
 
         self.allJoints = []
+        self.mirroredJoints = {}
 
-        self.create(jointName, jointScale)
+        self.create(jointName, jointScale, template=template, height=height, mirror=mirror, mirrorAxis=mirrorAxis)
 
     @undo
-    def create(self, jointName, jointScale=1.0):
-
-        self.spineJointGrp = []
-        self.pelvic = createJnt("{0}_pelvic".format(jointName),
-                                position=[0, 10, 0], radius=jointScale)
-        self.back1 = createJnt("{0}_back1".format(jointName),
-                               position=[0, 11.5, 0], radius=jointScale)
-        self.back2 = createJnt("{0}_back2".format(jointName),
-                               position=[0, 13, 0], radius=jointScale)
-        self.back3 = createJnt("{0}_back2".format(jointName),
-                               position=[0, 14.5, 0], radius=jointScale)
-        self.neck = createJnt("{0}_neck".format(jointName),
-                              position=[0, 15.5, 0], radius=jointScale)
-        self.head = createJnt("{0}_head".format(jointName),
-                              position=[0, 16.5, 0], radius=jointScale)
-        self.headEnd = createJnt("{0}_headEnd".format(jointName),
-                                 position=[0, 17, 0], radius=jointScale)
-        self.spineJointGrp.extend([self.pelvic, self.back1, self.back2, self.back3, self.neck, self.head, self.headEnd])
-        [cmds.parent(self.spineJointGrp[i + 1], joint) for i, joint in enumerate(self.spineJointGrp[:-1])]
-
-        self.legJointGrp = []
-        self.hip = createJnt("{0}_L_hip".format(jointName),
-                             position=[1, 10, 0], radius=jointScale)
-        self.knee = createJnt("{0}_L_knee".format(jointName),
-                              position=[1, 6, 0.2], radius=jointScale)
-        self.ankle = createJnt("{0}_L_ankle".format(jointName),
-                               position=[1, 1, 0], radius=jointScale)
-        self.ball = createJnt("{0}_L_ball".format(jointName),
-                              position=[1, 0, 1], radius=jointScale)
-        self.toe = createJnt("{0}_L_toe".format(jointName),
-                             position=[1, 0, 2], radius=jointScale)
-        self.legJointGrp.extend([self.hip,  self.knee, self.ankle, self.ball, self.toe])
-        [cmds.parent(self.legJointGrp[i + 1], joint) for i, joint in enumerate(self.legJointGrp[:-1])]
-
-        self.armJointGrp = []
-        self.clavicle = createJnt("{0}_L_clavicle".format(jointName),
-                                  position=[0.5, 14.5, 0.5], radius=jointScale)
-        self.shoulder = createJnt("{0}_L_shoulder".format(jointName),
-                                  position=[1.5, 14.5, 0], radius=jointScale)
-        self.elbow = createJnt("{0}_L_elbow".format(jointName),
-                               position=[4.5, 14.5, -0.2], radius=jointScale)
-        self.wrist = createJnt("{0}_L_wrist".format(jointName),
-                               position=[7.2, 14.5, 0], radius=jointScale)
-        self.armJointGrp.extend([self.clavicle, self.shoulder, self.elbow, self.wrist])
-        [cmds.parent(self.armJointGrp[i + 1], joint) for i, joint in enumerate(self.armJointGrp[:-1])]
-
-        self.thumbJointGrp = []
-        self.thumbMeta = createJnt("{0}_L_thumbMeta".format(jointName),
-                                   position=[7.6, 14.2, 0.5], radius=jointScale)
-        self.thumb1 = createJnt("{0}_L_thumb1".format(jointName),
-                                position=[8, 14.2, 0.6], radius=jointScale)
-        self.thumb2 = createJnt("{0}_L_thumb2".format(jointName),
-                                position=[8.3, 14.2, 0.6], radius=jointScale)
-        self.thumb3 = createJnt("{0}_L_thumb3".format(jointName),
-                                position=[8.6, 14.2, 0.6], radius=jointScale)
-        self.thumbJointGrp.extend([self.thumbMeta, self.thumb1, self.thumb2, self.thumb3])
-        [cmds.parent(self.thumbJointGrp[i + 1], joint) for i, joint in enumerate(self.thumbJointGrp[:-1])]
-
-        self.indexJointGrp = []
-        self.indexMeta = createJnt("{0}_L_indexMeta".format(jointName),
-                                   position=[7.5, 14.5, 0.2], radius=jointScale)
-        self.index1 = createJnt("{0}_L_index1".format(jointName),
-                                position=[8.3, 14.5, 0.3], radius=jointScale)
-        self.index2 = createJnt("{0}_L_index2".format(jointName),
-                                position=[8.7, 14.5, 0.3], radius=jointScale)
-        self.index3 = createJnt("{0}_L_index3".format(jointName),
-                                position=[9.0, 14.5, 0.3], radius=jointScale)
-        self.indexEnd = createJnt("{0}_L_indexEnd".format(jointName),
-                                  position=[9.3, 14.5, 0.3], radius=jointScale)
-        self.indexJointGrp.extend([self.indexMeta, self.index1, self.index2, self.index3, self.indexEnd])
-        [cmds.parent(self.indexJointGrp[i + 1], joint) for i, joint in enumerate(self.indexJointGrp[:-1])]
-
-        self.middleJointGrp = []
-        self.middleMeta = createJnt("{0}_L_middleMeta".format(jointName),
-                                    position=[7.5, 14.5, 0], radius=jointScale)
-        self.middle1 = createJnt("{0}_L_middle1".format(jointName),
-                                 position=[8.3, 14.5, 0], radius=jointScale)
-        self.middle2 = createJnt("{0}_L_middle2".format(jointName),
-                                 position=[8.7, 14.5, 0], radius=jointScale)
-        self.middle3 = createJnt("{0}_L_middle3".format(jointName),
-                                 position=[9.0, 14.5, 0], radius=jointScale)
-        self.middleEnd = createJnt("{0}_L_middleEnd".format(jointName),
-                                   position=[9.3, 14.5, 0], radius=jointScale)
-        self.middleJointGrp.extend([self.middleMeta, self.middle1, self.middle2, self.middle3, self.middleEnd])
-        [cmds.parent(self.middleJointGrp[i + 1], joint) for i, joint in enumerate(self.middleJointGrp[:-1])]
-
-        self.ringJointGrp = []
-        self.ringMeta = createJnt("{0}_L_ringMeta".format(jointName),
-                                  position=[7.5, 14.5, -0.2], radius=jointScale)
-        self.ring1 = createJnt("{0}_L_ring1".format(jointName),
-                               position=[8.3, 14.5, -0.3], radius=jointScale)
-        self.ring2 = createJnt("{0}_L_ring2".format(jointName),
-                               position=[8.7, 14.5, -0.3], radius=jointScale)
-        self.ring3 = createJnt("{0}_L_ring3".format(jointName),
-                               position=[9.0, 14.5, -0.3], radius=jointScale)
-        self.ringEnd = createJnt("{0}_L_ringEnd".format(jointName),
-                                 position=[9.3, 14.5, -0.3], radius=jointScale)
-        self.ringJointGrp.extend([self.ringMeta, self.ring1, self.ring2, self.ring3, self.ringEnd])
-        [cmds.parent(self.ringJointGrp[i + 1], joint) for i, joint in enumerate(self.ringJointGrp[:-1])]
-
-        self.pinkyJointGrp = []
-        self.pinkyMeta = createJnt("{0}_L_pinkyMeta".format(jointName),
-                                   position=[7.5, 14.5, -0.4], radius=jointScale)
-        self.pinky1 = createJnt("{0}_L_pinky1".format(jointName),
-                                position=[8.1, 14.5, -0.5], radius=jointScale)
-        self.pinky2 = createJnt("{0}_L_pinky2".format(jointName),
-                                position=[8.4, 14.5, -0.5], radius=jointScale)
-        self.pinky3 = createJnt("{0}_L_pinky3".format(jointName),
-                                position=[8.7, 14.5, -0.5], radius=jointScale)
-        self.pinkyEnd = createJnt("{0}_L_pinkyEnd".format(jointName),
-                                  position=[9.0, 14.5, -0.5], radius=jointScale)
-        self.pinkyJointGrp.extend([self.pinkyMeta, self.pinky1, self.pinky2, self.pinky3, self.pinkyEnd])
-        [cmds.parent(self.pinkyJointGrp[i + 1], joint) for i, joint in enumerate(self.pinkyJointGrp[:-1])]
-
-        cmds.parent(self.armJointGrp[0], self.spineJointGrp[3])
-        cmds.parent(self.legJointGrp[0], self.spineJointGrp[0])
-        cmds.parent(self.thumbJointGrp[0], self.armJointGrp[-1])
-        cmds.parent(self.indexJointGrp[0], self.armJointGrp[-1])
-        cmds.parent(self.middleJointGrp[0], self.armJointGrp[-1])
-        cmds.parent(self.ringJointGrp[0], self.armJointGrp[-1])
-        cmds.parent(self.pinkyJointGrp[0], self.armJointGrp[-1])
-
-        self.allJoints = cmds.listRelatives(self.spineJointGrp[0], c=True, ad=True)
-        self.allJoints.append(self.spineJointGrp[0])
+    @tracing.operation
+    def create(self, jointName, jointScale=1.0, template="biped", height=None, mirror=False, mirrorAxis="x"):
+        skeleton = loadSkeletonTemplate(template)
+        factor = float(height) / skeleton["height"] if height else 1.0
+
+        jointSpecs = []
+        mirrorSpecs = {}
+        for joint in skeleton["joints"]:
+            position = [value * factor for value in joint["position"]]
+            jointSpec = {"name": "{0}_{1}".format(jointName, joint["name"]),
+                         "parent": "{0}_{1}".format(jointName, joint["parent"]) if joint["parent"] else None,
+                         "matrix": [1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0] + position + [1],
+                         "radius": jointScale}
+            jointSpecs.append(jointSpec)
+            # named so muscle_units.sideName finds the other side, added right after the left joint
+            # so the mirrored parent always comes first
+            if mirror and joint["name"].startswith("L_"):
+                mirrorSpec = dict(jointSpec, name=sideName(jointSpec["name"]),
+                                  matrix=mirrorMatrix(jointSpec["matrix"], mirrorAxis))
+                if jointSpec["parent"] and joint["parent"].startswith("L_"):
+                    mirrorSpec["parent"] = sideName(jointSpec["parent"])
+                jointSpecs.append(mirrorSpec)
+                mirrorSpecs[jointSpec["name"]] = mirrorSpec
+        createdJoints = dict(zip([jointSpec["name"] for jointSpec in jointSpecs], createJoints(jointSpecs)))
+
+        # joints are reachable as attributes without their side, self.shoulder, self.spineJointGrp...
+        groups = {}
+        for joint in skeleton["joints"]:
+            createdJoint = createdJoints["{0}_{1}".format(jointName, joint["name"])]
+            setattr(self, re.sub("^[LR]_", "", joint["name"]), createdJoint)
+            groups.setdefault(joint.get("group", "other"), []).append(createdJoint)
+        for group, joints in groups.items():
+            setattr(self, "{0}JointGrp".format(group), joints)
+
+        self.mirroredJoints = dict((createdJoints[name], createdJoints[mirrorSpec["name"]])
+                                   for name, mirrorSpec in mirrorSpecs.items())
+        self.allJoints = [createdJoints[jointSpec["name"]] for jointSpec in jointSpecs]
 
     @undo
     def visLocalAxis(self):
@@ -163,6 +133,7 @@ class AnimationJoint(object):
             cmds.setAttr("{0}.displayLocalAxis".format(joint), 0)
 
 
+@tracing.operation
 def visPoleVector(jointList=None):
 
     if not jointList:
@@ -184,8 +155,11 @@ def visPoleVector(jointList=None):
                                   p=[(0, 0, 0), (0, 0, 0), (0, 0, 0), (0, 0, 0)])[0]
     cmds.parent(vpvGeo, "SkPoleVectors")
 
-    lambert_sg = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name="MPolerVisSG")
-    cmds.connectAttr("MPolerVis" + ".outColor", lambert_sg + ".surfaceShader", force=True)
+    # one shading group shared by every visualizer
+    lambert_sg = "MPolerVisSG"
+    if not cmds.objExists(lambert_sg):
+        lambert_sg = cmds.sets(renderable=True, noSurfaceShader=True, empty=True, name="MPolerVisSG")
+        cmds.connectAttr("MPolerVis" + ".outColor", lambert_sg + ".surfaceShader", force=True)
     cmds.sets(vpvGeo, e=True, forceElement=lambert_sg)
 
     cmds.setAttr("{0}.overrideEnabled".format(vpvGeo), 1)
@@ -245,9 +219,42 @@ def visPoleVector(jointList=None):
     return vpvGeo
 
 
+POLE_VECTOR_PLUGIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pole_vector_vis.py")
 
 
+def visPoleVectors(chains=None, name="SkPoleVectorVis"):
+    """
+    draw the pole vector plane of many chains with one poleVectorVis locator, see pole_vector_vis.py
+    :param chains: list of [root, mid, end] joints, the selection as one chain if not given
+    :param name: locator transform name, chains are added to it when it exists
+    :return: poleVectorVis shape
+    """
+    if not chains:
+        chains = [cmds.ls(sl=1, fl=1)[:3]]
+    if not cmds.pluginInfo("pole_vector_vis", query=True, loaded=True):
+        cmds.loadPlugin(POLE_VECTOR_PLUGIN, quiet=True)
 
-
-
-
+    if not cmds.objExists("SkVisualizer"):
+        cmds.createNode("transform", name="SkVisualizer")
+    if cmds.objExists(name):
+        visShape = cmds.listRelatives(name, shapes=True)[0]
+    else:
+        visTransform = cmds.createNode("transform", name=name, parent="SkVisualizer")
+        cmds.setAttr("{0}.inheritsTransform".format(visTransform), 0)
+        visShape = cmds.createNode("poleVectorVis", name="{0}Shape".format(name), parent=visTransform)
+
+    attrs = ["rootMatrix", "midMatrix", "endMatrix"]
+    indices = cmds.getAttr("{0}.chains".format(visShape), multiIndices=True) or []
+    # indices can have gaps once chains are removed, and a chain drawn twice is skipped
+    connected = set(tuple((cmds.listConnections("{0}.chains[{1}].{2}".format(visShape, index, attr),
+                                                source=True, destination=False) or [None])[0] for attr in attrs)
+                    for index in indices)
+    index = max(indices) + 1 if indices else 0
+    for chain in chains:
+        if tuple(chain) in connected:
+            continue
+        for joint, attr in zip(chain, attrs):
+            cmds.connectAttr("{0}.worldMatrix[0]".format(joint), "{0}.chains[{1}].{2}".format(visShape, index, attr))
+        connected.add(tuple(chain))
+        index += 1
+    return visShape
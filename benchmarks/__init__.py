@@ -0,0 +1,250 @@
+"""
+benchmarks of the muscle and helper tools with regression thresholds
+
+every case is timed and counted: wall time, maya.cmds calls made by the tools and nodes created.
+the numbers are compared with baseline.json, kept per mode since the stand-in and mayapy differ a lot.
+only the command and node counts fail a run, they are the same on every machine. time is measured
+against a fixed python workload timed in the same session and only reported as slower
+
+    python -m JBDMuscle.benchmarks                  # stand-in, or mayapy when run from mayapy
+    python -m JBDMuscle.benchmarks --large          # also the 1000 group import/export cases
+    python -m JBDMuscle.benchmarks --update         # write the current numbers as the baseline
+    python -m JBDMuscle.benchmarks.scaling          # build time, nodes, memory and fps of synthetic rigs
+
+nothing here imports maya, the runner picks the mode first and imports the cases after
+"""
+import json
+import math
+import os
+import sys
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+MODES = ("standin", "mayapy")
+# time differences below this are noise whatever the tolerance
+TIME_FLOOR = 0.005
+
+
+class Case(object):
+
+    def __init__(self, name, run, setup=None, repeat=3, large=False):
+        """
+        :param run: function timed, gets what setup returned
+        :param setup: function run on a new scene before every repeat, not timed
+        :param repeat: runs per case, the fastest one is kept
+        :param large: only run with --large
+        """
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.repeat = repeat
+        self.large = large
+
+
+def defaultMode():
+    try:
+        import maya.standalone
+    except ImportError:
+        return "standin"
+    return "mayapy"
+
+
+def setUp(mode):
+    if mode == "mayapy":
+        import maya.standalone
+        maya.standalone.initialize(name="python")
+    else:
+        from .. import testing
+        testing.install()
+
+
+def isStandIn():
+    from .. import testing
+    return sys.modules.get("maya.cmds") is testing.cmds
+
+
+def newScene():
+    import maya.cmds as cmds
+    if isStandIn():
+        from .. import testing
+        testing.reset()
+    else:
+        cmds.file(new=True, force=True)
+
+
+class CommandCounter(object):
+    """
+    counts maya.cmds calls made by the tools; calls a command makes to other commands are not counted
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.depth = 0
+        self.saved = {}
+
+    def wrap(self, fn):
+        def wrapper(*args, **kwargs):
+            if not self.depth:
+                self.count += 1
+            self.depth += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.depth -= 1
+        return wrapper
+
+    def __enter__(self):
+        import maya.cmds as cmds
+        standIn = isStandIn()
+        for name in dir(cmds):
+            fn = getattr(cmds, name)
+            if name.startswith("_") or isinstance(fn, type) or not callable(fn):
+                continue
+            # the stand-in module also holds its helpers, only its commands are wrapped by functools
+            if standIn and not hasattr(fn, "__wrapped__"):
+                continue
+            self.saved[name] = fn
+            setattr(cmds, name, self.wrap(fn))
+        return self
+
+    def __exit__(self, *args):
+        import maya.cmds as cmds
+        for name, fn in self.saved.items():
+            setattr(cmds, name, fn)
+        self.saved = {}
+
+
+class NodeCounter(object):
+    """
+    counts nodes created, temporary ones included
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.callback = None
+        self.scene = None
+
+    def __enter__(self):
+        if isStandIn():
+            from .. import testing
+            self.scene = testing.currentScene()
+            self.count = -self.scene.nodesCreated
+        else:
+            import maya.api.OpenMaya as om
+            self.callback = om.MDGMessage.addNodeAddedCallback(self.nodeAdded, "dependNode")
+        return self
+
+    def nodeAdded(self, node, clientData=None):
+        self.count += 1
+
+    def __exit__(self, *args):
+        if self.scene is not None:
+            self.count += self.scene.nodesCreated
+        if self.callback is not None:
+            import maya.api.OpenMaya as om
+            om.MMessage.removeCallback(self.callback)
+            self.callback = None
+
+
+def referenceWork():
+    total = 0.0
+    for i in range(200000):
+        total += math.sqrt(i) * 0.5
+    return total
+
+
+def referenceSeconds(repeat=5):
+    """
+    fastest run of a fixed workload, case times are kept as a multiple of it so the
+    baseline holds on a faster or busier machine
+    """
+    result = None
+    for _ in range(repeat):
+        start = time.time()
+        referenceWork()
+        seconds = time.time() - start
+        result = seconds if result is None else min(result, seconds)
+    return result
+
+
+def measure(case):
+    """
+    :return: dict of seconds, commands and nodes, seconds is the fastest of case.repeat runs
+    """
+    result = None
+    for _ in range(case.repeat):
+        newScene()
+        state = case.setup() if case.setup else None
+        with NodeCounter() as nodes, CommandCounter() as commands:
+            start = time.time()
+            case.run(state)
+            seconds = time.time() - start
+        if result is None:
+            result = {"seconds": seconds, "commands": commands.count, "nodes": nodes.count}
+        result["seconds"] = min(result["seconds"], seconds)
+    return result
+
+
+def loadBaseline(filePath=BASELINE_PATH):
+    if not os.path.exists(filePath):
+        return dict((mode, {}) for mode in MODES)
+    with open(filePath) as fp:
+        return json.load(fp)
+
+
+def saveBaseline(baseline, filePath=BASELINE_PATH):
+    with open(filePath, "w") as fp:
+        json.dump(baseline, fp, indent=4, sort_keys=True, separators=(",", ": "))
+        fp.write("\n")
+
+
+def regressions(result, base, countTolerance=0.0, metrics=("commands", "nodes")):
+    """
+    :param countTolerance: allowed count increase as a fraction of the baseline
+    :param metrics: counts compared, a fallback baseline from another mode only has comparable commands
+    :return: list of the metrics over tolerance
+    """
+    if not base:
+        return []
+    return [metric for metric in metrics if metric in base and result[metric] > base[metric] * (1.0 + countTolerance)]
+
+
+def expectedSeconds(base, reference):
+    """
+    :return: baseline time scaled to this session, None if the baseline has no relative time
+    """
+    if not base or "relative" not in base:
+        return None
+    return base["relative"] * reference
+
+
+def slower(result, base, reference, timeTolerance=0.25):
+    """
+    :param reference: referenceSeconds() of this session
+    :param timeTolerance: allowed time increase as a fraction of the scaled baseline
+    :return: True if the case took longer than the baseline allows, advisory only
+    """
+    expected = expectedSeconds(base, reference)
+    if expected is None:
+        return False
+    return result["seconds"] - expected > max(expected * timeTolerance, TIME_FLOOR)
+
+
+def report(rows, reference):
+    """
+    :param rows: list of (case name, result, base, regressed metrics, slower)
+    :param reference: referenceSeconds() of this session, the base column is scaled by it
+    :return: table as str
+    """
+    lines = ["{0:<36} {1:>10} {2:>10} {3:>9} {4:>9} {5:>7} {6:>7}  {7}".format(
+        "case", "seconds", "base", "commands", "base", "nodes", "base", "status")]
+    for name, result, base, over, isSlower in rows:
+        base = base or {}
+        expected = expectedSeconds(base, reference)
+        status = "REGRESSED " + ", ".join(over) if over else ("ok" if base else "new")
+        if isSlower:
+            status += " (slower)"
+        lines.append("{0:<36} {1:>10.4f} {2:>10} {3:>9} {4:>9} {5:>7} {6:>7}  {7}".format(
+            name, result["seconds"], "-" if expected is None else "{0:.4f}".format(expected),
+            result["commands"], base.get("commands", "-"), result["nodes"], base.get("nodes", "-"), status))
+    return "\n".join(lines)
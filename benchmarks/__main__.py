@@ -0,0 +1,89 @@
+"""
+python -m JBDMuscle.benchmarks [--mode standin|mayapy] [--large] [--update] [--case NAME ...]
+
+exits with 1 when a case makes more commands or nodes than the baseline allows. time depends on the
+machine, a case slower than the baseline scaled by the reference workload is only reported
+
+a mode without a baseline entry for a case is checked against the stand-in command count: the
+tools make the same cmds calls either way, the node counts differ
+"""
+import argparse
+import sys
+
+from . import MODES
+from . import defaultMode
+from . import loadBaseline
+from . import measure
+from . import referenceSeconds
+from . import regressions
+from . import report
+from . import saveBaseline
+from . import setUp
+from . import slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m JBDMuscle.benchmarks",
+                                     description="time the muscle tools and compare with the baseline")
+    parser.add_argument("--mode", choices=MODES, help="default: mayapy when maya.standalone imports")
+    parser.add_argument("--case", nargs="*", default=[], help="only run cases containing one of these")
+    parser.add_argument("--large", action="store_true", help="also run the 1000 group cases")
+    parser.add_argument("--update", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25,
+                        help="time increase reported as slower as a fraction, default 0.25")
+    parser.add_argument("--count-tolerance", type=float, default=0.0,
+                        help="allowed command and node count increase as a fraction, default 0")
+    parser.add_argument("--baseline", help="baseline file, default benchmarks/baseline.json")
+    args = parser.parse_args(argv)
+
+    mode = args.mode or defaultMode()
+    setUp(mode)
+    from . import cases
+
+    baseline = loadBaseline(args.baseline) if args.baseline else loadBaseline()
+    modeBaseline = baseline.setdefault(mode, {})
+    reference = referenceSeconds()
+    rows = []
+    fallbacks = []
+    for case in cases.cases():
+        if case.large and not args.large:
+            continue
+        if args.case and not any(name in case.name for name in args.case):
+            continue
+        result = measure(case)
+        base = modeBaseline.get(case.name)
+        over = regressions(result, base, countTolerance=args.count_tolerance)
+        if base is None and mode != "standin" and case.name in baseline.get("standin", {}):
+            fallbacks.append(case.name)
+            over = regressions(result, baseline["standin"][case.name], countTolerance=args.count_tolerance,
+                               metrics=["commands"])
+        rows.append((case.name, result, base, over,
+                     slower(result, base, reference, timeTolerance=args.time_tolerance)))
+        if args.update:
+            modeBaseline[case.name] = dict(result, seconds=round(result["seconds"], 6),
+                                           relative=round(result["seconds"] / reference, 4))
+
+    print("mode: {0}, reference {1:.4f}s".format(mode, reference))
+    print(report(rows, reference))
+    if fallbacks and not args.update:
+        print("{0} cases have no {1} baseline, their command counts were checked against the stand-in".format(
+            len(fallbacks), mode))
+    if args.update:
+        if args.baseline:
+            saveBaseline(baseline, args.baseline)
+        else:
+            saveBaseline(baseline)
+        print("baseline updated")
+        return 0
+    slowerCases = [name for name, result, base, over, isSlower in rows if isSlower]
+    if slowerCases:
+        print("{0} slower, not failing the run: {1}".format(len(slowerCases), ", ".join(slowerCases)))
+    regressed = [name for name, result, base, over, isSlower in rows if over]
+    if regressed:
+        print("{0} regressed: {1}".format(len(regressed), ", ".join(regressed)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+the benchmark cases, import only after maya or the stand-in is set up
+"""
+import functools
+import json
+import math
+import os
+import tempfile
+
+from . import Case
+from . import newScene
+from .. import animJoint_cons as aj
+from .. import helper_joints as hj
+from .. import muscle_group as mg
+from .. import muscle_units as mu
+from .. import optimizer
+
+SKELETON = "JBD"
+
+# tag, muscle name, constructor inputs and groups that have to be built first, in build order
+GROUPS = [
+    ("TrapGroup", "L_trap", ["JBD_back2", "JBD_L_clavicle", "L_acromion"], []),
+    ("LatsGroup", "L_lats", ["JBD_back1", "JBD_L_shoulder_Twist2", "L_scapula", "L_trapC_JOmuscle"], ["L_trap"]),
+    ("DeltoidGroup", "L_delt", ["JBD_L_clavicle", "JBD_L_shoulder", "JBD_L_shoulder_Twist1",
+                                "JBD_L_shoulder_Twist2", "L_acromion"], []),
+    ("ArmMuscleGroup", "L_arm", ["JBD_L_shoulder_Twist1", "JBD_L_elbow_Twist1", "JBD_L_shoulder_TwistBase",
+                                 "JBD_L_shoulder_TwistValue", "L_acromion"], []),
+    ("PectoralisGroup", "L_pec", ["JBD_back3", "JBD_L_clavicle", "JBD_L_shoulder", "JBD_L_shoulder_Twist2"], []),
+    ("NeckGroup", "L_neck", ["JBD_neck", "JBD_L_clavicle"], []),
+    ("AbdominalGroup", "L_abs", ["JBD_pelvic"], []),
+    ("GluteGroup", "L_glute", ["JBD_pelvic", "JBD_L_hip"], []),
+    ("LegMuscleGroup", "L_leg", ["JBD_L_hip"], []),
+]
+
+GROUP_COUNTS = (10, 100, 1000)
+LARGE_GROUP_COUNT = 1000
+JIGGLE_JOINTS = 100
+JIGGLE_FRAMES = 200
+
+_synthetic = {}
+
+
+# fixtures
+
+def skeleton():
+    return aj.AnimationJoint(SKELETON, mirror=True)
+
+
+def rig():
+    """
+    both sides of the skeleton with scapula, twist and elbow/knee fix helpers
+    """
+    animJoint = skeleton()
+    hj.createLimbHelpers(hj.characterLimbSpecs(SKELETON, legs=True))
+    return animJoint
+
+
+def groupSpec(muscleName):
+    for spec in GROUPS:
+        if spec[1] == muscleName:
+            return spec
+    raise RuntimeError("No benchmark group named '{0}'".format(muscleName))
+
+
+def buildGroup(muscleName, add=True, build=True):
+    tag, muscleName, inputs, requires = groupSpec(muscleName)
+    group = mg.groupClass(tag)(muscleName, *inputs)
+    if add:
+        group.add()
+    if build:
+        group.build()
+    return group
+
+
+def groupSetup(muscleName, add=False, build=False, mirror=False):
+    """
+    :param mirror: also mirror the groups it needs, so the group itself can be mirrored
+    """
+    rig()
+    tag, muscleName, inputs, requires = groupSpec(muscleName)
+    for required in requires:
+        group = buildGroup(required)
+        if mirror:
+            group.mirror()
+    return buildGroup(muscleName, add=add, build=build)
+
+
+def syntheticFile(groupCount):
+    """
+    a file of groupCount trapezius groups named S0_trap, S1_trap... on the rig inputs
+    the template data comes from a trapezius built once, in a scene thrown away afterwards
+    :return: file path
+    """
+    if "trap" not in _synthetic:
+        rig()
+        _synthetic["trap"] = buildGroup("L_trap").serialize()["L_trap"]
+        newScene()
+    filePath = os.path.join(tempfile.gettempdir(), "JBDMuscle_benchmark_{0}.json".format(groupCount))
+    muscleData = {}
+    for index in range(groupCount):
+        name = "S{0}_trap".format(index)
+        muscleData[name] = dict((key.replace("L_trap", name), value) for key, value in _synthetic["trap"].items())
+    with open(filePath, "w") as fp:
+        json.dump(muscleData, fp)
+    return filePath
+
+
+# muscle joint
+
+ATTACH = ("JBD_back3", "JBD_L_clavicle")
+
+
+def muscleJointSetup(update=False):
+    rig()
+    muscleJoint = mu.MuscleJoint.createFromAttachObj("bench", *ATTACH)
+    if update:
+        muscleJoint.update()
+    return muscleJoint
+
+
+def createMuscleJoint(state):
+    mu.MuscleJoint.createFromAttachObj("bench", *ATTACH)
+
+
+# optimizer
+
+def optimizeGroup(group):
+    optimizer.optimizeGroups([group], startFrame=1, endFrame=1)
+
+
+# import / export
+
+def importSetup(groupCount):
+    filePath = syntheticFile(groupCount)
+    rig()
+    return filePath
+
+
+def exportSetup(groupCount):
+    filePath = importSetup(groupCount)
+    groups = mg.importMuscles(filePath)
+    return os.path.join(tempfile.gettempdir(), "JBDMuscle_benchmark_export.json"), groups
+
+
+def exportGroups(state):
+    filePath, groups = state
+    mg.exportMuscles(filePath, *groups)
+
+
+# helpers
+
+def autoCreate(animJoint, twistMode="constraint"):
+    hj.autoCreate(animJoint.shoulder, animJoint.elbow, animJoint.wrist, twistMode=twistMode)
+
+
+# jiggle
+
+def jiggleLoop(state):
+    """
+    the integration every jiggle joint runs per frame, on a goal swinging along x
+    """
+    import maya.OpenMaya as om
+    from .. import jiggle_joint
+
+    for joint in range(JIGGLE_JOINTS):
+        currentPos = previousPos = om.MPoint(0.0, float(joint), 0.0)
+        for frame in range(JIGGLE_FRAMES):
+            goal = om.MPoint(math.sin(frame * 0.2), float(joint), 0.0)
+            newPosition = jiggle_joint.integrate(currentPos, previousPos, goal, 0.3, 0.4)
+            previousPos, currentPos = currentPos, newPosition
+
+
+def cases():
+    result = [
+        Case("muscleJoint.create", createMuscleJoint, setup=rig),
+        Case("muscleJoint.update", lambda unit: unit.update(), setup=muscleJointSetup),
+        Case("muscleJoint.edit", lambda unit: unit.edit(),
+             setup=functools.partial(muscleJointSetup, update=True)),
+        Case("muscleJoint.delete", lambda unit: unit.delete(),
+             setup=functools.partial(muscleJointSetup, update=True)),
+    ]
+    for tag, muscleName, inputs, requires in GROUPS:
+        name = "group.{0}".format(tag)
+        result.extend([
+            Case(name + ".add", lambda group: group.add(), setup=functools.partial(groupSetup, muscleName)),
+            Case(name + ".build", lambda group: group.build(),
+                 setup=functools.partial(groupSetup, muscleName, add=True)),
+            Case(name + ".mirror", lambda group: group.mirror(),
+                 setup=functools.partial(groupSetup, muscleName, add=True, build=True, mirror=True)),
+            Case(name + ".serialize", lambda group: group.serialize(),
+                 setup=functools.partial(groupSetup, muscleName, add=True, build=True)),
+            Case(name + ".optimize", optimizeGroup,
+                 setup=functools.partial(groupSetup, muscleName, add=True, build=True)),
+        ])
+    for groupCount in GROUP_COUNTS:
+        # one run of a big import is long enough to time well
+        large = groupCount >= LARGE_GROUP_COUNT
+        repeat = 3 if groupCount < 100 else 1
+        result.extend([
+            Case("importMuscles.{0}".format(groupCount), mg.importMuscles,
+                 setup=functools.partial(importSetup, groupCount), repeat=repeat, large=large),
+            Case("exportMuscles.{0}".format(groupCount), exportGroups,
+                 setup=functools.partial(exportSetup, groupCount), repeat=repeat, large=large),
+        ])
+    for twistMode in ["constraint", "matrix"]:
+        result.append(Case("autoCreate.{0}".format(twistMode),
+                           functools.partial(autoCreate, twistMode=twistMode), setup=skeleton))
+    result.append(Case("jiggle.integrate", jiggleLoop))
+    return result
+
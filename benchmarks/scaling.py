@@ -0,0 +1,73 @@
+"""
+python -m JBDMuscle.benchmarks.scaling [--mode standin|mayapy] [--characters N ...] [--units M ...] [--jiggle]
+
+builds N characters of M synthetic muscle units for every N and M, smallest rig first, and prints
+build time, scene nodes, memory and playback frame rate as a scaling curve
+"""
+import argparse
+import csv
+import json
+import sys
+
+from . import MODES
+from . import defaultMode
+from . import setUp
+
+
+def report(rows, columns):
+    """
+    :return: table as str
+    """
+    def cell(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return "{0:.3f}".format(value)
+        return str(value)
+
+    widths = [max(len(column), 8) for column in columns]
+    lines = [" ".join("{0:>{1}}".format(column, width) for column, width in zip(columns, widths))]
+    for row in rows:
+        lines.append(" ".join("{0:>{1}}".format(cell(row[column]), width) for column, width in zip(columns, widths)))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m JBDMuscle.benchmarks.scaling",
+                                     description="scaling curve of synthetic rigs")
+    parser.add_argument("--mode", choices=MODES, help="default: mayapy when maya.standalone imports")
+    parser.add_argument("--characters", type=int, nargs="+", default=[1, 2, 4], help="character counts")
+    parser.add_argument("--units", type=int, nargs="+", default=[10, 50],
+                        help="muscle units per character")
+    parser.add_argument("--jiggle", action="store_true", help="give every unit a jiggle joint")
+    parser.add_argument("--spine", type=int, default=6, help="spine joints per character")
+    parser.add_argument("--limbs", type=int, default=8, help="limbs per character")
+    parser.add_argument("--limb-joints", type=int, default=5, help="joints per limb")
+    parser.add_argument("--frames", type=int, default=48, help="frames played per evaluation mode")
+    parser.add_argument("--csv", help="also write the rows to this csv file")
+    parser.add_argument("--json", help="also write the rows to this json file")
+    args = parser.parse_args(argv)
+
+    mode = args.mode or defaultMode()
+    setUp(mode)
+    from . import synthetic
+
+    spec = synthetic.SkeletonSpec(spineJoints=args.spine, limbs=args.limbs, limbJoints=args.limb_joints)
+    print("mode: {0}".format(mode))
+    print(report([], synthetic.COLUMNS))
+    rows = synthetic.scalingCurve(args.characters, args.units, spec=spec, jiggle=args.jiggle, frames=args.frames,
+                                  log=lambda row: print(report([row], synthetic.COLUMNS).split("\n")[1]))
+    if args.csv:
+        with open(args.csv, "w", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=synthetic.COLUMNS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump({"mode": mode, "rows": rows}, fp, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
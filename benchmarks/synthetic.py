@@ -0,0 +1,198 @@
+"""
+synthetic rigs far larger than a biped, for finding where the build and playback stop scaling
+import only after maya or the stand-in is set up
+
+every character is a procedural skeleton: a spine with limbs branching off in a ring. its muscle
+units go from a joint to the joint two links down the chain, cycling over the skeleton when there
+are more units than joint pairs
+"""
+import gc
+import math
+import os
+import time
+
+import maya.cmds as cmds
+
+from . import isStandIn
+from . import newScene
+from .. import muscle_units as mu
+
+EVALUATION_MODES = ("serial", "parallel")
+COLUMNS = ("characters", "units", "jiggle", "nodes", "buildSeconds", "msPerUnit", "msPerNode",
+           "marginalMsPerUnit", "memoryMB", "fps.serial", "fps.parallel")
+
+
+class SkeletonSpec(object):
+
+    def __init__(self, spineJoints=6, limbs=8, limbJoints=5, spacing=4.0):
+        """
+        :param spineJoints: joints of the spine chain along y
+        :param limbs: chains branching from the spine joints in turn, spread around y
+        :param limbJoints: joints of every limb
+        :param spacing: distance between two joints of a chain
+        """
+        self.spineJoints = spineJoints
+        self.limbs = limbs
+        self.limbJoints = limbJoints
+        self.spacing = spacing
+
+
+def skeletonSpecs(prefix, spec, offset=0.0):
+    """
+    :param offset: x position of the character, so characters do not overlap
+    :return: list of mu.createJoints specs, the root first
+    """
+    def joint(name, position, parent):
+        return {"name": name, "parent": parent, "radius": 0.5,
+                "matrix": [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0] + list(position) + [1.0]}
+
+    specs = []
+    spine = []
+    for index in range(spec.spineJoints):
+        name = "{0}_spine{1}".format(prefix, index)
+        specs.append(joint(name, [offset, 10.0 + index * spec.spacing, 0.0], spine[-1] if spine else None))
+        spine.append(name)
+    for limb in range(spec.limbs):
+        angle = 2.0 * math.pi * limb / spec.limbs
+        parent = spine[limb % len(spine)]
+        height = 10.0 + (limb % len(spine)) * spec.spacing
+        for index in range(spec.limbJoints):
+            reach = (index + 1) * spec.spacing
+            name = "{0}_limb{1}_{2}".format(prefix, limb, index)
+            specs.append(joint(name, [offset + math.cos(angle) * reach, height, math.sin(angle) * reach], parent))
+            parent = name
+    return specs
+
+
+def attachPairs(specs):
+    """
+    :return: list of (origin, insertion) joints, each joint with its grandparent
+    """
+    parents = dict((spec["name"], spec["parent"]) for spec in specs)
+    return [(parents[parents[spec["name"]]], spec["name"]) for spec in specs
+            if spec["parent"] and parents[spec["parent"]]]
+
+
+def buildCharacter(prefix, unitCount, spec=None, jiggle=False, offset=0.0):
+    """
+    :param unitCount: muscle units of the character
+    :param jiggle: give every unit a jiggle joint
+    :return: (root joint, list of MuscleJoint)
+    """
+    spec = spec or SkeletonSpec()
+    specs = skeletonSpecs(prefix, spec, offset=offset)
+    mu.createJoints(specs)
+    pairs = attachPairs(specs)
+    if not pairs:
+        raise RuntimeError("Skeleton of '{0}' has no joint two links down a chain".format(prefix))
+    units = []
+    for index in range(unitCount):
+        origin, insertion = pairs[index % len(pairs)]
+        unit = mu.MuscleJoint.createFromAttachObj("{0}_m{1}".format(prefix, index), origin, insertion)
+        unit.update()
+        if jiggle:
+            unit.jiggle()
+        units.append(unit)
+    return specs[0]["name"], units
+
+
+def loadJigglePlugin():
+    from .. import jiggle_joint
+    if not cmds.pluginInfo("jiggle_joint", query=True, loaded=True):
+        cmds.loadPlugin(os.path.splitext(os.path.abspath(jiggle_joint.__file__))[0] + ".py", quiet=True)
+
+
+def memoryMB():
+    """
+    maya heap in mayapy, resident size of the process with the stand-in
+    """
+    if not isStandIn():
+        return float(cmds.memory(heapMemory=True, megaByte=True))
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576.0
+    except (IOError, OSError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def playback(roots, units, frames=48, evaluationMode="serial"):
+    """
+    step through frames with the roots swinging and read the JOmuscle matrices every frame
+
+    in mayapy the roots are keyed and the evaluation manager runs in evaluationMode. the stand-in
+    has no animation curves nor evaluation manager, the roots are set every frame instead
+    :return: frames per second
+    """
+    outputs = ["{0}.worldMatrix[0]".format(unit.JOmuscle) for unit in units]
+    standIn = isStandIn()
+    if not standIn:
+        cmds.evaluationManager(mode=evaluationMode)
+        for root in roots:
+            cmds.setKeyframe(root, attribute="rotateY", time=1, value=-30.0)
+            cmds.setKeyframe(root, attribute="rotateY", time=frames, value=30.0)
+    start = time.time()
+    for frame in range(1, frames + 1):
+        if standIn:
+            for root in roots:
+                cmds.setAttr("{0}.rotateY".format(root), -30.0 + 60.0 * (frame - 1) / max(frames - 1, 1))
+        cmds.currentTime(frame, update=True)
+        for output in outputs:
+            cmds.getAttr(output)
+    return frames / max(time.time() - start, 1e-9)
+
+
+def measurePoint(characters, units, spec=None, jiggle=False, frames=48):
+    """
+    build characters x units on a new scene and play it back
+    :return: row dict with the COLUMNS keys, marginalMsPerUnit is left to scalingCurve()
+    """
+    newScene()
+    gc.collect()
+    if jiggle:
+        loadJigglePlugin()
+    memory = memoryMB()
+    nodes = len(cmds.ls())
+    start = time.time()
+    roots = []
+    allUnits = []
+    for character in range(characters):
+        root, characterUnits = buildCharacter("C{0}".format(character), units, spec=spec, jiggle=jiggle,
+                                              offset=character * 100.0)
+        roots.append(root)
+        allUnits.extend(characterUnits)
+    seconds = time.time() - start
+    nodes = len(cmds.ls()) - nodes
+    row = {"characters": characters, "units": characters * units, "jiggle": jiggle, "nodes": nodes,
+           "buildSeconds": seconds, "msPerUnit": seconds * 1000.0 / max(len(allUnits), 1),
+           "msPerNode": seconds * 1000.0 / max(nodes, 1), "marginalMsPerUnit": None,
+           "memoryMB": memoryMB() - memory}
+    # the stand-in evaluates the same way in every mode, it is only played once
+    for evaluationMode in EVALUATION_MODES[:1] if isStandIn() else EVALUATION_MODES:
+        row["fps." + evaluationMode] = playback(roots, allUnits, frames=frames, evaluationMode=evaluationMode)
+    for evaluationMode in EVALUATION_MODES:
+        row.setdefault("fps." + evaluationMode, None)
+    return row
+
+
+def scalingCurve(characterCounts, unitCounts, spec=None, jiggle=False, frames=48, log=None):
+    """
+    measure every characters x units point, smallest rig first
+    marginalMsPerUnit is the build time each unit added since the previous point cost: flat while
+    the cost per unit is constant, rising where the per-node costs start to dominate
+    :param log: function called with every row as it is measured
+    :return: list of row dicts with the COLUMNS keys
+    """
+    points = sorted(((characters, units) for characters in characterCounts for units in unitCounts),
+                    key=lambda point: (point[0] * point[1], point[0]))
+    rows = []
+    for characters, units in points:
+        row = measurePoint(characters, units, spec=spec, jiggle=jiggle, frames=frames)
+        if rows and row["units"] > rows[-1]["units"]:
+            row["marginalMsPerUnit"] = ((row["buildSeconds"] - rows[-1]["buildSeconds"]) * 1000.0 /
+                                        (row["units"] - rows[-1]["units"]))
+        rows.append(row)
+        if log:
+            log(row)
+    newScene()
+    return rows
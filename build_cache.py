@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os.path
+import maya.cmds as cmds
+from . import muscle_group
+from . import muscle_templates as mt
+
+
+class BuildCache(object):
+    """
+    remember the computed placement and driven keys of built muscle groups
+
+    an entry is keyed by a hash of the group Tag, its inputs, the rest world matrix of every
+    attach joint, the muscle factors and the template. building the same group on the same
+    skeleton again reuses the entry instead of placing and keying the muscles from scratch
+    """
+
+    def __init__(self, filePath=None, precision=5):
+        self.filePath = filePath
+        self.precision = precision
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if filePath and os.path.exists(filePath):
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        with open(self.filePath) as fp:
+            self.entries = json.load(fp)
+
+    def save(self, filePath=None):
+        filePath = filePath or self.filePath
+        if not filePath:
+            return
+        with open(filePath, "w") as fp:
+            json.dump(self.entries, fp, separators=(",", ":"))
+
+    def clear(self):
+        self.entries = {}
+
+    def groupKey(self, group, positions=None):
+        """
+        :param group: BipedMuscles, constructed but not added yet
+        :param positions: positions the group will be placed at after add(), part of the key
+        :return: hex digest
+        """
+        keyData = {"tag": group.tag,
+                   "inputs": group.inputs(),
+                   "factors": [muscle_group.COMPRESSION_FACTOR, muscle_group.STRETCH_FACTOR],
+                   "template": mt.TEMPLATES.get(group.tag),
+                   "positions": positions,
+                   "matrices": dict((joint, [round(value, self.precision) + 0.0 for value in
+                                             cmds.xform(joint, query=True, matrix=True, worldSpace=True)])
+                                    for joint in group.attachJoints())}
+        keyString = json.dumps(keyData, sort_keys=True, default=str)
+        return hashlib.sha1(keyString.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    @staticmethod
+    def unitPositions(group):
+        """
+        locator positions of every unit, read after add() and before build()
+        """
+        return [[cmds.xform(muscleUnit.originLoc, translation=True, query=True, worldSpace=True),
+                 cmds.xform(muscleUnit.insertionLoc, translation=True, query=True, worldSpace=True)]
+                for muscleUnit in group.muscleUnitGroup]
+
+    def store(self, key, group, positions):
+        """
+        :param group: built group
+        :param positions: result of unitPositions() taken before the build
+        """
+        self.entries[key] = {"muscleName": group.muscleName,
+                             "positions": positions,
+                             "sdkKeys": [muscleUnit.sdkKeys for muscleUnit in group.muscleUnitGroup]}
+        return self.entries[key]
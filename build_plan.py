@@ -0,0 +1,369 @@
+import time
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+from . import helper_joints
+from . import muscle_group
+from . import muscle_units as mu
+from . import tracing
+
+
+def helperJointNames(upperArm, lowerArm, jointCount=3, counterFlipMode="analytic", upperJointCount=None):
+    """
+    names of the joints helper_joints.autoCreate makes for one arm
+    :param upperArm: shoulder joint
+    :param lowerArm: elbow joint
+    :param jointCount: forearm twist joint count, also the upper arm one if upperJointCount is not given
+    :param counterFlipMode: the sdk counter flip adds a Dn joint
+    :return: list of joint names
+    """
+    upperJointCount = jointCount if upperJointCount is None else upperJointCount
+    names = ["{0}_{1}".format(lowerArm, name)
+             for name in ["TwistBase", "TwistValue"] + ["Twist{0}".format(i) for i in range(1, jointCount + 1)]]
+    upperNames = ["CounterTwist", "Up", "TwistBase", "TwistValue"] + (["Dn"] if counterFlipMode == "sdk" else [])
+    upperNames.extend("Twist{0}".format(i) for i in range(1, upperJointCount + 1))
+    names.extend("{0}_{1}".format(upperArm, name) for name in upperNames)
+    return names
+
+
+def estimateHelperNodeCount(jointCount=3, twistMode="constraint", counterFlipMode="analytic", upperJointCount=None):
+    upperJointCount = jointCount if upperJointCount is None else upperJointCount
+    # counter flip: sdk makes a Dn joint, multMatrix, decomposeMatrix, vectorProduct and 3 curves,
+    # analytic makes 4 vectorProduct and a distanceBetween
+    counterFlipCount = 7 if counterFlipMode == "sdk" else 5
+    return sum(helper_joints.twistCost(jointCount, twistMode)) + \
+        sum(helper_joints.twistCost(upperJointCount, twistMode, upper=True)) + counterFlipCount
+
+
+class BuildStep(object):
+    """
+    one node of the build graph, either a helper joint limb or a muscle group
+    """
+
+    def __init__(self, name, kind, requires, provides, data):
+        self.name = name
+        self.kind = kind
+        self.requires = set(requires)
+        self.provides = set(provides)
+        self.data = data
+        self.dependencies = set()
+
+    def __repr__(self):
+        return "BuildStep({0}, {1})".format(self.name, self.kind)
+
+    def nodeCount(self):
+        if self.kind == "helper":
+            return estimateHelperNodeCount(self.data["jointCount"], self.data["twistMode"],
+                                           self.data["counterFlipMode"], self.data["upperJointCount"])
+        groupClass = self.data["groupClass"]
+        # one network node holds the group metadata
+        return len(groupClass.unitSuffixes) * mu.MuscleJoint.builtNodeCount + groupClass.groupConstraintCount + 1
+
+
+class BuildPlan(object):
+    """
+    resolve muscle groups and helper joints into a dependency graph and build it in order
+
+    every step lists the scene nodes it needs and the nodes it makes, a step depends on
+    whichever step makes one of its inputs. steps with no dependency between them are
+    built together in one undo chunk
+    """
+
+    def __init__(self, cache=None):
+        """
+        :param cache: optional build_cache.BuildCache, saved after execute()
+        """
+        self.steps = []
+        self.cache = cache
+
+    def __len__(self):
+        return len(self.steps)
+
+    def step(self, name):
+        for buildStep in self.steps:
+            if buildStep.name == name:
+                return buildStep
+
+    def addStep(self, buildStep):
+        if self.step(buildStep.name):
+            raise RuntimeError("Build step '{0}' already exists".format(buildStep.name))
+        self.steps.append(buildStep)
+        return buildStep
+
+    def addHelperLimb(self, upperArm, lowerArm, wrist, rotationAxis="z", jointCount=3, twistMode="constraint",
+                      counterFlipMode="analytic", twistBudget=helper_joints.TWIST_BUDGET, maxSegmentLength=None,
+                      name=None):
+        """
+        :param jointCount: twist joint count, None picks the forearm and upper arm counts from twistBudget
+        :param maxSegmentLength: largest distance between twist joints when the counts are picked
+        """
+        upperJointCount = jointCount
+        if jointCount is None:
+            for joint in [upperArm, wrist]:
+                if not cmds.objExists(joint):
+                    raise RuntimeError("'{0}' is needed to pick the twist joint count".format(joint))
+            jointCount, upperJointCount = [segment["jointCount"] for segment in helper_joints.limbTwistPlan(
+                upperArm, lowerArm, wrist, twistBudget=twistBudget, twistMode=twistMode,
+                maxSegmentLength=maxSegmentLength)]
+        data = {"upperArm": upperArm, "lowerArm": lowerArm, "wrist": wrist, "rotationAxis": rotationAxis,
+                "jointCount": jointCount, "upperJointCount": upperJointCount, "twistMode": twistMode,
+                "counterFlipMode": counterFlipMode, "twistBudget": twistBudget, "maxSegmentLength": maxSegmentLength}
+        return self.addStep(BuildStep(name or "{0}_helpers".format(upperArm), "helper",
+                                      requires=[upperArm, lowerArm, wrist],
+                                      provides=helperJointNames(upperArm, lowerArm, jointCount, counterFlipMode,
+                                                                upperJointCount),
+                                      data=data))
+
+    def addGroup(self, muscleName, tag, inputs, positions=None):
+        groupClass = muscle_group.groupClass(tag)
+        if not groupClass:
+            raise RuntimeError("Unknown muscle group type '{0}'".format(tag))
+        provides = []
+        for suffix in groupClass.unitSuffixes:
+            provides.extend(mu.MuscleJoint.jointNames(muscleName + suffix))
+        data = {"groupClass": groupClass, "inputs": dict(inputs), "positions": positions}
+        return self.addStep(BuildStep(muscleName, "group", requires=inputs.values(), provides=provides, data=data))
+
+    @classmethod
+    def fromData(cls, muscleData, helperLimbs=None, cache=None):
+        """
+        :param muscleData: dict in the exportMuscles file layout
+        :param helperLimbs: list of addHelperLimb keyword dicts
+        :param cache: optional build_cache.BuildCache
+        """
+        plan = cls(cache=cache)
+        for limb in helperLimbs or []:
+            plan.addHelperLimb(**limb)
+        for muscleName, attributes in muscleData.items():
+            if not muscle_group.groupClass(str(attributes.get("Tag"))):
+                continue
+            plan.addGroup(muscleName, attributes.get("Tag"), attributes.get("inputs", {}),
+                          positions=muscle_group.groupPositions(attributes) or None)
+        return plan
+
+    def resolve(self):
+        """
+        :return: list of batches, each batch is a list of steps that only depend on earlier batches
+        """
+        producers = {}
+        for buildStep in self.steps:
+            for node in buildStep.provides:
+                producers[node] = buildStep
+        for buildStep in self.steps:
+            buildStep.dependencies = set(producers[node] for node in buildStep.requires
+                                         if node in producers and producers[node] is not buildStep)
+
+        batches = []
+        done = set()
+        remaining = list(self.steps)
+        while remaining:
+            batch = [s for s in remaining if s.dependencies.issubset(done)]
+            if not batch:
+                raise RuntimeError("Cyclic build dependency between: {0}".format(
+                    ", ".join(s.name for s in remaining)))
+            batches.append(batch)
+            done.update(batch)
+            remaining = [s for s in remaining if s not in done]
+        return batches
+
+    def missingInputs(self):
+        produced = set()
+        for buildStep in self.steps:
+            produced.update(buildStep.provides)
+        required = set()
+        for buildStep in self.steps:
+            required.update(buildStep.requires)
+        return sorted(node for node in required - produced if not cmds.objExists(node))
+
+    def dryRun(self):
+        """
+        report the build order and estimated node count without touching the scene
+        :return: report as str
+        """
+        lines = []
+        total = 0
+        for index, batch in enumerate(self.resolve()):
+            lines.append("Batch {0}:".format(index + 1))
+            for buildStep in batch:
+                count = buildStep.nodeCount()
+                total += count
+                after = ", ".join(sorted(s.name for s in buildStep.dependencies)) or "-"
+                lines.append("    {0:<24} {1:<7} ~{2} nodes  after: {3}".format(
+                    buildStep.name, buildStep.kind, count, after))
+        lines.append("Estimated nodes: {0}".format(total))
+        missing = self.missingInputs()
+        if missing:
+            lines.append("Missing inputs: {0}".format(", ".join(missing)))
+        return "\n".join(lines)
+
+    def buildHelper(self, buildStep):
+        """
+        :return: list of the nodes autoCreate made
+        """
+        data = buildStep.data
+        return helper_joints.autoCreate(data["upperArm"], data["lowerArm"], data["wrist"],
+                                        rotationAxis=data["rotationAxis"], jointCount=data["jointCount"],
+                                        twistMode=data["twistMode"], counterFlipMode=data["counterFlipMode"],
+                                        upperJointCount=data["upperJointCount"])
+
+    def addGroupInstance(self, buildStep):
+        """
+        :return: added group instance, its cache key and cache entry, both None without a cache
+        """
+        newInstance = buildStep.data["groupClass"](buildStep.name, **buildStep.data["inputs"])
+        cacheKey = cacheEntry = None
+        if self.cache is not None:
+            cacheKey = self.cache.groupKey(newInstance, buildStep.data["positions"])
+            cacheEntry = self.cache.get(cacheKey)
+        newInstance.add(positions=cacheEntry["positions"] if cacheEntry else None)
+        return newInstance, cacheKey, cacheEntry
+
+    @tracing.operation
+    def buildBatch(self, batch):
+        """
+        helper joints first, then add(), placement and build() for every group of the batch
+        :return: dict of step name to built group instance
+        """
+        instances = {}
+        with mu.undoChunk():
+            for buildStep in batch:
+                if buildStep.kind == "helper":
+                    self.buildHelper(buildStep)
+            groupSteps = [s for s in batch if s.kind == "group"]
+            cacheKeys = {}
+            cacheEntries = {}
+            for buildStep in groupSteps:
+                newInstance, cacheKey, cacheEntry = self.addGroupInstance(buildStep)
+                if self.cache is not None:
+                    cacheKeys[buildStep.name] = cacheKey
+                    cacheEntries[buildStep.name] = cacheEntry
+                instances[buildStep.name] = newInstance
+            for buildStep in groupSteps:
+                if buildStep.data["positions"]:
+                    muscle_group.placeMuscleUnits(instances[buildStep.name], buildStep.data["positions"])
+
+            newPositions = {}
+            for name in cacheKeys:
+                if not cacheEntries[name]:
+                    newPositions[name] = self.cache.unitPositions(instances[name])
+            for buildStep in groupSteps:
+                entry = cacheEntries.get(buildStep.name)
+                instances[buildStep.name].build(sdkKeys=entry["sdkKeys"] if entry else None)
+            for name, positions in newPositions.items():
+                self.cache.store(cacheKeys[name], instances[name], positions)
+        return instances
+
+    def buildStep(self, buildStep):
+        """
+        build a single step, the same work buildBatch does for it
+        :return: built group instance, the list of created nodes for helper steps
+        """
+        if buildStep.kind == "helper":
+            return self.buildHelper(buildStep)
+        newInstance, cacheKey, cacheEntry = self.addGroupInstance(buildStep)
+        if buildStep.data["positions"]:
+            muscle_group.placeMuscleUnits(newInstance, buildStep.data["positions"])
+        positions = self.cache.unitPositions(newInstance) if cacheKey and not cacheEntry else None
+        newInstance.build(sdkKeys=cacheEntry["sdkKeys"] if cacheEntry else None)
+        if positions is not None:
+            self.cache.store(cacheKey, newInstance, positions)
+        return newInstance
+
+    @tracing.operation
+    def execute(self):
+        """
+        :return: built group instances in the order they were added to the plan
+        """
+        instances = {}
+        for batch in self.resolve():
+            instances.update(self.buildBatch(batch))
+        if self.cache is not None:
+            self.cache.save()
+        return [instances[s.name] for s in self.steps if s.name in instances]
+
+
+class BuildJob(object):
+    """
+    build a plan one step per call, so the caller can hand control back to maya between steps
+
+    every step is its own undo chunk. rollback() deletes what the finished steps made, newest
+    first, and undoes a step that failed half way when its chunk is still the last undo step
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.steps = [buildStep for batch in plan.resolve() for buildStep in batch]
+        self.index = 0
+        self.instances = {}
+        self.timings = []
+        # (step, group instance or list of helper nodes) in build order
+        self.built = []
+        self.failedChunk = None
+
+    def __len__(self):
+        return len(self.steps)
+
+    @property
+    def done(self):
+        return self.index >= len(self.steps)
+
+    def nextStep(self):
+        return None if self.done else self.steps[self.index]
+
+    def step(self):
+        """
+        build the next step and log how long it took
+        :return: the step that was built
+        """
+        buildStep = self.steps[self.index]
+        chunkName = "BuildJob_{0}_{1}".format(id(self), buildStep.name)
+        start = time.time()
+        self.failedChunk = chunkName
+        with mu.undoChunk(chunkName):
+            result = self.plan.buildStep(buildStep)
+        self.failedChunk = None
+        seconds = time.time() - start
+        self.index += 1
+        self.built.append((buildStep, result))
+        if buildStep.kind == "group":
+            self.instances[buildStep.name] = result
+        self.timings.append((buildStep.name, seconds))
+        om.MGlobal.displayInfo("{0} ({1}) built in {2:.3f}s".format(buildStep.name, buildStep.kind, seconds))
+        return buildStep
+
+    def eta(self):
+        """
+        :return: seconds left from the average step time so far, None before the first step
+        """
+        if not self.timings:
+            return None
+        average = sum(seconds for _, seconds in self.timings) / len(self.timings)
+        return average * (len(self.steps) - self.index)
+
+    def finish(self):
+        """
+        :return: built group instances in the order they were added to the plan
+        """
+        if self.plan.cache is not None:
+            self.plan.cache.save()
+        om.MGlobal.displayInfo("Built {0} steps in {1:.3f}s".format(
+            len(self.timings), sum(seconds for _, seconds in self.timings)))
+        return [self.instances[s.name] for s in self.plan.steps if s.name in self.instances]
+
+    def rollback(self):
+        """
+        remove what the job built, the scene edits made in between are kept
+        """
+        if self.failedChunk and cmds.undoInfo(query=True, undoName=True) == self.failedChunk:
+            cmds.undo()
+        self.failedChunk = None
+        with mu.undoChunk():
+            for buildStep, result in reversed(self.built):
+                if buildStep.kind == "group":
+                    result.delete()
+                else:
+                    nodes = [node for node in result if cmds.objExists(node)]
+                    if nodes:
+                        cmds.delete(nodes)
+        self.built = []
+        self.instances = {}
+        self.index = len(self.steps)
@@ -1,5 +1,8 @@
+import math
 import maya.cmds as cmds
 import maya.api.OpenMaya as om
+from . import muscle_units as mu
+from . import tracing
 
 
 def duplicateJoint(inputJoint, group=None, name="copy"):
@@ -10,15 +13,28 @@ def duplicateJoint(inputJoint, group=None, name="copy"):
     :param name: joint name
     :return: joint name as str
     """
-    # create joint
-    cmds.select(clear=True)
-    copyJoint = cmds.joint(name="{0}_{1}".format(group, name), position=(0, 0, 0))
-    # match transformation
-    cmds.matchTransform(copyJoint, inputJoint)
-    cmds.parent(copyJoint, inputJoint)
-    # freeze rotation to jointOrient
-    cmds.makeIdentity(copyJoint, apply=True)
-    return copyJoint
+    return duplicateJoints([{"source": inputJoint, "name": "{0}_{1}".format(group, name)}])[0]
+
+
+def duplicateJoints(specs):
+    """
+    copy many joints in one go, each copy takes the world position and orientation of its source
+    :param specs: list of dicts with "source" (a joint or a name earlier in the list), "name",
+                  optional "translate" offset in source space and "parent", the source if not given
+    :return: list of joint names
+    """
+    worldMatrices = {}
+    jointSpecs = []
+    for spec in specs:
+        source = spec["source"]
+        sourceMatrix = worldMatrices.get(source)
+        if sourceMatrix is None:
+            sourceMatrix = om.MMatrix(cmds.xform(source, query=True, matrix=True, ws=True))
+        offset = list(spec.get("translate", [0, 0, 0]))
+        worldMatrix = om.MMatrix([1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0] + offset + [1]) * sourceMatrix
+        worldMatrices[spec["name"]] = worldMatrix
+        jointSpecs.append({"name": spec["name"], "matrix": worldMatrix, "parent": spec.get("parent", source)})
+    return mu.createJoints(jointSpecs)
 
 
 def getLength(startJoint, endJoint):
@@ -28,51 +44,249 @@ def getLength(startJoint, endJoint):
     return Length
 
 
-def forArmTwist(lowerArm=None, wrist=None, jointCount=3, aimVec=None, upVector=None):
+TWIST_MODES = ("constraint", "matrix")
+
+
+def loadTwistPlugins():
+    for plugin in ["matrixNodes", "quatNodes"]:
+        if not cmds.pluginInfo(plugin, query=True, loaded=True):
+            cmds.loadPlugin(plugin, quiet=True)
+
+
+def vectorAxis(vector):
+    """
+    :return: "x", "y" or "z", the main axis of vector
+    """
+    absVector = [abs(value) for value in vector]
+    return "xyz"[absVector.index(max(absVector))]
+
+
+def twistNetwork(twistJoint, referenceJoint, aimAxis="y", name=None, created=None):
+    """
+    swing-twist split of twistJoint in referenceJoint space, the current pose is taken as rest
+    multMatrix -> decomposeMatrix -> quatNormalize(aim axis and w only) -> quatToEuler
+    :param twistJoint: joint whose twist is read
+    :param referenceJoint: joint the twist is measured against
+    :param aimAxis: twist axis
+    :param name: node name prefix
+    :param created: list the new nodes are appended to
+    :return: plug with the twist angle around aimAxis
+    """
+    loadTwistPlugins()
+    name = name or twistJoint
+    axis = aimAxis.upper()
+
+    restMatrix = om.MMatrix(cmds.xform(twistJoint, query=True, matrix=True, ws=True)) * \
+        om.MMatrix(cmds.xform(referenceJoint, query=True, matrix=True, ws=True)).inverse()
+
+    MTMNode = cmds.createNode("multMatrix", name="{0}_twistMTM".format(name))
+    cmds.setAttr("{0}.matrixIn[0]".format(MTMNode), list(restMatrix.inverse()), type="matrix")
+    cmds.connectAttr("{0}.worldMatrix[0]".format(twistJoint), "{0}.matrixIn[1]".format(MTMNode))
+    cmds.connectAttr("{0}.worldInverseMatrix[0]".format(referenceJoint), "{0}.matrixIn[2]".format(MTMNode))
+
+    DCPMNode = cmds.createNode("decomposeMatrix", name="{0}_twistDCPM".format(name))
+    cmds.connectAttr("{0}.matrixSum".format(MTMNode), "{0}.inputMatrix".format(DCPMNode))
+
+    # dropping the other two components leaves the twist part of the rotation
+    QTNNode = cmds.createNode("quatNormalize", name="{0}_twistQTN".format(name))
+    for component in [axis, "W"]:
+        cmds.connectAttr("{0}.outputQuat{1}".format(DCPMNode, component),
+                         "{0}.inputQuat{1}".format(QTNNode, component))
+
+    QTENode = cmds.createNode("quatToEuler", name="{0}_twistQTE".format(name))
+    cmds.connectAttr("{0}.outputQuat".format(QTNNode), "{0}.inputQuat".format(QTENode))
+    # the first axis of the rotate order keeps the full -180 to 180 range: xyz, yzx or zxy
+    cmds.setAttr("{0}.inputRotateOrder".format(QTENode), "xyz".index(aimAxis))
+    if created is not None:
+        created.extend([MTMNode, DCPMNode, QTNNode, QTENode])
+    return "{0}.outputRotate{1}".format(QTENode, axis)
+
+
+def distributeTwist(twistPlug, joints, weights, aimAxis="y", name="twist", created=None):
+    """
+    drive rotate<aimAxis> of every joint with twist * weight, one multiplyDivide per three joints
+    :param created: list the new nodes are appended to
+    """
+    MDNodes = []
+    for start in range(0, len(joints), 3):
+        MDNode = cmds.createNode("multiplyDivide", name="{0}_twist{1}_MD".format(name, start // 3 + 1))
+        for joint, weight, channel in zip(joints[start:start + 3], weights[start:start + 3], "XYZ"):
+            cmds.connectAttr(twistPlug, "{0}.input1{1}".format(MDNode, channel))
+            cmds.setAttr("{0}.input2{1}".format(MDNode, channel), weight)
+            cmds.connectAttr("{0}.output{1}".format(MDNode, channel),
+                             "{0}.rotate{1}".format(joint, aimAxis.upper()))
+        MDNodes.append(MDNode)
+    if created is not None:
+        created.extend(MDNodes)
+    return MDNodes
+
+
+# largest twist in degrees allowed between neighbouring twist joints when the count is picked automatically
+TWIST_BUDGET = 45.0
+# twist ranges used when the joint has no rotate limits on its twist axis
+FOREARM_TWIST_RANGE = 180.0
+UPPER_ARM_TWIST_RANGE = 90.0
+
+
+def twistWeights(jointCount, upper=False):
+    """
+    share of the twist every twist joint follows, from the limb root to its end
+    :param upper: the upper arm keeps a tenth of the twist on its first joint at the shoulder
+    """
+    if upper:
+        return [0.1] + [float(i) / jointCount for i in range(1, jointCount)]
+    return [float(i) / jointCount for i in range(1, jointCount + 1)]
+
+
+def twistError(weights, twistRange):
+    """
+    :return: largest twist in degrees between two neighbouring joints, limb root and end included
+    """
+    steps = [0.0] + list(weights) + [1.0]
+    return max(b - a for a, b in zip(steps, steps[1:])) * twistRange
+
+
+def twistRange(joint, aimAxis="y", default=FOREARM_TWIST_RANGE):
+    """
+    :return: twist range of joint from its rotate limits on aimAxis, default if they are not enabled
+    """
+    axis = aimAxis.upper()
+    enabled = cmds.transformLimits(joint, query=True, **{"enableRotation" + axis: True})
+    if not enabled or not all(enabled):
+        return default
+    limits = cmds.transformLimits(joint, query=True, **{"rotation" + axis: True})
+    return limits[1] - limits[0]
+
+
+def twistJointCount(twistRange, twistBudget=TWIST_BUDGET, upper=False, length=None, maxSegmentLength=None,
+                    maxCount=8):
+    """
+    smallest joint count keeping the twist between joints under twistBudget
+    :param length: limb segment length, only needed with maxSegmentLength
+    :param maxSegmentLength: also keep the distance between joints under this
+    """
+    for jointCount in range(1, maxCount + 1):
+        if twistError(twistWeights(jointCount, upper), twistRange) > twistBudget + 1e-6:
+            continue
+        if maxSegmentLength and length / jointCount > maxSegmentLength:
+            continue
+        return jointCount
+    return maxCount
+
+
+def twistCost(jointCount, mode="constraint", upper=False):
+    """
+    :return: helper joint count and constraint or utility node count of one twisting limb segment
+    """
+    joints = jointCount + (4 if upper else 2)
+    if mode == "matrix":
+        # 4 twist extraction nodes, one multiplyDivide per three joints, the upper arm keeps its counter aim
+        return joints, 4 + (jointCount + 2) // 3 + (1 if upper else 0)
+    return joints, jointCount + (2 if upper else 1)
+
+
+def limbTwistPlan(upperArm, lowerArm, wrist, jointCount=None, twistBudget=TWIST_BUDGET, twistMode="constraint",
+                  aimAxis="y", maxSegmentLength=None):
+    """
+    twist joint count, cost and remaining error of the forearm and upper arm, the scene is not changed
+    :param jointCount: fixed count for both segments, picked from the twist ranges and lengths if None
+    :param maxSegmentLength: largest distance between twist joints when the count is picked, None ignores the length
+    :return: list of dicts for the forearm then the upper arm
+    """
+    plan = []
+    for segment, joint, default, upper, length in [
+            ("forearm", wrist, FOREARM_TWIST_RANGE, False, getLength(lowerArm, wrist)),
+            ("upperArm", upperArm, UPPER_ARM_TWIST_RANGE, True, getLength(upperArm, lowerArm))]:
+        segmentRange = twistRange(joint, aimAxis, default)
+        count = jointCount or twistJointCount(segmentRange, twistBudget, upper=upper, length=length,
+                                              maxSegmentLength=maxSegmentLength)
+        joints, nodes = twistCost(count, twistMode, upper=upper)
+        plan.append({"segment": segment, "jointCount": count, "twistRange": segmentRange, "length": length,
+                     "joints": joints, "nodes": nodes,
+                     "maxError": twistError(twistWeights(count, upper), segmentRange)})
+    return plan
+
+
+@tracing.operation
+def forArmTwist(lowerArm=None, wrist=None, jointCount=3, aimVec=None, upVector=None, mode="constraint",
+                twistBudget=TWIST_BUDGET, maxSegmentLength=None, created=None):
     """
     :param lowerArm: elbow joint
     :param wrist: wrist joint
-    :param jointCount: twist joint count
+    :param jointCount: twist joint count, None picks it from the wrist twist range and twistBudget
+    :param maxSegmentLength: largest distance between twist joints when the count is picked
     :param aimVec: joint orient main axis
     :param upVector: wrist side axis direction
+    :param mode: "constraint" blends every twist joint with an orientConstraint,
+                 "matrix" reads the wrist twist once and spreads it with multiplyDivide nodes
+    :param created: list the new nodes are appended to
     """
+    if mode not in TWIST_MODES:
+        raise RuntimeError("Invalid twist mode, should be in {0}".format(TWIST_MODES))
     # default aim axis "y", up axis "z"
     if aimVec is None:
         aimVec = [0, 1, 0]
     if upVector is None:
         upVector = [0, 0, 1]
-    # duplicate two joints and get length
-    elbowTwistBaseJoint = duplicateJoint(lowerArm, group=lowerArm, name="TwistBase")
-    elbowTwistValueJoint = duplicateJoint(elbowTwistBaseJoint, group=lowerArm, name="TwistValue")
     armLength = getLength(lowerArm, wrist)
-
+    if jointCount is None:
+        jointCount = twistJointCount(twistRange(wrist, vectorAxis(aimVec), FOREARM_TWIST_RANGE), twistBudget,
+                                     length=armLength, maxSegmentLength=maxSegmentLength)
+    # duplicate two joints and the twist joints spread along the aim vector
+    baseName = "{0}_TwistBase".format(lowerArm)
+    jointSpecs = [{"source": lowerArm, "name": baseName},
+                  {"source": baseName, "name": "{0}_TwistValue".format(lowerArm)}]
     for i in range(1, jointCount + 1):
-        # copy joint and set offset value
-        twistJoints = duplicateJoint(lowerArm, group=lowerArm, name="Twist{0}".format(i))
         offset = armLength / jointCount * i
-        # transfer offset to aim vector and move
-        jointPos = [element * offset for element in aimVec]
-        cmds.xform(twistJoints, translation=jointPos)
+        jointSpecs.append({"source": lowerArm, "name": "{0}_Twist{1}".format(lowerArm, i),
+                           "translate": [element * offset for element in aimVec]})
+    createdJoints = duplicateJoints(jointSpecs)
+    if created is None:
+        created = []
+    created.extend(createdJoints)
+    elbowTwistBaseJoint, elbowTwistValueJoint = createdJoints[:2]
+    twistJointList = createdJoints[2:]
+
+    weights = twistWeights(jointCount)
+    for i, twistJoints in enumerate(twistJointList, 1):
+        if mode == "matrix":
+            continue
         # set orientConstraint and weight percent
         orCons = cmds.orientConstraint(elbowTwistBaseJoint, elbowTwistValueJoint, twistJoints, mo=False, weight=1)[0]
-        cmds.setAttr("{0}.{1}W0".format(orCons, elbowTwistBaseJoint), 1 / jointCount * (jointCount - i))
-        cmds.setAttr("{0}.{1}W1".format(orCons, elbowTwistValueJoint), 1 / jointCount * i)
+        cmds.setAttr("{0}.{1}W0".format(orCons, elbowTwistBaseJoint), 1 - weights[i - 1])
+        cmds.setAttr("{0}.{1}W1".format(orCons, elbowTwistValueJoint), weights[i - 1])
         # change constraint interp type to shortest
         cmds.setAttr("{0}.interpType".format(orCons), 2)
+        created.append(orCons)
+    if mode == "matrix":
+        aimAxis = vectorAxis(aimVec)
+        twistPlug = twistNetwork(wrist, lowerArm, aimAxis=aimAxis, name=lowerArm, created=created)
+        cmds.connectAttr(twistPlug, "{0}.rotate{1}".format(elbowTwistValueJoint, aimAxis.upper()))
+        distributeTwist(twistPlug, twistJointList, weights, aimAxis=aimAxis, name=lowerArm, created=created)
+        return
+
     # aimConstraint twistValueJoint by wrist to get wrist twist value
-    cmds.aimConstraint(wrist, elbowTwistValueJoint, aimVector=aimVec, upVector=upVector,
-                       worldUpType="objectrotation", worldUpObject=wrist, worldUpVector=upVector)
+    created += cmds.aimConstraint(wrist, elbowTwistValueJoint, aimVector=aimVec, upVector=upVector,
+                                  worldUpType="objectrotation", worldUpObject=wrist, worldUpVector=upVector)
 
 
-def upperArmTwist(upperArm=None, lowerArm=None, jointCount=3, aimVec=None, upVector=None, jointUpVector=None):
+@tracing.operation
+def upperArmTwist(upperArm=None, lowerArm=None, jointCount=3, aimVec=None, upVector=None, jointUpVector=None,
+                  mode="constraint", twistBudget=TWIST_BUDGET, maxSegmentLength=None, created=None):
     """
     :param upperArm: shoulder joint
     :param lowerArm: elbow joint
-    :param jointCount: twist joint count
+    :param jointCount: twist joint count, None picks it from the shoulder twist range and twistBudget
+    :param maxSegmentLength: largest distance between twist joints when the count is picked
     :param aimVec: joint main axis
     :param jointUpVector: up joint offset axis
     :param upVector:
+    :param mode: "constraint" or "matrix", see forArmTwist
+    :param created: list the new nodes are appended to
+    :return: up joint
     """
+    if mode not in TWIST_MODES:
+        raise RuntimeError("Invalid twist mode, should be in {0}".format(TWIST_MODES))
     # default aim axis "y", up axis "z"
     if aimVec is None:
         aimVec = [0, 1, 0]
@@ -81,52 +295,100 @@ def upperArmTwist(upperArm=None, lowerArm=None, jointCount=3, aimVec=None, upVec
     if jointUpVector is None:
         jointUpVector = [-1, 0, 0]
 
-    upperArmCounterTwist = duplicateJoint(upperArm, group=upperArm, name="CounterTwist")
-    upperArmTwistUpJoint = duplicateJoint(upperArm, group=upperArm, name="Up")
     armLength = getLength(upperArm, lowerArm)
+    if jointCount is None:
+        jointCount = twistJointCount(twistRange(upperArm, vectorAxis(aimVec), UPPER_ARM_TWIST_RANGE), twistBudget,
+                                     upper=True, length=armLength, maxSegmentLength=maxSegmentLength)
     upJointPos = [element * armLength/3 for element in jointUpVector]
-    cmds.xform(upperArmTwistUpJoint, translation=upJointPos)
     clavicleJoint = cmds.listRelatives(upperArm, parent=True)[0]
-    cmds.parent(upperArmTwistUpJoint, clavicleJoint)
-
-    upperArmTwistBaseJoint = duplicateJoint(upperArmCounterTwist, group=upperArm, name="TwistBase")
-    upperArmTwistValueJoint = duplicateJoint(upperArmCounterTwist, group=upperArm, name="TwistValue")
-
+    counterTwistName = "{0}_CounterTwist".format(upperArm)
+    jointSpecs = [{"source": upperArm, "name": counterTwistName},
+                  {"source": upperArm, "name": "{0}_Up".format(upperArm), "translate": upJointPos,
+                   "parent": clavicleJoint},
+                  {"source": counterTwistName, "name": "{0}_TwistBase".format(upperArm)},
+                  {"source": counterTwistName, "name": "{0}_TwistValue".format(upperArm)}]
     for i in range(0, jointCount):
-        twistJoints = duplicateJoint(upperArm, group=upperArm, name="Twist{0}".format(i + 1))
         offset = armLength / jointCount * i
-        jointPos = [element * offset for element in aimVec]
-        cmds.xform(twistJoints, translation=jointPos)
+        jointSpecs.append({"source": upperArm, "name": "{0}_Twist{1}".format(upperArm, i + 1),
+                           "translate": [element * offset for element in aimVec]})
+    createdJoints = duplicateJoints(jointSpecs)
+    if created is None:
+        created = []
+    created.extend(createdJoints)
+    upperArmCounterTwist, upperArmTwistUpJoint, upperArmTwistBaseJoint, upperArmTwistValueJoint = createdJoints[:4]
+    twistJointList = createdJoints[4:]
+
+    weights = twistWeights(jointCount, upper=True)
+    for i, twistJoints in enumerate(twistJointList):
+        if mode == "matrix":
+            continue
 
         orCons = cmds.orientConstraint(upperArmTwistBaseJoint, upperArmTwistValueJoint, twistJoints, mo=False, weight=1)[0]
-        if i == 0:
-            cmds.setAttr("{0}.{1}W0".format(orCons, upperArmTwistBaseJoint), 0.9)
-            cmds.setAttr("{0}.{1}W1".format(orCons, upperArmTwistValueJoint), 0.1)
-        else:
-            cmds.setAttr("{0}.{1}W0".format(orCons, upperArmTwistBaseJoint), 1 / jointCount * (jointCount-i))
-            cmds.setAttr("{0}.{1}W1".format(orCons, upperArmTwistValueJoint), 1 / jointCount * i)
+        cmds.setAttr("{0}.{1}W0".format(orCons, upperArmTwistBaseJoint), 1 - weights[i])
+        cmds.setAttr("{0}.{1}W1".format(orCons, upperArmTwistValueJoint), weights[i])
 
         cmds.setAttr("{0}.interpType".format(orCons), 2)
-
-    cmds.aimConstraint(lowerArm, upperArmCounterTwist, aimVector=aimVec, upVector=jointUpVector,
-                       worldUpType="object", worldUpObject=upperArmTwistUpJoint)
-    cmds.aimConstraint(lowerArm, upperArmTwistValueJoint, aimVector=aimVec, upVector=upVector,
-                       worldUpType="objectrotation", worldUpObject=upperArm, worldUpVector=upVector)
+        created.append(orCons)
+
+    created += cmds.aimConstraint(lowerArm, upperArmCounterTwist, aimVector=aimVec, upVector=jointUpVector,
+                                  worldUpType="object", worldUpObject=upperArmTwistUpJoint)
+    if mode == "matrix":
+        # twist joints are children of the upper arm, they take back the part of its twist they should not follow
+        aimAxis = vectorAxis(aimVec)
+        twistPlug = twistNetwork(upperArm, upperArmCounterTwist, aimAxis=aimAxis, name=upperArm, created=created)
+        cmds.connectAttr(twistPlug, "{0}.rotate{1}".format(upperArmTwistValueJoint, aimAxis.upper()))
+        distributeTwist(twistPlug, twistJointList, [weight - 1.0 for weight in weights],
+                        aimAxis=aimAxis, name=upperArm, created=created)
+        return upperArmTwistUpJoint
+
+    created += cmds.aimConstraint(lowerArm, upperArmTwistValueJoint, aimVector=aimVec, upVector=upVector,
+                                  worldUpType="objectrotation", worldUpObject=upperArm, worldUpVector=upVector)
 
     return upperArmTwistUpJoint
 
 
-def shoulderCounterFilp(upperArm, lowerArm, armUpJoint, jointAxis, rotationAxis="z"):
+def rotatedWorldMatrix(joint, rotationAxis, angle):
+    """
+    world matrix joint would have with rotate<rotationAxis> set to angle, the scene is not changed
+    """
+    rotateOrder = cmds.getAttr("{0}.rotateOrder".format(joint))
+    rotateValues = cmds.getAttr("{0}.rotate".format(joint))[0]
+    newValues = list(rotateValues)
+    newValues["xyz".index(rotationAxis)] = angle
+
+    restRotation = om.MEulerRotation(*[math.radians(v) for v in rotateValues] + [rotateOrder]).asMatrix()
+    newRotation = om.MEulerRotation(*[math.radians(v) for v in newValues] + [rotateOrder]).asMatrix()
+    rotateAxis = om.MEulerRotation(*[math.radians(v) for v in cmds.getAttr("{0}.rotateAxis".format(joint))[0]]).asMatrix()
+    worldMatrix = om.MMatrix(cmds.xform(joint, query=True, matrix=True, ws=True))
+    return rotateAxis * newRotation * restRotation.inverse() * rotateAxis.inverse() * worldMatrix
+
+
+@tracing.operation
+def shoulderCounterFilp(upperArm, lowerArm, armUpJoint, jointAxis, rotationAxis="z", mode="analytic", created=None):
+    """
+    keep the upper arm up joint from flipping when the arm swings around rotationAxis
+    :param upperArm: shoulder joint
+    :param lowerArm: elbow joint
+    :param armUpJoint: up joint made by upperArmTwist
+    :param jointAxis: joint main axis
+    :param rotationAxis: upper arm swing axis
+    :param mode: "analytic" drives the up joint with a node network on the arm dot product,
+                 "sdk" keys it at -90, 0 and 90 degrees by posing the arm
+    :param created: list the new nodes are appended to
+    """
+    if mode not in ("analytic", "sdk"):
+        raise RuntimeError("Invalid counter flip mode, should be 'analytic' or 'sdk'")
+    if mode == "analytic":
+        return counterFlipNetwork(upperArm, lowerArm, armUpJoint, rotationAxis, created=created)
     # default aim axis "y", up axis "z"
     if jointAxis is None:
         jointAxis = [0, 1, 0]
 
     clavicleJo = cmds.listRelatives(upperArm, parent=True)[0]
 
-    jointDn = duplicateJoint(upperArm, group=upperArm, name="Dn")
     armLength = getLength(upperArm, lowerArm)
     dnJointPos = [element * armLength/3 for element in jointAxis]
-    cmds.xform(jointDn, translation=dnJointPos)
+    jointDn = duplicateJoints([{"source": upperArm, "name": "{0}_Dn".format(upperArm), "translate": dnJointPos}])[0]
 
     cmds.setAttr("{0}.r{1}".format(upperArm, rotationAxis), -90)
     cmds.parent(jointDn, clavicleJo)
@@ -167,13 +429,85 @@ def shoulderCounterFilp(upperArm, lowerArm, armUpJoint, jointAxis, rotationAxis=
 
     cmds.setAttr("{0}.r{1}".format(upperArm, rotationAxis), 0)
     cmds.delete(posTempJoint)
+    if created is not None:
+        created.extend([jointDn, MTMNode, DCPMNode, DotNode])
+        created.extend(cmds.listConnections(armUpJoint, source=True, destination=False, type="animCurveUL") or [])
 
 
-def autoCreate(upperArm, lowerArm, wrist, rotationAxis="z", jointCount=3):
-    forArmTwist(lowerArm=lowerArm, wrist=wrist, jointCount=jointCount)
-    createArmUpJoint = upperArmTwist(upperArm=upperArm, lowerArm=lowerArm, jointCount=jointCount)
+def counterFlipNetwork(upperArm, lowerArm, armUpJoint, rotationAxis="z", created=None):
+    """
+    the up joint rides a circle around the shoulder as the arm swings, with d the cosine between the
+    arm and its -90 direction (1 at -90, 0 at rest, -1 at 90): translate = K + A * sqrt(1 - d * d) + B * d
+    K, A and B are taken from the rest pose, -90 and 90 in the up joint parent space, no pose is set.
+    sqrt(1 - d * d) is the length of the cross product so it never goes negative
+    :param created: list the new nodes are appended to
+    :return: the vectorProduct driving the up joint translate
+    """
+    parentInverse = om.MMatrix(cmds.getAttr("{0}.parentInverseMatrix[0]".format(upperArm)))
+    upLocalMatrix = om.MMatrix(cmds.xform(armUpJoint, query=True, matrix=True, ws=True)) * \
+        om.MMatrix(cmds.xform(upperArm, query=True, matrix=True, ws=True)).inverse()
+    upParentInverse = om.MMatrix(cmds.getAttr("{0}.parentInverseMatrix[0]".format(armUpJoint)))
+    elbowVector = om.MVector(cmds.getAttr("{0}.translate".format(lowerArm))[0])
+
+    def upJointPos(angle):
+        point = om.MPoint(0, 0, 0) * upLocalMatrix * rotatedWorldMatrix(upperArm, rotationAxis, angle) * \
+            upParentInverse
+        return om.MVector(point.x, point.y, point.z)
+
+    restPos, downPos, upPos = upJointPos(0), upJointPos(-90), upJointPos(90)
+    centerPos = (downPos + upPos) * 0.5
+    # divided by the arm length as the dot and cross products below are not normalized
+    armLength = (elbowVector * om.MMatrix(cmds.getAttr("{0}.matrix".format(upperArm)))).length()
+    cosVector = (restPos - centerPos) / armLength
+    dotVector = (downPos - upPos) * 0.5 / armLength
+    downDirection = (elbowVector * rotatedWorldMatrix(upperArm, rotationAxis, -90) * parentInverse).normal()
+
+    armNode = cmds.createNode("vectorProduct", name="{0}_counterFlipArm_VP".format(upperArm))
+    cmds.setAttr("{0}.operation".format(armNode), 3)
+    cmds.connectAttr("{0}.translate".format(lowerArm), "{0}.input1".format(armNode))
+    cmds.connectAttr("{0}.matrix".format(upperArm), "{0}.matrix".format(armNode))
+
+    dotNode = cmds.createNode("vectorProduct", name="{0}_counterFlipDot_VP".format(upperArm))
+    crossNode = cmds.createNode("vectorProduct", name="{0}_counterFlipCross_VP".format(upperArm))
+    cmds.setAttr("{0}.operation".format(crossNode), 2)
+    for node in [dotNode, crossNode]:
+        cmds.connectAttr("{0}.output".format(armNode), "{0}.input1".format(node))
+        cmds.setAttr("{0}.input2".format(node), downDirection.x, downDirection.y, downDirection.z)
+
+    sineNode = cmds.createNode("distanceBetween", name="{0}_counterFlipSine_DB".format(upperArm))
+    cmds.connectAttr("{0}.output".format(crossNode), "{0}.point1".format(sineNode))
+
+    # rows: cosine vector, dot vector, unused, center
+    circleMatrix = list(cosVector) + [0] + list(dotVector) + [0] + [0, 0, 0, 0] + list(centerPos) + [1]
+    circleNode = cmds.createNode("vectorProduct", name="{0}_counterFlip_VP".format(upperArm))
+    cmds.setAttr("{0}.operation".format(circleNode), 4)
+    cmds.setAttr("{0}.matrix".format(circleNode), circleMatrix, type="matrix")
+    cmds.connectAttr("{0}.distance".format(sineNode), "{0}.input1X".format(circleNode))
+    cmds.connectAttr("{0}.outputX".format(dotNode), "{0}.input1Y".format(circleNode))
+    cmds.connectAttr("{0}.output".format(circleNode), "{0}.translate".format(armUpJoint))
+    if created is not None:
+        created.extend([armNode, dotNode, crossNode, sineNode, circleNode])
+    return circleNode
+
+
+@tracing.operation
+def autoCreate(upperArm, lowerArm, wrist, rotationAxis="z", jointCount=3, twistMode="constraint",
+               counterFlipMode="analytic", twistBudget=TWIST_BUDGET, upperJointCount=None, maxSegmentLength=None):
+    """
+    :param jointCount: twist joint count, None picks it per segment from twistBudget and maxSegmentLength
+    :param upperJointCount: upper arm twist joint count when it differs from the forearm one
+    :return: list of the created nodes
+    """
+    created = []
+    forArmTwist(lowerArm=lowerArm, wrist=wrist, jointCount=jointCount, mode=twistMode, twistBudget=twistBudget,
+                maxSegmentLength=maxSegmentLength, created=created)
+    createArmUpJoint = upperArmTwist(upperArm=upperArm, lowerArm=lowerArm,
+                                     jointCount=jointCount if upperJointCount is None else upperJointCount,
+                                     mode=twistMode, twistBudget=twistBudget, maxSegmentLength=maxSegmentLength,
+                                     created=created)
     shoulderCounterFilp(upperArm=upperArm, lowerArm=lowerArm, armUpJoint=createArmUpJoint,
-                        rotationAxis=rotationAxis, jointAxis=[0, 1, 0])
+                        rotationAxis=rotationAxis, jointAxis=[0, 1, 0], mode=counterFlipMode, created=created)
+    return created
 
 
 def generateScapulaLocs(shoulderJo, back3Jo, neckJo, side="L"):
@@ -188,10 +522,17 @@ def generateScapulaLocs(shoulderJo, back3Jo, neckJo, side="L"):
     tipLoc = cmds.spaceLocator(name="{0}_scapulaTipLoc".format(side))[0]
     cmds.delete(cmds.pointConstraint(acromionLoc, scapulaLoc, tipLoc, mo=False, w=True))
     cmds.delete(cmds.pointConstraint(back3Jo, tipLoc, skip=("x", "z"), mo=False, w=True))
+    return [acromionLoc, scapulaLoc, tipLoc]
 
 
-def createScapulaJoints(clavicle, neckJoint, backJoint, upVec=1):
-    loctors = cmds.ls(sl=True)
+@tracing.operation
+def createScapulaJoints(clavicle, neckJoint, backJoint, upVec=1, locators=None, created=None):
+    """
+    :param locators: acromion, scapula and scapula tip locators, the selection if not given
+    :param created: list the new joints and constraint are appended to
+    :return: joint list
+    """
+    loctors = locators or cmds.ls(sl=True)
     locList = [loc.split("Loc")[0] for loc in loctors]
     posList = [cmds.xform(locPos, t=True, ws=True, q=True) for locPos in loctors]
 
@@ -200,24 +541,32 @@ def createScapulaJoints(clavicle, neckJoint, backJoint, upVec=1):
 
     cmds.parent(boneLis[0], clavicle)
 
-    cmds.aimConstraint(neckJoint, boneLis[0], aimVector=[0, 1, 0], upVector=[upVec, 0, 0],
-                       worldUpType="objectrotation", worldUpVector=[0, 1, 0], worldUpObject=backJoint, mo=True,
-                       weight=True)
+    aimCons = cmds.aimConstraint(neckJoint, boneLis[0], aimVector=[0, 1, 0], upVector=[upVec, 0, 0],
+                                 worldUpType="objectrotation", worldUpVector=[0, 1, 0], worldUpObject=backJoint,
+                                 mo=True, weight=True)
+    if created is not None:
+        created.extend(boneLis + aimCons)
+    return boneLis
 
 
-def generateElbowFixLocs(lowerArmJo, upperArmJo, axis="z", side="L"):
-    elbowPos = cmds.xform(lowerArmJo, translation=True, ws=True, q=True)
-    elbowFixRootLoc = cmds.spaceLocator(name="{0}_elbowFixRootLoc".format(side))[0]
+def generateElbowFixLocs(lowerArmJo, upperArmJo, axis="z", side="L", name="elbowFix"):
+    elbowFixRootLoc = cmds.spaceLocator(name="{0}_{1}RootLoc".format(side, name))[0]
     cmds.delete(cmds.parentConstraint(lowerArmJo, elbowFixRootLoc, weight=1))
-    elbowFixLoc = cmds.duplicate(elbowFixRootLoc, name="{0}_elbowFixLoc".format(side))[0]
+    elbowFixLoc = cmds.duplicate(elbowFixRootLoc, name="{0}_{1}Loc".format(side, name))[0]
     cmds.parent(elbowFixLoc, elbowFixRootLoc)
 
     moveLength = getLength(lowerArmJo, upperArmJo)
     cmds.setAttr("{0}.t{1}".format(elbowFixLoc, axis), -moveLength/3)
+    return [elbowFixRootLoc, elbowFixLoc]
 
 
-def createElbowFixJoints(lowerArmJo):
-    loctors = cmds.ls(sl=True)
+@tracing.operation
+def createElbowFixJoints(lowerArmJo, locators=None):
+    """
+    :param locators: root and fix locators, the selection if not given
+    :return: joint list
+    """
+    loctors = locators or cmds.ls(sl=True)
     locList = [loc.split("Loc")[0] for loc in loctors]
     posList = [cmds.xform(locPos, t=True, ws=True, q=True) for locPos in loctors]
     cmds.select(cl=True)
@@ -228,5 +577,137 @@ def createElbowFixJoints(lowerArmJo):
     cmds.makeIdentity(boneLis[0], apply=True, rotate=True, preserveNormals=True, normal=False)
     cmds.parent(boneLis[1], boneLis[0])
     cmds.parent(boneLis[0], lowerArmJo)
+    return boneLis
+
+
+LIMB_JOINTS = {"arm": ["upperArm", "lowerArm", "wrist"],
+               "leg": ["upperLeg", "lowerLeg", "ankle"]}
+
+
+def characterLimbSpecs(jointName="JBD", sides=("L", "R"), legs=False, twistMode="constraint"):
+    """
+    limb specs for a skeleton named like animJoint_cons.AnimationJoint
+    :param jointName: skeleton name prefix
+    :param sides: side prefixes to make specs for
+    :param legs: add thigh and shin twist with a knee fix
+    :return: list of spec dicts for createLimbHelpers
+    """
+    specs = []
+    for side in sides:
+        prefix = "{0}_{1}_".format(jointName, side)
+        specs.append({"name": "{0}_arm".format(side), "kind": "arm", "side": side,
+                      "upperArm": prefix + "shoulder", "lowerArm": prefix + "elbow", "wrist": prefix + "wrist",
+                      "back": "{0}_back3".format(jointName), "neck": "{0}_neck".format(jointName),
+                      "rotationAxis": "z", "fixAxis": "z", "twistMode": twistMode})
+        if legs:
+            specs.append({"name": "{0}_leg".format(side), "kind": "leg", "side": side,
+                          "upperLeg": prefix + "hip", "lowerLeg": prefix + "knee", "ankle": prefix + "ankle",
+                          "fixAxis": "z", "twistMode": twistMode})
+    return specs
+
+
+def limbJoints(spec):
+    """
+    :return: joints a limb spec needs in the scene
+    """
+    kind = spec.get("kind", "arm")
+    if kind not in LIMB_JOINTS:
+        raise RuntimeError("Invalid limb kind '{0}', should be 'arm' or 'leg'".format(kind))
+    joints = [spec[key] for key in LIMB_JOINTS[kind]]
+    if kind == "arm" and spec.get("back"):
+        joints.extend([spec["back"], spec["neck"]])
+    return joints
+
+
+@tracing.operation
+def createLimb(spec):
+    """
+    twist, counter flip, scapula and elbow or knee fix helpers of one limb, no selection is used
+    :return: list of the created nodes
+    """
+    kind = spec.get("kind", "arm")
+    upperJoint, lowerJoint, endJoint = [spec[key] for key in LIMB_JOINTS[kind]]
+    side = spec.get("side", "L")
+    jointCount = spec.get("jointCount", 3)
+    twistMode = spec.get("twistMode", "constraint")
+    twistBudget = spec.get("twistBudget", TWIST_BUDGET)
+    maxSegmentLength = spec.get("maxSegmentLength")
+
+    created = []
+    forArmTwist(lowerArm=lowerJoint, wrist=endJoint, jointCount=jointCount, mode=twistMode, twistBudget=twistBudget,
+                maxSegmentLength=maxSegmentLength, created=created)
+    upJoint = upperArmTwist(upperArm=upperJoint, lowerArm=lowerJoint, jointCount=jointCount, mode=twistMode,
+                            twistBudget=twistBudget, maxSegmentLength=maxSegmentLength, created=created)
+    if spec.get("counterFlip", kind == "arm"):
+        shoulderCounterFilp(upperArm=upperJoint, lowerArm=lowerJoint, armUpJoint=upJoint, jointAxis=[0, 1, 0],
+                            rotationAxis=spec.get("rotationAxis", "z"),
+                            mode=spec.get("counterFlipMode", "analytic"), created=created)
+
+    if kind == "arm" and spec.get("back"):
+        clavicle = cmds.listRelatives(upperJoint, parent=True)[0]
+        locators = generateScapulaLocs(upperJoint, spec["back"], spec["neck"], side=side)
+        createScapulaJoints(clavicle, spec["neck"], spec["back"], upVec=spec.get("scapulaUpVector", 1),
+                            locators=locators, created=created)
+        cmds.delete(locators)
+
+    if spec.get("fixAxis"):
+        locators = generateElbowFixLocs(lowerJoint, upperJoint, axis=spec["fixAxis"], side=side,
+                                        name="elbowFix" if kind == "arm" else "kneeFix")
+        created.extend(createElbowFixJoints(lowerJoint, locators=locators))
+        cmds.delete(locators)
+    return created
+
+
+@tracing.operation
+def createLimbHelpers(limbSpecs):
+    """
+    create the helpers of every limb in one undo chunk, the selection is left as it was
+    :param limbSpecs: list of spec dicts, see characterLimbSpecs
+    :return: dict of limb name to the nodes it created
+    """
+    missing = sorted(set(joint for spec in limbSpecs for joint in limbJoints(spec) if not cmds.objExists(joint)))
+    if missing:
+        raise RuntimeError("Limb joints not found: {0}".format(", ".join(missing)))
+
+    selection = cmds.ls(selection=True)
+    created = {}
+    with mu.undoChunk():
+        for spec in limbSpecs:
+            created[spec.get("name", spec[LIMB_JOINTS[spec.get("kind", "arm")][0]])] = createLimb(spec)
+        if selection:
+            cmds.select(selection, replace=True)
+        else:
+            cmds.select(clear=True)
+    return created
 
 
+def limbReport(created):
+    """
+    :param created: result of createLimbHelpers
+    :return: report as str
+    """
+    lines = ["{0:<16} {1} nodes".format(name, len(nodes)) for name, nodes in created.items()]
+    lines.append("Total: {0} nodes".format(sum(len(nodes) for nodes in created.values())))
+    return "\n".join(lines)
+
+
+def twistReport(limbSpecs):
+    """
+    twist joint count, cost and largest twist between joints of every limb, before or after building
+    :param limbSpecs: list of spec dicts, a "jointCount" of None is picked from "twistBudget" and "maxSegmentLength"
+    :return: report as str
+    """
+    legSegments = {"forearm": "shin", "upperArm": "thigh"}
+    lines = []
+    for spec in limbSpecs:
+        kind = spec.get("kind", "arm")
+        upperJoint, lowerJoint, endJoint = [spec[key] for key in LIMB_JOINTS[kind]]
+        for segment in limbTwistPlan(upperJoint, lowerJoint, endJoint, spec.get("jointCount", 3),
+                                     spec.get("twistBudget", TWIST_BUDGET), spec.get("twistMode", "constraint"),
+                                     maxSegmentLength=spec.get("maxSegmentLength")):
+            lines.append("{0:<16} {1:<9} {2} twist  {3} joints  {4} nodes  max {5:.1f} of {6:.1f} deg".format(
+                spec.get("name", upperJoint),
+                legSegments[segment["segment"]] if kind == "leg" else segment["segment"], segment["jointCount"],
+                segment["joints"],
+                segment["nodes"], segment["maxError"], segment["twistRange"]))
+    return "\n".join(lines)
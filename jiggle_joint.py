@@ -3,6 +3,19 @@ import maya.OpenMayaMPx as ompx
 import math
 
 
+def integrate(currentPos, previousPos, goal, damping, stiffness):
+    """
+    one step of the jiggle simulation, pure math so it runs outside of a compute too
+    :param currentPos: position of the last step, om.MPoint
+    :param previousPos: position of the step before
+    :return: new position as om.MPoint
+    """
+    velocity = (currentPos - previousPos) * (1.0 - damping)
+    newPosition = currentPos + velocity
+    goalForce = (goal - newPosition) * stiffness
+    return newPosition + goalForce
+
+
 class JiggleJoint(ompx.MPxNode):
     kPluginNodeId = om.MTypeId(0x00001234)
 
@@ -46,10 +59,7 @@ class JiggleJoint(ompx.MPxNode):
             data.setClean(plug)
             return
 
-        velocity = (self.currentPos - self.previousPos) * (1.0 - damping)
-        newPosition = self.currentPos + velocity
-        goalForce = (goal - newPosition) * stiffness
-        newPosition += goalForce
+        newPosition = integrate(self.currentPos, self.previousPos, goal, damping, stiffness)
 
         # store the states for next computation
         self.previousPos = om.MPoint(self.currentPos)
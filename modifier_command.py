@@ -0,0 +1,69 @@
+import os
+import sys
+import types
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+COMMAND_NAME = "jbdDoModifier"
+PLUGIN_NAME = "modifier_command"
+
+# maya loads this file as a plugin under another module name than the package import,
+# queued modifiers are kept in a module both of them can find
+_shared = sys.modules.setdefault("jbdModifierShared", types.ModuleType("jbdModifierShared"))
+if not hasattr(_shared, "pending"):
+    _shared.pending = []
+
+
+def maya_useNewAPI():
+    pass
+
+
+class ModifierCommand(om.MPxCommand):
+    """
+    run a queued MDGModifier/MDagModifier so it is undone and redone with the scene
+    """
+
+    def __init__(self):
+        super(ModifierCommand, self).__init__()
+        self.modifier = None
+
+    def doIt(self, args):
+        self.modifier = _shared.pending.pop(0)
+        self.modifier.doIt()
+
+    def redoIt(self):
+        self.modifier.doIt()
+
+    def undoIt(self):
+        self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def creator():
+    return ModifierCommand()
+
+
+def initializePlugin(obj):
+    fnPlugin = om.MFnPlugin(obj, "Lyz", "1.0", "Any")
+    fnPlugin.registerCommand(COMMAND_NAME, creator)
+
+
+def uninitializePlugin(obj):
+    fnPlugin = om.MFnPlugin(obj)
+    fnPlugin.deregisterCommand(COMMAND_NAME)
+
+
+def loadPlugin():
+    if not cmds.pluginInfo(PLUGIN_NAME, query=True, loaded=True):
+        cmds.loadPlugin(os.path.splitext(os.path.abspath(__file__))[0] + ".py", quiet=True)
+
+
+def doIt(modifier):
+    """
+    :param modifier: filled om.MDGModifier or om.MDagModifier, applied as one undoable command
+    """
+    loadPlugin()
+    _shared.pending.append(modifier)
+    getattr(cmds, COMMAND_NAME)()
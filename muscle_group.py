@@ -2,7 +2,9 @@ import maya.cmds as cmds
 import json
 import os.path
 import maya.api.OpenMaya as om
+from . import muscle_templates as mt
 from . import muscle_units as mu
+from . import tracing
 
 
 def moveJoints(startJoint, endJoint, moveObject, moveFactor=1.0):
@@ -12,10 +14,25 @@ def moveJoints(startJoint, endJoint, moveObject, moveFactor=1.0):
     cmds.xform(moveObject, translation=finalPos, ws=True)
 
 
-def createMuscleUnit(muscleName, originJoint, originEndJoint, insertionJoint, insertionEndJoint, moveFactor):
+COMPRESSION_FACTOR = 0.5
+STRETCH_FACTOR = 1.5
+
+
+@tracing.operation
+def createMuscleUnit(muscleName, originJoint, originEndJoint, insertionJoint, insertionEndJoint, moveFactor,
+                     position=None):
+    """
+    :param position: world [origin, insertion] locator positions, skips the move factor placement
+    """
     muscleUnit = mu.MuscleJoint.createFromAttachObj(muscleName=muscleName, originAttachObj=originJoint,
                                                     insertionAttachObj=insertionJoint,
-                                                    compressionFactor=0.5, stretchFactor=1.5)
+                                                    compressionFactor=COMPRESSION_FACTOR,
+                                                    stretchFactor=STRETCH_FACTOR)
+    if position:
+        cmds.xform(muscleUnit.originLoc, translation=position[0], ws=True)
+        cmds.xform(muscleUnit.insertionLoc, translation=position[1], ws=True)
+        return muscleUnit
+
     moveJoints(startJoint=originJoint, endJoint=originEndJoint,
                moveObject=muscleUnit.originLoc, moveFactor=moveFactor[0])
     moveJoints(startJoint=insertionJoint, endJoint=insertionEndJoint,
@@ -23,48 +40,84 @@ def createMuscleUnit(muscleName, originJoint, originEndJoint, insertionJoint, in
     return muscleUnit
 
 
-def getMirrorPos(muscleGrp, mirrorAxis="x", size=3, side="L", prefix="R"):
-    locPosList = []
-    mirrorSize = list(range(size))
-    for muscle, i in zip(muscleGrp.muscleUnitGroup, mirrorSize):
-        tempMuscle = mu.mirror(muscleJointGrp=muscle,
-                               newMuscleName="{0}_temp{1}".format(prefix, i),
-                               muscleOrigin=muscle.originAttachObj.replace(side + "_", prefix + "_"),
-                               muscleInsertion=muscle.insertionAttachObj.replace(side + "_", prefix + "_"),
-                               mirrorAxis=mirrorAxis)
-
-        originPos = cmds.xform(tempMuscle.originLoc, t=True, q=True)
-        insertionPos = cmds.xform(tempMuscle.insertionLoc, t=True, q=True)
-        centerPos = cmds.xform(tempMuscle.centerLoc, t=True, q=True)
-        tempPosList = [originPos, insertionPos, centerPos]
-        locPosList.append(tempPosList)
-        tempMuscle.delete()
-    return locPosList
-
-
-def mirrorMuscleGroup(muscleGrp, groupClass, muscleName, mirrorAxis="x", side="L", prefix="R", **kwargs):
-    if not isinstance(muscleGrp, groupClass):
-        return
+def sideTable(groups, side="L", prefix="R"):
+    """
+    map every input joint of the groups to its other side joint, once per joint
+    :param groups: list of BipedMuscles
+    :return: dict of joint name to mirrored joint name
+    """
+    table = {}
+    for group in groups:
+        for joint in group.inputs().values():
+            if joint not in table:
+                table[joint] = mu.sideName(joint, side, prefix)
+    producedJoints = set()
+    for group in groups:
+        for suffix in group.unitSuffixes:
+            producedJoints.update(mu.MuscleJoint.jointNames(mu.sideName(group.muscleName, side, prefix) + suffix))
+    missing = sorted(joint for joint in set(table.values())
+                     if joint not in producedJoints and not cmds.objExists(joint))
+    if missing:
+        raise RuntimeError("Mirror joints not found: {0}".format(", ".join(missing)))
+    return table
+
+
+@tracing.operation
+def mirrorPositions(groups, mirrorAxis="x"):
+    """
+    world positions of origin, insertion and center of every muscle unit, mirrored
+    :return: one list of [origin, insertion, center] per muscle unit for each group
+    """
+    if mirrorAxis not in "xyz" or len(mirrorAxis) != 1:
+        raise RuntimeError("Invalid axis, should be in 'xyz'")
+    mirrorScale = [-1.0 if axis == mirrorAxis else 1.0 for axis in "xyz"]
+
+    groupedPos = []
+    for group in groups:
+        groupedPos.append([[cmds.xform(node, translation=True, ws=True, query=True)
+                            for node in [muscle.muscleOrigin, muscle.muscleInsertion, muscle.muscleDriver]]
+                           for muscle in group.muscleUnitGroup])
+    return [[[[value * scale for value, scale in zip(pos, mirrorScale)] for pos in unitPos]
+             for unitPos in groupPos] for groupPos in groupedPos]
+
+
+@tracing.operation
+def mirrorAll(groups, mirrorAxis="x", side="L", prefix="R", names=None):
+    """
+    mirror several muscle groups at once, all of them are built in one undo step
+    :param groups: list of BipedMuscles
+    :param mirrorAxis: x, y or z
+    :param side: side of the source groups
+    :param prefix: side of the new groups
+    :param names: names of the new groups in the order of groups, an empty name swaps the side prefix
+    :return: list of mirrored groups in the order of groups
+    """
+    with mu.undoChunk():
+        return mirrorPlan(groups, mirrorAxis, side, prefix, names).execute()
+
+
+def mirrorPlan(groups, mirrorAxis="x", side="L", prefix="R", names=None):
+    """
+    the build plan mirrorAll runs, nothing is built
+    :return: build_plan.BuildPlan
+    """
+    from . import build_plan
+
     if side == "R":
         prefix = "L"
+    table = sideTable(groups, side, prefix)
+    positions = mirrorPositions(groups, mirrorAxis)
 
-    for key, value in kwargs.items():
-        if isinstance(value, str):
-            kwargs[key] = value.replace(side + "_", prefix + "_")
-
-    mirrorPosList = getMirrorPos(muscleGrp=muscleGrp, mirrorAxis=mirrorAxis,
-                                 size=len(muscleGrp.muscleUnitGroup), side=side, prefix=prefix)
-    mirrorInstance = groupClass(muscleName, **kwargs)
-
-    mirrorInstance.add()
-    for muscle, pos in zip(mirrorInstance.muscleUnitGroup, mirrorPosList):
-        cmds.xform(muscle.originLoc, translation=pos[0])
-        cmds.xform(muscle.insertionLoc, translation=pos[1])
-        cmds.xform(muscle.centerLoc, translation=pos[2])
-    mirrorInstance.build()
-    return mirrorInstance
+    names = list(names or [])
+    names += [None] * (len(groups) - len(names))
+    plan = build_plan.BuildPlan()
+    for group, groupPos, name in zip(groups, positions, names):
+        inputs = dict((key, table[joint]) for key, joint in group.inputs().items())
+        plan.addGroup(name or mu.sideName(group.muscleName, side, prefix), group.tag, inputs, positions=groupPos)
+    return plan
 
 
+@tracing.operation
 def exportMuscles(filePath, *args):
     filePath = filePath
 
@@ -76,34 +129,68 @@ def exportMuscles(filePath, *args):
         json.dump(muscleData, fp, ensure_ascii=False, indent=4, separators=(",", ":"))
 
 
-def importMuscles(filePath):
-    filePath = filePath
-    muscleInstancesGrp = []
+def groupPositions(attributes):
+    dataPos = []
+    for key, value in attributes.items():
+        if isinstance(value, list):
+            dataPos.append(value)
+    return [dataPos[i:i+3] for i in range(0, len(dataPos), 3)]
+
+
+def placeMuscleUnits(muscleGrp, groupedPos, worldSpace=True):
+    for muscle, pos in zip(muscleGrp.muscleUnitGroup, groupedPos):
+        cmds.xform(muscle.originLoc, worldSpace=worldSpace, translation=pos[0])
+        cmds.xform(muscle.insertionLoc, worldSpace=worldSpace, translation=pos[1])
+        cmds.xform(muscle.centerLoc, worldSpace=worldSpace, translation=pos[2])
+
+
+@tracing.operation
+def importMuscles(filePath, cache=None):
+    """
+    :param cache: optional build_cache.BuildCache, skips placement and keying of groups built before
+    """
+    # groups are built in dependency order, not in file order
+    return importPlan(filePath, cache=cache).execute()
+
+
+def importPlan(filePath, cache=None):
+    """
+    the build plan importMuscles runs, nothing is built
+    :return: build_plan.BuildPlan
+    """
+    from . import build_plan
 
     with open(filePath) as fp:
         muscleData = json.load(fp)
+    return build_plan.BuildPlan.fromData(muscleData, cache=cache)
 
-    for muscleGroup, attributes in muscleData.items():
-        muscleClass = attributes.get("Tag")
-        classInputs = attributes.get("inputs")
-        dataPos = []
-        for key, value in attributes.items():
-            if isinstance(value, list):
-                dataPos.append(value)
-        groupedPos = [dataPos[i:i+3] for i in range(0, len(dataPos), 3)]
-
-        # 动态获取类并创建实例
-        if muscleClass in globals():
-            muscle_class = globals()[muscleClass]
-            newInstance = muscle_class(muscleGroup, **classInputs)
-            newInstance.add()
-            for muscle, pos in zip(newInstance.muscleUnitGroup, groupedPos):
-                cmds.xform(muscle.originLoc, worldSpace=True, translation=pos[0])
-                cmds.xform(muscle.insertionLoc, worldSpace=True, translation=pos[1])
-                cmds.xform(muscle.centerLoc, worldSpace=True, translation=pos[2])
-            newInstance.build()
-            muscleInstancesGrp.append(newInstance)
-    return muscleInstancesGrp
+
+METADATA_ATTR = "muscleGroupData"
+
+
+def metadataNodes():
+    return [node for node in cmds.ls(type="network") or []
+            if cmds.attributeQuery(METADATA_ATTR, node=node, exists=True)]
+
+
+@tracing.operation
+def rehydrate():
+    """
+    get the muscle groups of the current scene back from their metadata nodes, nothing is built
+    :return: list of BipedMuscles
+    """
+    muscleGroups = []
+    for node in metadataNodes():
+        data = json.loads(cmds.getAttr("{0}.{1}".format(node, METADATA_ATTR)) or "{}")
+        muscleClass = groupClass(str(data.get("Tag")))
+        if not muscleClass:
+            continue
+        # groups whose input or muscle joints were deleted are skipped
+        joints = list(data["inputs"].values()) + [unitData["joints"][-1] for unitData in data["units"]]
+        if not all(cmds.objExists(joint) for joint in joints):
+            continue
+        muscleGroups.append(muscleClass.fromMetadata(data, node))
+    return muscleGroups
 
 
 def addJiggleJoint():
@@ -111,6 +198,10 @@ def addJiggleJoint():
 
 
 class BipedMuscles(object):
+    unitSuffixes = ()
+    # constraints added by build() on top of the ones every muscle unit owns
+    groupConstraintCount = 0
+
     def __init__(self, muscleName, tag):
         self.muscleName = muscleName
         self.tag = tag
@@ -118,38 +209,97 @@ class BipedMuscles(object):
         self.mirrorJoints = []
         self.muscleCons = []
         self.muscleData = {}
+        self.metadataNode = None
 
     def __str__(self):
         return self.muscleName
 
-    def add(self):
+    def add(self, positions=None):
         pass
 
-    def build(self):
-        for muscleUnit in self.muscleUnitGroup:
-            muscleUnit.update()
+    def build(self, sdkKeys=None):
+        """
+        :param sdkKeys: one driven key table per muscle unit, see MuscleJoint.sdkKeyTable
+        """
+        sdkKeys = sdkKeys or [None] * len(self.muscleUnitGroup)
+        for muscleUnit, unitKeys in zip(self.muscleUnitGroup, sdkKeys):
+            muscleUnit.update(sdkKeys=unitKeys)
 
+    @tracing.operation
     def delete(self):
         if self.muscleCons:
             for i in self.muscleCons:
                 cmds.delete(i)
         for i in self.muscleUnitGroup:
             i.delete()
+        if self.metadataNode and cmds.objExists(self.metadataNode):
+            cmds.delete(self.metadataNode)
+        self.metadataNode = None
 
     def edit(self):
         if self.muscleCons:
             for i in self.muscleCons:
                 cmds.delete(i)
+        self.muscleCons = []
         for i in self.muscleUnitGroup:
             i.edit()
-
-    def mirror(self):
-        pass
+        if self.metadataNode:
+            self.writeMetadata()
+
+    def renameNode(self, oldName, newName):
+        """
+        follow a node renamed in the scene, in the group and all of its units
+        :return: True if the group uses the node
+        """
+        found = mu.renameInAttributes(self, oldName, newName)
+        for muscleUnit in self.muscleUnitGroup:
+            found = muscleUnit.renameNode(oldName, newName) or found
+        return found
+
+    def inputs(self):
+        return {}
+
+    def metadata(self):
+        return {"Tag": self.tag,
+                "muscleName": self.muscleName,
+                "inputs": self.inputs(),
+                "units": [muscleUnit.metadata() for muscleUnit in self.muscleUnitGroup],
+                "muscleCons": self.muscleCons}
+
+    def writeMetadata(self):
+        """
+        keep the group definition on a network node so rehydrate() finds it after the scene is reopened
+        """
+        if not (self.metadataNode and cmds.objExists(self.metadataNode)):
+            self.metadataNode = cmds.createNode("network", name="{0}_muscleGroupData".format(self.muscleName))
+            cmds.addAttr(self.metadataNode, longName=METADATA_ATTR, dataType="string")
+        cmds.setAttr("{0}.{1}".format(self.metadataNode, METADATA_ATTR), json.dumps(self.metadata()),
+                     type="string")
+        return self.metadataNode
+
+    @classmethod
+    def fromMetadata(cls, data, node=None):
+        """
+        :param data: dict from metadata()
+        :param node: network node the data was read from
+        """
+        muscleGrp = cls(data["muscleName"], **data["inputs"])
+        muscleGrp.muscleUnitGroup = [mu.MuscleJoint.fromMetadata(unitData) for unitData in data["units"]]
+        muscleGrp.muscleCons = data.get("muscleCons", [])
+        muscleGrp.metadataNode = node
+        return muscleGrp
+
+    def attachJoints(self):
+        return sorted(set(self.inputs().values()))
+
+    def mirror(self, mirrorAxis="x", side="L", prefix="R", muscleName=None):
+        return mirrorAll([self], mirrorAxis=mirrorAxis, side=side, prefix=prefix, names=[muscleName])[0]
 
     def jiggleGroup(self):
         for i in self.muscleUnitGroup:
             i.jiggle()
 
+    @tracing.operation
     def serialize(self):
         self.muscleData = {}
         self.muscleData[self.muscleName] = {}
@@ -161,287 +311,156 @@ class BipedMuscles(object):
             self.muscleData[self.muscleName].update({muscle.muscleInsertion: muscleInsertionPos})
             self.muscleData[self.muscleName].update({muscle.JOmuscle: muscleCenterPos})
         self.muscleData[self.muscleName].update({"Tag": self.tag})
+        self.muscleData[self.muscleName].update({"inputs": self.inputs()})
+        return self.muscleData
 
 
-class TrapGroup(BipedMuscles):
-
-    def __init__(self, muscleName, back2Joint, clavicleJoint, acromionJoint):
-        super().__init__(muscleName, "TrapGroup")
-        self.back2Joint = back2Joint
-        self.back3Joint = cmds.listRelatives(self.back2Joint, children=True)[0]
-        self.neckJoint = cmds.listRelatives(self.back3Joint, children=True)[0]
-        self.headJoint = cmds.listRelatives(self.neckJoint, children=True)[0]
-        self.clavicleJoint = clavicleJoint
-        self.shoulderJoint = cmds.listRelatives(self.clavicleJoint, children=True)[0]
-        self.acromionJoint = acromionJoint
-        self.scapulaJoint = cmds.listRelatives(self.acromionJoint, children=True)[0]
-
-    def add(self):
-        self.trapeziusA = createMuscleUnit(muscleName=self.muscleName + "A",
-                                           originJoint=self.neckJoint, originEndJoint=self.headJoint,
-                                           insertionJoint=self.clavicleJoint, insertionEndJoint=self.shoulderJoint,
-                                           moveFactor=[1 / 2.0, 5 / 6.0])
-        self.trapeziusB = createMuscleUnit(muscleName=self.muscleName + "B",
-                                           originJoint=self.back3Joint, originEndJoint=self.neckJoint,
-                                           insertionJoint=self.acromionJoint, insertionEndJoint=self.scapulaJoint,
-                                           moveFactor=[6 / 8.0, 1 / 4.0])
-        self.trapeziusC = createMuscleUnit(muscleName=self.muscleName + "C",
-                                           originJoint=self.back3Joint, originEndJoint=self.neckJoint,
-                                           insertionJoint=self.acromionJoint, insertionEndJoint=self.scapulaJoint,
-                                           moveFactor=[1 / 8.0, 3 / 4.0])
-        self.muscleUnitGroup = [self.trapeziusA, self.trapeziusB, self.trapeziusC]
-
-    def build(self):
-        super().build()
-        originalAimCons = cmds.listRelatives(self.trapeziusA.muscleBase, type="aimConstraint")[0]
-        if originalAimCons:
-            cmds.delete(originalAimCons)
-
-        self.trapAParentCons = cmds.parentConstraint(self.neckJoint, self.headJoint, self.trapeziusA.muscleOrigin,
-                                                     mo=True, weight=True)
-
-        self.trapAAimCons = cmds.aimConstraint(self.trapeziusA.muscleInsertion, self.trapeziusA.muscleBase,
-                                               aimVector=[0, 1, 0], upVector=[1, 0, 0],
-                                               worldUpType="objectrotation",
-                                               worldUpObject=self.back3Joint, worldUpVector=[0, 1, 0], mo=True)
-        self.trapeziusA.mainAimConstraint = self.trapAAimCons
-
-        self.trapCParentCons = cmds.parentConstraint(self.back2Joint, self.back3Joint, self.trapeziusC.muscleOrigin,
-                                                     mo=True, weight=True)
-        self.muscleCons = [self.trapAParentCons, self.trapCParentCons]
-
-    def mirror(self, mirrorAxis="x", side="L", prefix="R"):
-        if side == "R":
-            prefix = "L"
-        return mirrorMuscleGroup(muscleGrp=self, groupClass=TrapGroup, mirrorAxis=mirrorAxis,
-                                 side=side, prefix=prefix,
-                                 muscleName=self.muscleName.replace(side + "_", prefix + "_"),
-                                 back2Joint=self.back2Joint, clavicleJoint=self.clavicleJoint,
-                                 acromionJoint=self.acromionJoint)
+class TemplateGroup(BipedMuscles):
+    """
+    muscle group built from a template in muscle_templates, the class only names the template
+    """
+    template = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.template:
+            groupTemplate = mt.compileTemplate(cls.template)
+            cls.unitSuffixes = groupTemplate.unitSuffixes
+            cls.groupConstraintCount = len(groupTemplate.constraints)
+
+    def __init__(self, muscleName, *args, **kwargs):
+        super().__init__(muscleName, self.template)
+        self.groupTemplate = mt.compileTemplate(self.template)
+
+        inputNames = self.groupTemplate.inputNames
+        if len(args) > len(inputNames):
+            raise RuntimeError("{0} takes {1} input joints".format(self.tag, len(inputNames)))
+        values = dict(zip(inputNames, args))
+        values.update(kwargs)
+        missing = [name for name in inputNames if not values.get(name)]
+        if missing:
+            raise RuntimeError("{0} needs: {1}".format(self.tag, ", ".join(missing)))
+        for name in inputNames:
+            setattr(self, name, values[name])
+
+        for name, source, relation in self.groupTemplate.derived:
+            if relation == "child":
+                joints = cmds.listRelatives(getattr(self, source), children=True, type="joint")
+            else:
+                joints = cmds.listRelatives(getattr(self, source), parent=True)
+            if not joints:
+                raise RuntimeError("{0}: '{1}' has no {2} joint".format(self.tag, getattr(self, source), relation))
+            setattr(self, name, joints[0])
+
+    def joint(self, ref):
+        if ref[0] == "unit":
+            return getattr(self.muscleUnitGroup[ref[1]], ref[2])
+        return getattr(self, ref[1])
+
+    @tracing.operation
+    def add(self, positions=None):
+        """
+        :param positions: world [origin, insertion] per unit, from a BuildCache
+        """
+        self.muscleUnitGroup = []
+        positions = positions or [None] * len(self.groupTemplate.units)
+        for (suffix, origin, insertion), position in zip(self.groupTemplate.units, positions):
+            muscleUnit = createMuscleUnit(muscleName=self.muscleName + suffix,
+                                          originJoint=getattr(self, origin[0]),
+                                          originEndJoint=getattr(self, origin[1]),
+                                          insertionJoint=getattr(self, insertion[0]),
+                                          insertionEndJoint=getattr(self, insertion[1]),
+                                          moveFactor=[origin[2], insertion[2]], position=position)
+            setattr(self, self.groupTemplate.unitName + suffix, muscleUnit)
+            self.muscleUnitGroup.append(muscleUnit)
+
+    @tracing.operation
+    def build(self, sdkKeys=None):
+        super().build(sdkKeys=sdkKeys)
+        for index, worldUpObject, worldUpVector in self.groupTemplate.aims:
+            muscleUnit = self.muscleUnitGroup[index]
+            cmds.delete(muscleUnit.mainAimConstraint)
+            muscleUnit.mainAimConstraint = cmds.aimConstraint(muscleUnit.muscleInsertion, muscleUnit.muscleBase,
+                                                              aimVector=[0, 1, 0], upVector=[1, 0, 0],
+                                                              worldUpType="objectrotation",
+                                                              worldUpObject=getattr(self, worldUpObject),
+                                                              worldUpVector=worldUpVector, mo=True)
 
-    def serialize(self):
-        muscleData = super().serialize()
-        self.muscleData[self.muscleName].update({"inputs": {"back2Joint": self.back2Joint,
-                                                            "clavicleJoint": self.clavicleJoint,
-                                                            "acromionJoint": self.acromionJoint
-                                                            }})
-        return self.muscleData
+        self.muscleCons = []
+        for name, constraintType, drivers, driven, flags in self.groupTemplate.constraints:
+            nodes = [self.joint(ref) for ref in drivers] + [self.joint(driven)]
+            constraint = getattr(cmds, constraintType)(*nodes, **flags)
+            setattr(self, name, constraint)
+            self.muscleCons.append(constraint)
+        self.writeMetadata()
 
+    @classmethod
+    def fromMetadata(cls, data, node=None):
+        muscleGrp = super().fromMetadata(data, node)
+        for suffix, muscleUnit in zip(muscleGrp.groupTemplate.unitSuffixes, muscleGrp.muscleUnitGroup):
+            setattr(muscleGrp, muscleGrp.groupTemplate.unitName + suffix, muscleUnit)
+        for constraintData, constraint in zip(muscleGrp.groupTemplate.constraints, muscleGrp.muscleCons):
+            setattr(muscleGrp, constraintData[0], constraint)
+        return muscleGrp
 
-class LatsGroup(BipedMuscles):
-    def __init__(self, muscleName, back1Joint, twist2Joint, scapulaJoint, trapCJoint):
-        super().__init__(muscleName, "LatsGroup")
-        self.back1Joint = back1Joint
-        self.back2Joint = cmds.listRelatives(self.back1Joint, children=True)[0]
-        self.back3Joint = cmds.listRelatives(self.back2Joint, children=True)[0]
-        self.twist2Joint = twist2Joint
-        self.shoulderJoint = cmds.listRelatives(self.twist2Joint, parent=True)[0]
-        self.scapulaJoint = scapulaJoint
-        self.scapulaTipJoint = cmds.listRelatives(self.scapulaJoint, children=True)[0]
-        self.trapCJoint = trapCJoint
-
-    def add(self):
-        self.latsA = createMuscleUnit(muscleName=self.muscleName + "A",
-                                      originJoint=self.back2Joint, originEndJoint=self.back3Joint,
-                                      insertionJoint=self.twist2Joint, insertionEndJoint=self.shoulderJoint,
-                                      moveFactor=[1 / 2.0, 1 / 2.0])
-        self.latsB = createMuscleUnit(muscleName=self.muscleName + "B",
-                                      originJoint=self.back1Joint, originEndJoint=self.back2Joint,
-                                      insertionJoint=self.twist2Joint, insertionEndJoint=self.shoulderJoint,
-                                      moveFactor=[1 / 10.0, 1 / 2.0])
-        self.latsC = createMuscleUnit(muscleName=self.muscleName + "C",
-                                      originJoint=self.scapulaTipJoint, originEndJoint=self.scapulaJoint,
-                                      insertionJoint=self.twist2Joint, insertionEndJoint=self.shoulderJoint,
-                                      moveFactor=[1 / 10.0, 1 / 2.0])
-        self.muscleUnitGroup = [self.latsA, self.latsB, self.latsC]
-
-    def build(self):
-        super().build()
-
-        self.latsBPointCos = cmds.pointConstraint(self.back3Joint, self.latsB.muscleOffset,
-                                                  mo=True, weight=True, skip="y")
-        self.latsAPointCos = cmds.pointConstraint(self.latsB.JOmuscle, self.trapCJoint, self.latsA.muscleOffset,
-                                                  mo=True, weight=True)
-        self.muscleCons = [self.latsAPointCos, self.latsBPointCos]
-
-    def mirror(self, mirrorAxis="x", side="L", prefix="R"):
-        if side == "R":
-            prefix = "L"
-        return mirrorMuscleGroup(muscleGrp=self, groupClass=LatsGroup, mirrorAxis=mirrorAxis,
-                                 side=side, prefix=prefix,
-                                 muscleName=self.muscleName.replace(side + "_", prefix + "_"),
-                                 back1Joint=self.back1Joint, twist2Joint=self.twist2Joint,
-                                 scapulaJoint=self.scapulaJoint, trapCJoint=self.trapCJoint)
+    def inputs(self):
+        return dict((name, getattr(self, name)) for name in self.groupTemplate.inputNames)
 
-    def serialize(self):
-        muscleData = super().serialize()
-        self.muscleData[self.muscleName].update({"inputs": {"back1Joint": self.back1Joint,
-                                                            "twist2Joint": self.twist2Joint,
-                                                            "scapulaJoint": self.scapulaJoint,
-                                                            "trapCJoint": self.trapCJoint
-                                                            }})
-        return self.muscleData
+    def attachJoints(self):
+        return sorted(set(self.inputs().values()) |
+                      set(getattr(self, name) for name, source, relation in self.groupTemplate.derived))
 
 
-class DeltoidGroup(BipedMuscles):
-    def __init__(self, muscleName, clavicleJoint, upperArmJoint, twist1Joint, twist2Joint, acromionJoint):
-        super().__init__(muscleName, "DeltoidGroup")
-        self.clavicleJoint = clavicleJoint
-        self.upperArmJoint = upperArmJoint
-        self.twist1Joint = twist1Joint
-        self.twist2Joint = twist2Joint
-        self.acromionJoint = acromionJoint
-        self.sacpulaJoint = cmds.listRelatives(self.acromionJoint, children=True)[0]
-
-    def add(self):
-        self.deltoidA = createMuscleUnit(muscleName=self.muscleName + "A",
-                                         originJoint=self.clavicleJoint, originEndJoint=self.upperArmJoint,
-                                         insertionJoint=self.twist2Joint, insertionEndJoint=self.upperArmJoint,
-                                         moveFactor=[5 / 6.0, 0.0])
-        self.deltoidB = createMuscleUnit(muscleName=self.muscleName + "B",
-                                         originJoint=self.acromionJoint, originEndJoint=self.acromionJoint,
-                                         insertionJoint=self.twist2Joint, insertionEndJoint=self.upperArmJoint,
-                                         moveFactor=[1.0, 0.0])
-        self.deltoidC = createMuscleUnit(muscleName=self.muscleName + "C",
-                                         originJoint=self.sacpulaJoint, originEndJoint=self.acromionJoint,
-                                         insertionJoint=self.twist2Joint, insertionEndJoint=self.upperArmJoint,
-                                         moveFactor=[5 / 6.0, 0.0])
-        self.muscleUnitGroup = [self.deltoidA, self.deltoidB, self.deltoidC]
-
-    def build(self):
-        for deltoidPart in self.muscleUnitGroup:
-            deltoidPart.update()
-            cmds.delete(deltoidPart.mainAimConstraint)
-            deltoidPart.mainAimConstraint = cmds.aimConstraint(deltoidPart.muscleInsertion,
-                                                               deltoidPart.muscleBase, mo=True,
-                                                               aimVector=[0, 1, 0], upVector=[1, 0, 0],
-                                                               worldUpType="objectrotation",
-                                                               worldUpObject=self.twist1Joint,
-                                                               worldUpVector=[1, 0, 0])
-        self.deltoidBPointCons = cmds.pointConstraint(self.deltoidA.JOmuscle, self.deltoidC.JOmuscle,
-                                                      self.deltoidB.muscleOffset, mo=True, weight=1)
-        self.deltoidCPointCons = cmds.pointConstraint(self.upperArmJoint, self.deltoidC.JOmuscle,
-                                                      mo=True, weight=1, skip=['x', 'y'])
-
-        self.muscleCons = [self.deltoidBPointCons, self.deltoidCPointCons]
-
-    def mirror(self, mirrorAxis="x", side="L", prefix="R"):
-        if side == "R":
-            prefix = "L"
-        return mirrorMuscleGroup(muscleGrp=self, groupClass=DeltoidGroup, mirrorAxis=mirrorAxis,
-                                 side=side, prefix=prefix,
-                                 muscleName=self.muscleName.replace(side + "_", prefix + "_"),
-                                 clavicleJoint=self.clavicleJoint, upperArmJoint=self.upperArmJoint,
-                                 twist1Joint=self.twist1Joint, twist2Joint=self.twist2Joint,
-                                 acromionJoint=self.acromionJoint)
+class TrapGroup(TemplateGroup):
+    template = "TrapGroup"
 
-    def serialize(self):
-        muscleData = super().serialize()
-        self.muscleData[self.muscleName].update({"inputs": {"clavicleJoint": self.clavicleJoint,
-                                                            "upperArmJoint": self.upperArmJoint,
-                                                            "twist1Joint": self.twist1Joint,
-                                                            "twist2Joint": self.twist2Joint,
-                                                            "acromionJoint": self.acromionJoint
-                                                            }})
-        return self.muscleData
 
+class LatsGroup(TemplateGroup):
+    template = "LatsGroup"
 
-class ArmMuscleGroup(BipedMuscles):
-    def __init__(self, muscleName, upArmTwsitJoint, lowArmTwsitJoint, twistBaseJoint, twistValueJoint, acromionJoint):
-        super().__init__(muscleName, "ArmMuscleGroup")
-        self.upArmTwsitJoint = upArmTwsitJoint
-        self.upperArmJoint = cmds.listRelatives(self.upArmTwsitJoint, parent=True)[0]
-        self.lowArmTwsitJoint = lowArmTwsitJoint
-        self.lowArmJoint = cmds.listRelatives(self.lowArmTwsitJoint, parent=True)[0]
-        self.acromionJoint = acromionJoint
-        self.sacpulaJoint = cmds.listRelatives(self.acromionJoint, children=True)[0]
-        self.twistBaseJoint = twistBaseJoint
-        self.twistValueJoint = twistValueJoint
-
-    def add(self):
-        self.armMuscleA = createMuscleUnit(muscleName=self.muscleName + "A",
-                                           originJoint=self.upArmTwsitJoint, originEndJoint=self.upperArmJoint,
-                                           insertionJoint=self.lowArmTwsitJoint,
-                                           insertionEndJoint=self.lowArmTwsitJoint,
-                                           moveFactor=[0.5, 0.0])
-        self.armMuscleB = createMuscleUnit(muscleName=self.muscleName + "B",
-                                           originJoint=self.sacpulaJoint, originEndJoint=self.acromionJoint,
-                                           insertionJoint=self.lowArmJoint, insertionEndJoint=self.lowArmTwsitJoint,
-                                           moveFactor=[4 / 6.0, 0.2])
-        self.muscleUnitGroup = [self.armMuscleA, self.armMuscleB]
-
-    def build(self):
-        super().build()
-
-        self.armMuscleBPointCons = cmds.orientConstraint(self.twistBaseJoint, self.twistValueJoint,
-                                                         self.armMuscleB.muscleOrigin, mo=True, weight=0.5)
-        self.armMuscleAParnetCons = cmds.parentConstraint(self.upperArmJoint, self.armMuscleA.muscleOffset,
-                                                          mo=True, weight=True, skipTranslate=['x', 'y'],
-                                                          skipRotate=['x', 'y', 'z'])
-        self.armMuscleBParentCons = cmds.parentConstraint(self.upperArmJoint, self.armMuscleB.muscleOffset,
-                                                          mo=True, weight=True, skipTranslate=['x', 'y'],
-                                                          skipRotate=['x', 'y', 'z'])
-        self.muscleCons = [self.armMuscleBPointCons, self.armMuscleAParnetCons, self.armMuscleBParentCons]
-
-    def mirror(self, mirrorAxis="x", side="L", prefix="R"):
-        if side == "R":
-            prefix = "L"
-        return mirrorMuscleGroup(muscleGrp=self, groupClass=ArmMuscleGroup, mirrorAxis=mirrorAxis,
-                                 side=side, prefix=prefix,
-                                 muscleName=self.muscleName.replace(side + "_", prefix + "_"),
-                                 upArmTwsitJoint=self.upArmTwsitJoint, lowArmTwsitJoint=self.lowArmTwsitJoint,
-                                 twistBaseJoint=self.twistBaseJoint, twistValueJoint=self.twistValueJoint,
-                                 acromionJoint=self.acromionJoint)
 
-    def serialize(self):
-        muscleData = super().serialize()
-        self.muscleData[self.muscleName].update({"inputs": {"upArmTwsitJoint": self.upArmTwsitJoint,
-                                                            "lowArmTwsitJoint": self.lowArmTwsitJoint,
-                                                            "twistBaseJoint": self.twistBaseJoint,
-                                                            "twistValueJoint": self.twistValueJoint,
-                                                            "acromionJoint": self.acromionJoint
-                                                            }})
-        return self.muscleData
+class DeltoidGroup(TemplateGroup):
+    template = "DeltoidGroup"
 
 
-class PectoralisGroup(BipedMuscles):
-
-    def __init__(self, muscleName, back3Joint, clavicleJoint, upperarmJoint, twist2Joint):
-        super().__init__(muscleName, "PectoralisGroup")
-        self.back3Joint = back3Joint
-        self.clavicleJoint = clavicleJoint
-        self.upperarmJoint = upperarmJoint
-        self.twist2Joint = twist2Joint
-
-    def add(self):
-        self.pectoralisA = createMuscleUnit(muscleName=self.muscleName + "A",
-                                            originJoint=self.back3Joint, originEndJoint=self.back3Joint,
-                                            insertionJoint=self.twist2Joint, insertionEndJoint=self.upperarmJoint,
-                                            moveFactor=[1.0, 1 / 2.0])
-        self.pectoralisB = createMuscleUnit(muscleName=self.muscleName + "B",
-                                            originJoint=self.clavicleJoint, originEndJoint=self.upperarmJoint,
-                                            insertionJoint=self.twist2Joint, insertionEndJoint=self.upperarmJoint,
-                                            moveFactor=[1/4.0, 1 / 2.0])
-        self.muscleUnitGroup = [self.pectoralisA, self.pectoralisB]
-
-    def build(self):
-        super().build()
-        self.muscleCons = []
+class ArmMuscleGroup(TemplateGroup):
+    template = "ArmMuscleGroup"
 
-    def mirror(self, mirrorAxis="x", side="L", prefix="R"):
-        if side == "R":
-            prefix = "L"
-        return mirrorMuscleGroup(muscleGrp=self, groupClass=PectoralisGroup, mirrorAxis=mirrorAxis,
-                                 side=side, prefix=prefix,
-                                 muscleName=self.muscleName.replace(side + "_", prefix + "_"),
-                                 back3Joint=self.back3Joint, clavicleJoint=self.clavicleJoint,
-                                 upperarmJoint=self.upperarmJoint, twist2Joint=self.twist2Joint)
 
-    def serialize(self):
-        muscleData = super().serialize()
-        self.muscleData[self.muscleName].update({"inputs": {"back3Joint": self.back3Joint,
-                                                            "clavicleJoint": self.clavicleJoint,
-                                                            "upperarmJoint": self.upperarmJoint,
-                                                            "twist2Joint": self.twist2Joint
-                                                            }})
-        return self.muscleData
+class PectoralisGroup(TemplateGroup):
+    template = "PectoralisGroup"
+
+
+class NeckGroup(TemplateGroup):
+    template = "NeckGroup"
+
+
+class AbdominalGroup(TemplateGroup):
+    template = "AbdominalGroup"
+
+
+class GluteGroup(TemplateGroup):
+    template = "GluteGroup"
+
+
+class LegMuscleGroup(TemplateGroup):
+    template = "LegMuscleGroup"
+
+
+_templateClasses = {}
+
+
+def groupClass(tag):
+    """
+    :param tag: group type as saved in the "Tag" of an exported file
+    :return: the group class, a class is made on the fly for templates loaded at runtime. None if unknown
+    """
+    muscleClass = globals().get(tag)
+    if isinstance(muscleClass, type) and issubclass(muscleClass, BipedMuscles) and \
+            muscleClass not in (BipedMuscles, TemplateGroup):
+        return muscleClass
+    if tag not in mt.TEMPLATES:
+        return None
+    if tag not in _templateClasses:
+        _templateClasses[tag] = type(str(tag), (TemplateGroup,), {"template": tag})
+    return _templateClasses[tag]
@@ -0,0 +1,323 @@
+import json
+
+# Muscle group templates.
+#
+# inputs:      constructor arguments in order, as (name, ui label)
+# derived:     joints found from another joint, name: [joint, "child" or "parent"]
+# units:       muscle units in build order. origin/insertion are [joint, end joint, move factor],
+#              the locator is placed at joint + (end joint - joint) * move factor
+# aims:        units whose main aim constraint is rebuilt with an object rotation up vector
+# constraints: extra constraints made after every unit is built. a driver or driven that looks
+#              like "A.JOmuscle" is a joint of the muscle unit with that suffix
+TEMPLATES = {
+    "TrapGroup": {
+        "label": "Trapezius",
+        "unitName": "trapezius",
+        "inputs": [["back2Joint", "Back2 Joint"],
+                   ["clavicleJoint", "Clavicle Joint"],
+                   ["acromionJoint", "Acromion Joint"]],
+        "derived": {"back3Joint": ["back2Joint", "child"],
+                    "neckJoint": ["back3Joint", "child"],
+                    "headJoint": ["neckJoint", "child"],
+                    "shoulderJoint": ["clavicleJoint", "child"],
+                    "scapulaJoint": ["acromionJoint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["neckJoint", "headJoint", 1 / 2.0],
+                   "insertion": ["clavicleJoint", "shoulderJoint", 5 / 6.0]},
+                  {"suffix": "B",
+                   "origin": ["back3Joint", "neckJoint", 6 / 8.0],
+                   "insertion": ["acromionJoint", "scapulaJoint", 1 / 4.0]},
+                  {"suffix": "C",
+                   "origin": ["back3Joint", "neckJoint", 1 / 8.0],
+                   "insertion": ["acromionJoint", "scapulaJoint", 3 / 4.0]}],
+        "aims": [{"unit": "A", "worldUpObject": "back3Joint", "worldUpVector": [0, 1, 0]}],
+        "constraints": [{"name": "trapAParentCons", "type": "parentConstraint",
+                         "drivers": ["neckJoint", "headJoint"], "driven": "A.muscleOrigin",
+                         "flags": {"mo": True, "weight": True}},
+                        {"name": "trapCParentCons", "type": "parentConstraint",
+                         "drivers": ["back2Joint", "back3Joint"], "driven": "C.muscleOrigin",
+                         "flags": {"mo": True, "weight": True}}]
+    },
+    "LatsGroup": {
+        "label": "Lats",
+        "unitName": "lats",
+        "inputs": [["back1Joint", "Back1 Joint"],
+                   ["twist2Joint", "UpperArm Twist2 Joint"],
+                   ["scapulaJoint", "Scapula Joint"],
+                   ["trapCJoint", "TrapC Joint"]],
+        "derived": {"back2Joint": ["back1Joint", "child"],
+                    "back3Joint": ["back2Joint", "child"],
+                    "shoulderJoint": ["twist2Joint", "parent"],
+                    "scapulaTipJoint": ["scapulaJoint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["back2Joint", "back3Joint", 1 / 2.0],
+                   "insertion": ["twist2Joint", "shoulderJoint", 1 / 2.0]},
+                  {"suffix": "B",
+                   "origin": ["back1Joint", "back2Joint", 1 / 10.0],
+                   "insertion": ["twist2Joint", "shoulderJoint", 1 / 2.0]},
+                  {"suffix": "C",
+                   "origin": ["scapulaTipJoint", "scapulaJoint", 1 / 10.0],
+                   "insertion": ["twist2Joint", "shoulderJoint", 1 / 2.0]}],
+        "aims": [],
+        "constraints": [{"name": "latsBPointCos", "type": "pointConstraint",
+                         "drivers": ["back3Joint"], "driven": "B.muscleOffset",
+                         "flags": {"mo": True, "weight": True, "skip": "y"}},
+                        {"name": "latsAPointCos", "type": "pointConstraint",
+                         "drivers": ["B.JOmuscle", "trapCJoint"], "driven": "A.muscleOffset",
+                         "flags": {"mo": True, "weight": True}}]
+    },
+    "DeltoidGroup": {
+        "label": "Deltoid",
+        "unitName": "deltoid",
+        "inputs": [["clavicleJoint", "Clavicle Joint"],
+                   ["upperArmJoint", "UpperArm Joint"],
+                   ["twist1Joint", "UpperArm Twist1 Joint"],
+                   ["twist2Joint", "UpperArm Twist2 Joint"],
+                   ["acromionJoint", "Acromion Joint"]],
+        "derived": {"sacpulaJoint": ["acromionJoint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["clavicleJoint", "upperArmJoint", 5 / 6.0],
+                   "insertion": ["twist2Joint", "upperArmJoint", 0.0]},
+                  {"suffix": "B",
+                   "origin": ["acromionJoint", "acromionJoint", 1.0],
+                   "insertion": ["twist2Joint", "upperArmJoint", 0.0]},
+                  {"suffix": "C",
+                   "origin": ["sacpulaJoint", "acromionJoint", 5 / 6.0],
+                   "insertion": ["twist2Joint", "upperArmJoint", 0.0]}],
+        "aims": [{"unit": "A", "worldUpObject": "twist1Joint", "worldUpVector": [1, 0, 0]},
+                 {"unit": "B", "worldUpObject": "twist1Joint", "worldUpVector": [1, 0, 0]},
+                 {"unit": "C", "worldUpObject": "twist1Joint", "worldUpVector": [1, 0, 0]}],
+        "constraints": [{"name": "deltoidBPointCons", "type": "pointConstraint",
+                         "drivers": ["A.JOmuscle", "C.JOmuscle"], "driven": "B.muscleOffset",
+                         "flags": {"mo": True, "weight": 1}},
+                        {"name": "deltoidCPointCons", "type": "pointConstraint",
+                         "drivers": ["upperArmJoint"], "driven": "C.JOmuscle",
+                         "flags": {"mo": True, "weight": 1, "skip": ["x", "y"]}}]
+    },
+    "ArmMuscleGroup": {
+        "label": "Arm",
+        "unitName": "armMuscle",
+        "inputs": [["upArmTwsitJoint", "UpperArm Twist1 Joint"],
+                   ["lowArmTwsitJoint", "LowerArm Twist1 Joint"],
+                   ["twistBaseJoint", "UpperArm TwistBase Joint"],
+                   ["twistValueJoint", "UpperArm TwistValue Joint"],
+                   ["acromionJoint", "Acromion Joint"]],
+        "derived": {"upperArmJoint": ["upArmTwsitJoint", "parent"],
+                    "lowArmJoint": ["lowArmTwsitJoint", "parent"],
+                    "sacpulaJoint": ["acromionJoint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["upArmTwsitJoint", "upperArmJoint", 0.5],
+                   "insertion": ["lowArmTwsitJoint", "lowArmTwsitJoint", 0.0]},
+                  {"suffix": "B",
+                   "origin": ["sacpulaJoint", "acromionJoint", 4 / 6.0],
+                   "insertion": ["lowArmJoint", "lowArmTwsitJoint", 0.2]}],
+        "aims": [],
+        "constraints": [{"name": "armMuscleBPointCons", "type": "orientConstraint",
+                         "drivers": ["twistBaseJoint", "twistValueJoint"], "driven": "B.muscleOrigin",
+                         "flags": {"mo": True, "weight": 0.5}},
+                        {"name": "armMuscleAParnetCons", "type": "parentConstraint",
+                         "drivers": ["upperArmJoint"], "driven": "A.muscleOffset",
+                         "flags": {"mo": True, "weight": True, "skipTranslate": ["x", "y"],
+                                   "skipRotate": ["x", "y", "z"]}},
+                        {"name": "armMuscleBParentCons", "type": "parentConstraint",
+                         "drivers": ["upperArmJoint"], "driven": "B.muscleOffset",
+                         "flags": {"mo": True, "weight": True, "skipTranslate": ["x", "y"],
+                                   "skipRotate": ["x", "y", "z"]}}]
+    },
+    "PectoralisGroup": {
+        "label": "Pectoralis",
+        "unitName": "pectoralis",
+        "inputs": [["back3Joint", "Back3 Joint"],
+                   ["clavicleJoint", "Clavicle Joint"],
+                   ["upperarmJoint", "UpperArm Joint"],
+                   ["twist2Joint", "UpperArm Twist2 Joint"]],
+        "derived": {},
+        "units": [{"suffix": "A",
+                   "origin": ["back3Joint", "back3Joint", 1.0],
+                   "insertion": ["twist2Joint", "upperarmJoint", 1 / 2.0]},
+                  {"suffix": "B",
+                   "origin": ["clavicleJoint", "upperarmJoint", 1 / 4.0],
+                   "insertion": ["twist2Joint", "upperarmJoint", 1 / 2.0]}],
+        "aims": [],
+        "constraints": []
+    },
+    "NeckGroup": {
+        "label": "Neck",
+        "unitName": "neck",
+        "inputs": [["neckJoint", "Neck Joint"],
+                   ["clavicleJoint", "Clavicle Joint"]],
+        "derived": {"headJoint": ["neckJoint", "child"],
+                    "back3Joint": ["neckJoint", "parent"],
+                    "shoulderJoint": ["clavicleJoint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["headJoint", "neckJoint", 0.0],
+                   "insertion": ["clavicleJoint", "shoulderJoint", 0.1]},
+                  {"suffix": "B",
+                   "origin": ["back3Joint", "neckJoint", 1 / 2.0],
+                   "insertion": ["headJoint", "neckJoint", 1 / 4.0]}],
+        "aims": [{"unit": "A", "worldUpObject": "neckJoint", "worldUpVector": [1, 0, 0]}],
+        "constraints": []
+    },
+    "AbdominalGroup": {
+        "label": "Abdominal",
+        "unitName": "abdominal",
+        "inputs": [["pelvicJoint", "Pelvic Joint"]],
+        "derived": {"back1Joint": ["pelvicJoint", "child"],
+                    "back2Joint": ["back1Joint", "child"],
+                    "back3Joint": ["back2Joint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["pelvicJoint", "back1Joint", 0.0],
+                   "insertion": ["back1Joint", "back2Joint", 1 / 2.0]},
+                  {"suffix": "B",
+                   "origin": ["back1Joint", "back2Joint", 1 / 2.0],
+                   "insertion": ["back3Joint", "back2Joint", 0.0]},
+                  {"suffix": "C",
+                   "origin": ["pelvicJoint", "back1Joint", 1 / 4.0],
+                   "insertion": ["back2Joint", "back3Joint", 1 / 4.0]}],
+        "aims": [],
+        "constraints": [{"name": "abdominalCPointCons", "type": "pointConstraint",
+                         "drivers": ["A.JOmuscle", "B.JOmuscle"], "driven": "C.muscleOffset",
+                         "flags": {"mo": True, "weight": 1}}]
+    },
+    "GluteGroup": {
+        "label": "Glute",
+        "unitName": "glute",
+        "inputs": [["pelvicJoint", "Pelvic Joint"],
+                   ["hipJoint", "Hip Joint"]],
+        "derived": {"back1Joint": ["pelvicJoint", "child"],
+                    "kneeJoint": ["hipJoint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["pelvicJoint", "back1Joint", 0.0],
+                   "insertion": ["hipJoint", "kneeJoint", 1 / 4.0]},
+                  {"suffix": "B",
+                   "origin": ["pelvicJoint", "hipJoint", 1 / 2.0],
+                   "insertion": ["hipJoint", "kneeJoint", 1 / 20.0]}],
+        "aims": [],
+        "constraints": [{"name": "gluteAPointCons", "type": "pointConstraint",
+                         "drivers": ["pelvicJoint", "hipJoint"], "driven": "A.muscleOffset",
+                         "flags": {"mo": True, "weight": 1}}]
+    },
+    "LegMuscleGroup": {
+        "label": "Leg",
+        "unitName": "legMuscle",
+        "inputs": [["hipJoint", "Hip Joint"]],
+        "derived": {"kneeJoint": ["hipJoint", "child"],
+                    "ankleJoint": ["kneeJoint", "child"]},
+        "units": [{"suffix": "A",
+                   "origin": ["hipJoint", "kneeJoint", 1 / 10.0],
+                   "insertion": ["kneeJoint", "ankleJoint", 1 / 10.0]},
+                  {"suffix": "B",
+                   "origin": ["hipJoint", "kneeJoint", 0.0],
+                   "insertion": ["kneeJoint", "ankleJoint", 3 / 20.0]},
+                  {"suffix": "C",
+                   "origin": ["kneeJoint", "ankleJoint", 1 / 20.0],
+                   "insertion": ["ankleJoint", "kneeJoint", 0.0]}],
+        "aims": [{"unit": "A", "worldUpObject": "hipJoint", "worldUpVector": [1, 0, 0]},
+                 {"unit": "B", "worldUpObject": "hipJoint", "worldUpVector": [1, 0, 0]}],
+        "constraints": [{"name": "legMuscleCParentCons", "type": "parentConstraint",
+                         "drivers": ["kneeJoint"], "driven": "C.muscleOffset",
+                         "flags": {"mo": True, "weight": True, "skipTranslate": ["x", "y"],
+                                   "skipRotate": ["x", "y", "z"]}}]
+    },
+}
+
+_compiled = {}
+
+
+class GroupTemplate(object):
+    """
+    a template with every name reference resolved, made once per group type
+    """
+
+    def __init__(self, tag, template):
+        self.tag = tag
+        self.label = template.get("label", tag)
+        self.unitName = template["unitName"]
+        self.inputNames = [name for name, label in template["inputs"]]
+        self.inputLabels = [label for name, label in template["inputs"]]
+        self.unitSuffixes = tuple(unit["suffix"] for unit in template["units"])
+
+        self.derived = self.sortDerived(template.get("derived", {}))
+        jointNames = set(self.inputNames) | set(name for name, source, relation in self.derived)
+
+        self.units = []
+        for unit in template["units"]:
+            self.units.append((unit["suffix"],
+                               [self.jointRef(ref, jointNames) for ref in unit["origin"][:2]] + unit["origin"][2:],
+                               [self.jointRef(ref, jointNames) for ref in unit["insertion"][:2]] + unit["insertion"][2:]))
+
+        self.aims = []
+        for aim in template.get("aims", []):
+            self.aims.append((self.unitIndex(aim["unit"]), self.jointRef(aim["worldUpObject"], jointNames),
+                              aim.get("worldUpVector", [1, 0, 0])))
+
+        self.constraints = []
+        for constraint in template.get("constraints", []):
+            self.constraints.append((constraint["name"], constraint["type"],
+                                     [self.ref(ref, jointNames) for ref in constraint["drivers"]],
+                                     self.ref(constraint["driven"], jointNames),
+                                     dict(constraint.get("flags", {}))))
+
+    def sortDerived(self, derived):
+        # a derived joint can come from another derived joint, resolve them in dependency order
+        known = set(self.inputNames)
+        ordered = []
+        remaining = dict(derived)
+        while remaining:
+            ready = sorted(name for name, (source, relation) in remaining.items() if source in known)
+            if not ready:
+                raise RuntimeError("{0}: cannot resolve derived joints {1}".format(self.tag, sorted(remaining)))
+            for name in ready:
+                source, relation = remaining.pop(name)
+                if relation not in ("child", "parent"):
+                    raise RuntimeError("{0}: '{1}' should be 'child' or 'parent'".format(self.tag, relation))
+                ordered.append((name, source, relation))
+                known.add(name)
+        return ordered
+
+    def unitIndex(self, suffix):
+        if suffix not in self.unitSuffixes:
+            raise RuntimeError("{0}: no muscle unit '{1}'".format(self.tag, suffix))
+        return self.unitSuffixes.index(suffix)
+
+    def jointRef(self, name, jointNames):
+        if name not in jointNames:
+            raise RuntimeError("{0}: unknown joint '{1}'".format(self.tag, name))
+        return name
+
+    def ref(self, name, jointNames):
+        """
+        :return: ("joint", name) or ("unit", unit index, muscle joint attribute)
+        """
+        if "." in name:
+            suffix, attr = name.split(".", 1)
+            return "unit", self.unitIndex(suffix), attr
+        return "joint", self.jointRef(name, jointNames)
+
+
+def compileTemplate(tag):
+    if tag not in _compiled:
+        if tag not in TEMPLATES:
+            raise RuntimeError("No muscle template named '{0}'".format(tag))
+        _compiled[tag] = GroupTemplate(tag, TEMPLATES[tag])
+    return _compiled[tag]
+
+
+def addTemplate(tag, template):
+    """
+    register a new group type, or replace one, the template is checked right away
+    """
+    compiledTemplate = GroupTemplate(tag, template)
+    TEMPLATES[tag] = template
+    _compiled[tag] = compiledTemplate
+    return compiledTemplate
+
+
+def loadTemplates(filePath):
+    with open(filePath) as fp:
+        templateData = json.load(fp)
+    return [addTemplate(tag, template) for tag, template in templateData.items()]
+
+
+def templateLabels():
+    return [(tag, compileTemplate(tag).label) for tag in TEMPLATES]
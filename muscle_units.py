@@ -1,6 +1,12 @@
 import maya.cmds as cmds
 import maya.api.OpenMaya as om
 import math
+from contextlib import contextmanager
+from . import modifier_command
+from . import tracing
+
+MUSCLE_JOINTS = ("muscleOrigin", "muscleInsertion", "muscleBase", "muscleTip",
+                 "muscleDriver", "muscleOffset", "JOmuscle")
 
 
 def createJnt(jointName, parent=None, radius=1.0, **kwargs):
@@ -15,7 +21,106 @@ def createJnt(jointName, parent=None, radius=1.0, **kwargs):
     return jnt
 
 
+@tracing.operation
+def createJoints(specs):
+    """
+    create many joints with one MDagModifier, the world matrix of each joint is turned into
+    translate and jointOrient under its parent so no matchTransform or makeIdentity is needed
+    :param specs: list of dicts with "name", "matrix" (world matrix, scale is ignored), "parent"
+                  (a scene node, a joint earlier in the list or None) and optional "radius"
+    :return: list of joint names
+    """
+    modifier = om.MDagModifier()
+    created = {}
+    worldMatrices = {}
+    jointObjects = []
+    for spec in specs:
+        parent = spec.get("parent")
+        if parent in created:
+            parentObject = created[parent]
+            parentMatrix = worldMatrices[parent]
+        elif parent:
+            parentObject = om.MSelectionList().add(parent).getDependNode(0)
+            parentMatrix = om.MMatrix(cmds.xform(parent, query=True, matrix=True, worldSpace=True))
+        else:
+            parentObject = om.MObject.kNullObj
+            parentMatrix = om.MMatrix()
+        worldMatrix = om.MMatrix(spec["matrix"])
+        localMatrix = om.MTransformationMatrix(worldMatrix * parentMatrix.inverse())
+        translation = localMatrix.translation(om.MSpace.kTransform)
+        rotation = localMatrix.rotation()
+
+        jointObject = modifier.createNode("joint", parentObject)
+        modifier.renameNode(jointObject, spec["name"])
+        fnJoint = om.MFnDependencyNode(jointObject)
+        for axis, move, orient in zip("XYZ", translation, [rotation.x, rotation.y, rotation.z]):
+            modifier.newPlugValueDouble(fnJoint.findPlug("translate" + axis, False), move)
+            modifier.newPlugValueDouble(fnJoint.findPlug("jointOrient" + axis, False), orient)
+        if "radius" in spec:
+            modifier.newPlugValueDouble(fnJoint.findPlug("radius", False), spec["radius"])
+        created[spec["name"]] = jointObject
+        worldMatrices[spec["name"]] = worldMatrix
+        jointObjects.append(jointObject)
+
+    modifier_command.doIt(modifier)
+    return [om.MFnDagNode(jointObject).partialPathName() for jointObject in jointObjects]
+
+
+@contextmanager
+def undoChunk(name=None):
+    """
+    group every command run inside the block into one undo step
+    :param name: chunk name, what undoInfo(query=True, undoName=True) gives while it is the last step
+    """
+    if name:
+        cmds.undoInfo(openChunk=True, chunkName=name)
+    else:
+        cmds.undoInfo(openChunk=True)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+@contextmanager
+def withoutUndo():
+    """
+    run the block without recording undo, the redo queue is kept
+    """
+    state = cmds.undoInfo(query=True, state=True)
+    cmds.undoInfo(stateWithoutFlush=False)
+    try:
+        yield
+    finally:
+        cmds.undoInfo(stateWithoutFlush=state)
+
+
+def sideName(name, side="L", prefix="R"):
+    """
+    name of the other side joint or muscle, e.g. L_trap to R_trap
+    """
+    return name.replace(side + "_", prefix + "_")
+
+
+def renameInAttributes(instance, oldName, newName):
+    """
+    point every attribute of instance holding oldName, alone or in a list, at newName
+    :return: True if any attribute held oldName
+    """
+    found = False
+    for attr, value in list(vars(instance).items()):
+        if isinstance(value, str) and value == oldName:
+            setattr(instance, attr, newName)
+            found = True
+        elif isinstance(value, list) and oldName in value:
+            setattr(instance, attr, [newName if item == oldName else item for item in value])
+            found = True
+    return found
+
+
 class MuscleJoint(object):
+    # nodes left by a built unit: 7 joints, 3 point constraints, 1 aim constraint and 6 SDK curves
+    builtNodeCount = 17
 
     def __init__(self, muscleName, muscleLength, compressionFactor, stretchFactor,
                  stretchOffset=None, compressionOffset=None):
@@ -33,6 +138,7 @@ class MuscleJoint(object):
         self.create(muscleName, muscleLength, stretchOffset=stretchOffset, compressionOffset=compressionOffset)
         self.edit()
 
+    @tracing.operation
     def create(self, muscleName, muscleLength, stretchOffset=None, compressionOffset=None):
 
         self.muscleOrigin = createJnt("{0}_muscleOrigin".format(muscleName))
@@ -72,6 +178,7 @@ class MuscleJoint(object):
 
         self.addSDK()
 
+    @tracing.operation
     def edit(self):
         if self.jiggleGroup:
             cmds.parent(self.muscleOffset, self.muscleDriver)
@@ -100,9 +207,6 @@ class MuscleJoint(object):
         if self.insertionAttachObj:
             cmds.parent(self.insertionLoc, self.insertionAttachObj)
 
-        cmds.aimConstraint(self.insertionLoc, self.originLoc,
-                           aimVector=[0, 1, 0], upVector=[1, 0, 0],
-                           worldUpType="scene", offset=[0, 0, 0], weight=1)
         cmds.aimConstraint(self.insertionLoc, self.originLoc,
                            aimVector=[0, -1, 0], upVector=[1, 0, 0],
                            worldUpType="scene", offset=[0, 0, 0], weight=1)
@@ -121,7 +225,8 @@ class MuscleJoint(object):
         cmds.delete(self.mainPointConstraint)
         self.ptConstraintsTmp.append(cmds.pointConstraint(self.centerLoc, self.muscleDriver, mo=False, w=True)[0])
 
-    def update(self):
+    @tracing.operation
+    def update(self, sdkKeys=None):
         for ptConstraintsTmp in self.ptConstraintsTmp:
             if cmds.objExists(ptConstraintsTmp):
                 cmds.delete(ptConstraintsTmp)
@@ -149,12 +254,19 @@ class MuscleJoint(object):
                                                     worldUpType="objectrotation", worldUpObject=self.muscleOrigin,
                                                     worldUpVector=[1, 0, 0])
 
-        animCurveNodes = cmds.ls(cmds.listConnections(self.JOmuscle, s=True, d=False),
+        # curves merged by the optimizer drive several channels, flat ones may be gone
+        animCurveNodes = cmds.ls(cmds.listConnections(self.JOmuscle, s=True, d=False) or [],
                                  type=("animCurveUU", "animCurveUL"))
-        cmds.delete(animCurveNodes)
-        self.addSDK()
-
-    def addSDK(self, stretchOffset=None, compressionOffset=None):
+        if animCurveNodes:
+            cmds.delete(sorted(set(animCurveNodes)))
+        self.addSDK(sdkKeys=sdkKeys)
+
+    def sdkKeyTable(self, restLength, stretchOffset=None, compressionOffset=None):
+        """
+        driven key values for the JOmuscle channels at rest, stretch and compression length
+        :param restLength: muscleTip translateY at rest
+        :return: dict of channel to [[driver value, value], ...]
+        """
         xzSquashScale = math.sqrt(1.0 / self.compressionFactor)
         xzStretchScale = math.sqrt(1.0 / self.stretchFactor)
 
@@ -163,43 +275,40 @@ class MuscleJoint(object):
         if compressionOffset is None:
             compressionOffset = [0.0, 0.0, 0.0]
 
-        restLength = cmds.getAttr("{0}.translateY".format(self.muscleTip))
-
+        driverValues = [restLength, restLength * self.stretchFactor, restLength * self.compressionFactor]
+        sdkKeys = {}
         for index, axis in enumerate("XYZ"):
-
-            cmds.setAttr("{0}.scale{1}".format(self.JOmuscle, axis), 1.0)
-            cmds.setAttr("{0}.translate{1}".format(self.JOmuscle, axis), 0.0)
-            cmds.setDrivenKeyframe("{0}.scale{1}".format(self.JOmuscle, axis),
-                                   currentDriver="{0}.translateY".format(self.muscleTip))
-            cmds.setDrivenKeyframe("{0}.translate{1}".format(self.JOmuscle, axis),
-                                   currentDriver="{0}.translateY".format(self.muscleTip))
-
-            cmds.setAttr("{0}.translateY".format(self.muscleTip), restLength * self.stretchFactor)
             if axis == "Y":
-                cmds.setAttr("{0}.scale{1}".format(self.JOmuscle, axis), self.stretchFactor)
+                scaleValues = [1.0, self.stretchFactor, self.compressionFactor]
+                translateValues = [0.0, 0.0, 0.0]
             else:
-                cmds.setAttr("{0}.scale{1}".format(self.JOmuscle, axis), xzStretchScale)
-                cmds.setAttr("{0}.translate{1}".format(self.JOmuscle, axis), stretchOffset[index])
-
-            cmds.setDrivenKeyframe("{0}.scale{1}".format(self.JOmuscle, axis),
-                                   currentDriver="{0}.translateY".format(self.muscleTip))
-            cmds.setDrivenKeyframe("{0}.translate{1}".format(self.JOmuscle, axis),
-                                   currentDriver="{0}.translateY".format(self.muscleTip))
-
-            cmds.setAttr("{0}.translateY".format(self.muscleTip), restLength * self.compressionFactor)
-            if axis == "Y":
-                cmds.setAttr("{0}.scale{1}".format(self.JOmuscle, axis), self.compressionFactor)
-            else:
-                cmds.setAttr("{0}.scale{1}".format(self.JOmuscle, axis), xzSquashScale)
-                cmds.setAttr("{0}.translate{1}".format(self.JOmuscle, axis), compressionOffset[index])
-
-            cmds.setDrivenKeyframe("{0}.scale{1}".format(self.JOmuscle, axis),
-                                   currentDriver="{0}.translateY".format(self.muscleTip))
-            cmds.setDrivenKeyframe("{0}.translate{1}".format(self.JOmuscle, axis),
-                                   currentDriver="{0}.translateY".format(self.muscleTip))
-
-            cmds.setAttr("{0}.translateY".format(self.muscleTip), restLength)
-
+                scaleValues = [1.0, xzStretchScale, xzSquashScale]
+                translateValues = [0.0, stretchOffset[index], compressionOffset[index]]
+            sdkKeys["scale" + axis] = [list(key) for key in zip(driverValues, scaleValues)]
+            sdkKeys["translate" + axis] = [list(key) for key in zip(driverValues, translateValues)]
+        return sdkKeys
+
+    @tracing.operation
+    def addSDK(self, stretchOffset=None, compressionOffset=None, sdkKeys=None):
+        """
+        key the JOmuscle channels on the muscle length, keys are set by value so the muscle is never posed
+        :param sdkKeys: key table from sdkKeyTable(), computed from the current rest length if None
+        """
+        if sdkKeys is None:
+            self.restLength = cmds.getAttr("{0}.translateY".format(self.muscleTip))
+            sdkKeys = self.sdkKeyTable(self.restLength, stretchOffset, compressionOffset)
+        else:
+            self.restLength = sdkKeys["scaleY"][0][0]
+
+        driver = "{0}.translateY".format(self.muscleTip)
+        for axis in "XYZ":
+            for channel in ["scale" + axis, "translate" + axis]:
+                for driverValue, value in sdkKeys[channel]:
+                    cmds.setDrivenKeyframe("{0}.{1}".format(self.JOmuscle, channel), currentDriver=driver,
+                                           driverValue=driverValue, value=value)
+        self.sdkKeys = sdkKeys
+
+    @tracing.operation
     def jiggle(self):
         self.jiggleBase = createJnt(jointName=("{0}_jiggleBase".format(self.muscleName)), parent=self.muscleDriver)
         self.jiggleValue = createJnt(jointName=("{0}_jiggleValue".format(self.muscleName)), parent=self.muscleDriver)
@@ -229,6 +338,36 @@ class MuscleJoint(object):
                                                 worldUpObject=self.muscleDriver, worldUpVector=[1, 0, 0])
         self.jiggleGroup = [self.jiggleBase, self.jiggleValue, self.jiggleJoint]
 
+    def evaluationNodes(self):
+        """
+        nodes the unit evaluates every frame, by kind
+        :return: dict of constraints, sdkCurves and jiggle to node lists, in evaluation order
+        """
+        joints = [joint for joint in self.allJoints + self.jiggleGroup if cmds.objExists(joint)]
+        constraintTypes = ["pointConstraint", "aimConstraint", "orientConstraint", "parentConstraint",
+                           "scaleConstraint", "poleVectorConstraint"]
+        constraints = (cmds.listRelatives(joints, type=constraintTypes) or []) if joints else []
+        sdkCurves = []
+        if cmds.objExists(self.JOmuscle):
+            sdkCurves = sorted(set(cmds.ls(cmds.listConnections(self.JOmuscle, s=True, d=False) or [],
+                                           type=("animCurveUU", "animCurveUL"))))
+        jiggle = []
+        if self.jiggleGroup and cmds.objExists(self.jiggleGroup[1]):
+            jiggleNodes = cmds.ls(cmds.listConnections(self.jiggleGroup[1], s=True, d=False) or [],
+                                  type="jiggleJoint")
+            if jiggleNodes:
+                jiggle = cmds.ls(cmds.listConnections(jiggleNodes, s=True, d=False) or [],
+                                 type="decomposeMatrix") + jiggleNodes
+        return {"constraints": sorted(set(constraints)), "sdkCurves": sdkCurves, "jiggle": jiggle}
+
+    def renameNode(self, oldName, newName):
+        """
+        follow a node renamed in the scene
+        :return: True if the unit uses the node
+        """
+        return renameInAttributes(self, oldName, newName)
+
+    @tracing.operation
     def delete(self):
         self.update()
         if cmds.objExists(self.muscleOrigin):
@@ -239,7 +378,55 @@ class MuscleJoint(object):
             if cmds.objExists(node):
                 cmds.delete(node)
 
+    def metadata(self):
+        """
+        everything needed to get the unit back from the scene with fromMetadata()
+        """
+        return {"muscleName": self.muscleName,
+                "compressionFactor": self.compressionFactor,
+                "stretchFactor": self.stretchFactor,
+                "stretchOffset": self.stretchOffset,
+                "compressionOffset": self.compressionOffset,
+                "originAttachObj": self.originAttachObj,
+                "insertionAttachObj": self.insertionAttachObj,
+                "joints": self.allJoints,
+                "mainAimConstraint": self.mainAimConstraint,
+                "mainPointConstraint": self.mainPointConstraint,
+                "jiggleGroup": self.jiggleGroup,
+                "restLength": getattr(self, "restLength", None),
+                "sdkKeys": getattr(self, "sdkKeys", None)}
+
+    @classmethod
+    def fromMetadata(cls, data):
+        """
+        make a unit object for muscle joints that already exist, no node is created
+        :param data: dict from metadata()
+        """
+        muscleJointGrp = cls.__new__(cls)
+        for key in ["muscleName", "compressionFactor", "stretchFactor", "stretchOffset", "compressionOffset",
+                    "originAttachObj", "insertionAttachObj", "mainAimConstraint", "mainPointConstraint",
+                    "jiggleGroup", "restLength", "sdkKeys"]:
+            setattr(muscleJointGrp, key, data.get(key))
+        muscleJointGrp.jiggleGroup = muscleJointGrp.jiggleGroup or []
+        muscleJointGrp.allJoints = list(data["joints"])
+        for attr, joint in zip(MUSCLE_JOINTS, muscleJointGrp.allJoints):
+            setattr(muscleJointGrp, attr, joint)
+        if muscleJointGrp.jiggleGroup:
+            muscleJointGrp.jiggleBase, muscleJointGrp.jiggleValue, muscleJointGrp.jiggleJoint = \
+                muscleJointGrp.jiggleGroup
+        muscleJointGrp.muscleNodes = []
+        muscleJointGrp.ptConstraintsTmp = []
+        muscleJointGrp.originLoc = "{0}_muscleOrigin_loc".format(muscleJointGrp.muscleName)
+        muscleJointGrp.insertionLoc = "{0}_muscleInsertion_loc".format(muscleJointGrp.muscleName)
+        muscleJointGrp.centerLoc = "{0}_muscleCenter_loc".format(muscleJointGrp.muscleName)
+        return muscleJointGrp
+
+    @staticmethod
+    def jointNames(muscleName):
+        return ["{0}_{1}".format(muscleName, joint) for joint in MUSCLE_JOINTS]
+
     @classmethod
+    @tracing.operation
     def createFromAttachObj(cls, muscleName, originAttachObj, insertionAttachObj,
                             compressionFactor=1.0, stretchFactor=1.0,
                             stretchOffset=None, compressionOffset=None):
@@ -263,6 +450,7 @@ class MuscleJoint(object):
         return muscleJointGrp
 
 
+@tracing.operation
 def mirror(muscleJointGrp, newMuscleName, muscleOrigin, muscleInsertion, mirrorAxis="x"):
     if not isinstance(muscleJointGrp, MuscleJoint):
         return
@@ -0,0 +1,176 @@
+"""
+post-build pass over the node network of built muscle groups
+
+the builds leave nodes that do not change the result: constraints whose outputs were taken over
+by a later connection, SDK curves holding one value, and SDK curves identical to another curve on
+the same driver (scaleX and scaleZ of a JOmuscle always are). the pass deletes the first two and
+plugs the channels of the third into the curve they duplicate
+
+curves are only merged per driver: an animCurve has a single input, so curves of different units
+cannot be shared even when their keys are the same
+"""
+import maya.cmds as cmds
+
+from . import muscle_units as mu
+from . import profiler
+from . import tracing
+
+CONSTRAINT_TYPES = ("pointConstraint", "aimConstraint", "orientConstraint", "parentConstraint",
+                    "scaleConstraint", "poleVectorConstraint")
+CURVE_TYPES = ("animCurveUU", "animCurveUL")
+TOLERANCE = 1e-6
+
+
+def unitJoints(muscleUnit):
+    return [joint for joint in muscleUnit.allJoints + muscleUnit.jiggleGroup if cmds.objExists(joint)]
+
+
+def referencedNodes(groups):
+    """
+    constraints the groups and units keep by name, deleting them would break update() and delete()
+    """
+    nodes = set()
+    for group in groups:
+        for constraint in group.muscleCons:
+            nodes.update(constraint)
+        for muscleUnit in group.muscleUnitGroup:
+            for attr in ["mainAimConstraint", "mainPointConstraint", "jiggleAimCons"]:
+                nodes.update(getattr(muscleUnit, attr, None) or [])
+    return nodes
+
+
+def deadConstraints(groups):
+    """
+    :return: constraints under the group joints that drive nothing, referenced ones excluded
+    """
+    joints = [joint for group in groups for muscleUnit in group.muscleUnitGroup for joint in unitJoints(muscleUnit)]
+    if not joints:
+        return []
+    keep = referencedNodes(groups)
+    constraints = sorted(set(cmds.listRelatives(joints, type=CONSTRAINT_TYPES) or []))
+    return [constraint for constraint in constraints
+            if constraint not in keep and not cmds.listConnections(constraint, source=False, destination=True)]
+
+
+def curveSignature(curve):
+    """
+    everything the output of an SDK curve depends on
+    """
+    return (tuple(cmds.listConnections("{0}.input".format(curve), source=True, destination=False,
+                                       plugs=True) or []),
+            cmds.nodeType(curve),
+            tuple(round(value, 9) for value in cmds.keyframe(curve, query=True, floatChange=True) or []),
+            tuple(round(value, 9) for value in cmds.keyframe(curve, query=True, valueChange=True) or []),
+            tuple(cmds.keyTangent(curve, query=True, inTangentType=True) or []),
+            tuple(cmds.keyTangent(curve, query=True, outTangentType=True) or []),
+            cmds.getAttr("{0}.preInfinity".format(curve)),
+            cmds.getAttr("{0}.postInfinity".format(curve)))
+
+
+def unitCurves(muscleUnit):
+    """
+    :return: list of (curve, JOmuscle channel plugs it drives)
+    """
+    if not cmds.objExists(muscleUnit.JOmuscle):
+        return []
+    curves = cmds.ls(cmds.listConnections(muscleUnit.JOmuscle, source=True, destination=False) or [],
+                     type=CURVE_TYPES)
+    result = []
+    for curve in sorted(set(curves)):
+        plugs = cmds.listConnections("{0}.output".format(curve), source=False, destination=True, plugs=True) or []
+        result.append((curve, plugs))
+    return result
+
+
+def curvePlan(groups):
+    """
+    :return: (flat, duplicates), flat is a list of (curve, plugs, value) and duplicates a list of
+             (curve, plugs, curve it duplicates)
+    """
+    flat = []
+    duplicates = []
+    for group in groups:
+        for muscleUnit in group.muscleUnitGroup:
+            kept = {}
+            for curve, plugs in unitCurves(muscleUnit):
+                signature = curveSignature(curve)
+                values = signature[3]
+                # a constant curve only holds when it cannot extrapolate, 0 is constant infinity
+                if values and max(values) - min(values) < TOLERANCE and not signature[6] and not signature[7]:
+                    flat.append((curve, plugs, values[0]))
+                elif signature in kept:
+                    duplicates.append((curve, plugs, kept[signature]))
+                else:
+                    kept[signature] = curve
+    return flat, duplicates
+
+
+def snapshot(groups):
+    """
+    :return: dict of unit joint to world matrix
+    """
+    return dict((joint, cmds.xform(joint, query=True, matrix=True, worldSpace=True))
+                for group in groups for muscleUnit in group.muscleUnitGroup for joint in unitJoints(muscleUnit))
+
+
+def evaluationMs(groups, startFrame, endFrame):
+    return sum(row["msPerFrame"] for row in profiler.profileGroups(groups, startFrame, endFrame))
+
+
+def nodeCount(groups):
+    return sum(len(nodes) for group in groups for muscleUnit in group.muscleUnitGroup
+               for nodes in muscleUnit.evaluationNodes().values())
+
+
+@tracing.operation
+def optimizeGroups(groups, dryRun=False, verify=True, startFrame=None, endFrame=None):
+    """
+    remove dead constraints and flat or duplicate SDK curves of built groups
+    update() and build() bring every curve back, run the pass again after them
+    :param groups: list of BipedMuscles
+    :param dryRun: only report what would be removed
+    :param verify: compare the unit joint world matrices before and after, undo the pass and RuntimeError if one moved
+    :param startFrame: frame range the evaluation is timed on, the playback range if None
+    :return: dict with the nodes removed by kind, node counts and evaluation ms per frame before and after
+    """
+    if startFrame is None or endFrame is None:
+        startFrame, endFrame = profiler.playbackRange()
+    constraints = deadConstraints(groups)
+    flat, duplicates = curvePlan(groups)
+    result = {"deadConstraints": constraints,
+              "flatCurves": [curve for curve, plugs, value in flat],
+              "duplicateCurves": [curve for curve, plugs, original in duplicates],
+              "nodesBefore": nodeCount(groups),
+              "msPerFrameBefore": evaluationMs(groups, startFrame, endFrame)}
+    if dryRun:
+        return result
+
+    before = snapshot(groups) if verify else None
+    try:
+        with mu.undoChunk("optimizeGroups"):
+            if constraints:
+                cmds.delete(constraints)
+            for curve, plugs, value in flat:
+                cmds.delete(curve)
+                for plug in plugs:
+                    cmds.setAttr(plug, value)
+            for curve, plugs, original in duplicates:
+                for plug in plugs:
+                    cmds.connectAttr("{0}.output".format(original), plug, force=True)
+                cmds.delete(curve)
+
+            if verify:
+                after = snapshot(groups)
+                moved = sorted(joint for joint, matrix in before.items()
+                               if any(abs(a - b) > TOLERANCE for a, b in zip(matrix, after.get(joint, matrix))))
+                if moved:
+                    raise RuntimeError("Optimizing moved {0} joints: {1}".format(len(moved), ", ".join(moved[:10])))
+    except RuntimeError:
+        # leave the scene as it was, only the pass's own chunk is undone
+        if cmds.undoInfo(query=True, undoName=True) == "optimizeGroups":
+            cmds.undo()
+        raise
+    result["nodesAfter"] = nodeCount(groups)
+    result["nodesSaved"] = result["nodesBefore"] - result["nodesAfter"]
+    result["msPerFrameAfter"] = evaluationMs(groups, startFrame, endFrame)
+    return result
@@ -0,0 +1,156 @@
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaUI as omui
+import maya.api.OpenMayaRender as omr
+
+
+def maya_useNewAPI():
+    pass
+
+
+def polePlane(rootPos, midPos, endPos):
+    """
+    the plane visPoleVector builds with locators and utility nodes, worked out in one go
+    the pole sits on the line from the length weighted middle of root and end towards mid
+    :return: root, pole, end and mid points as om.MPoint
+    """
+    root, mid, end = om.MVector(rootPos), om.MVector(midPos), om.MVector(endPos)
+    lengthA = (mid - root).length()
+    lengthB = (end - mid).length()
+    if lengthA + lengthB == 0:
+        return [om.MPoint(root)] * 4
+    midFloat = (root * lengthB + end * lengthA) / (lengthA + lengthB)
+    aim = mid - midFloat
+    pole = midFloat
+    if aim.length() > 0:
+        pole = midFloat + aim.normal() * (((root - end).length() + aim.length()) * 0.5)
+    return [om.MPoint(point) for point in [root, pole, end, mid]]
+
+
+class PoleVectorVis(omui.MPxLocatorNode):
+    kTypeName = "poleVectorVis"
+    kPluginNodeId = om.MTypeId(0x00001235)
+    kDrawClassification = "drawdb/geometry/poleVectorVis"
+    kDrawRegistrantId = "poleVectorVisPlugin"
+
+    aChains = om.MObject()
+    aRootMatrix = om.MObject()
+    aMidMatrix = om.MObject()
+    aEndMatrix = om.MObject()
+    aColor = om.MObject()
+    aOpacity = om.MObject()
+
+    def __init__(self):
+        omui.MPxLocatorNode.__init__(self)
+
+    @staticmethod
+    def creator():
+        return PoleVectorVis()
+
+    @staticmethod
+    def initialize():
+        mAttr = om.MFnMatrixAttribute()
+        cAttr = om.MFnCompoundAttribute()
+        nAttr = om.MFnNumericAttribute()
+
+        PoleVectorVis.aRootMatrix = mAttr.create("rootMatrix", "rootMatrix")
+        PoleVectorVis.aMidMatrix = mAttr.create("midMatrix", "midMatrix")
+        PoleVectorVis.aEndMatrix = mAttr.create("endMatrix", "endMatrix")
+
+        PoleVectorVis.aChains = cAttr.create("chains", "chains")
+        for child in [PoleVectorVis.aRootMatrix, PoleVectorVis.aMidMatrix, PoleVectorVis.aEndMatrix]:
+            cAttr.addChild(child)
+        cAttr.array = True
+        cAttr.usesArrayDataBuilder = True
+        PoleVectorVis.addAttribute(PoleVectorVis.aChains)
+
+        PoleVectorVis.aColor = nAttr.createColor("color", "color")
+        nAttr.default = (1.0, 0.0, 0.0)
+        PoleVectorVis.addAttribute(PoleVectorVis.aColor)
+
+        PoleVectorVis.aOpacity = nAttr.create("opacity", "opacity", om.MFnNumericData.kFloat, 0.5)
+        nAttr.setMin(0.0)
+        nAttr.setMax(1.0)
+        PoleVectorVis.addAttribute(PoleVectorVis.aOpacity)
+
+
+class PoleVectorVisData(om.MUserData):
+
+    def __init__(self):
+        om.MUserData.__init__(self, False)
+        self.planes = []
+        self.color = omr.MColor()
+
+
+class PoleVectorVisDrawOverride(omr.MPxDrawOverride):
+    """
+    every chain of the node is read and drawn in one prepare and one draw call, no shading group is needed
+    """
+
+    def __init__(self, obj):
+        omr.MPxDrawOverride.__init__(self, obj, None)
+
+    @staticmethod
+    def creator(obj):
+        return PoleVectorVisDrawOverride(obj)
+
+    def supportedDrawAPIs(self):
+        return omr.MRenderer.kAllDevices
+
+    def isBounded(self, objPath, cameraPath):
+        return False
+
+    def hasUIDrawables(self):
+        return True
+
+    def prepareForDraw(self, objPath, cameraPath, frameContext, oldData):
+        data = oldData if isinstance(oldData, PoleVectorVisData) else PoleVectorVisData()
+        node = objPath.node()
+
+        chainsPlug = om.MPlug(node, PoleVectorVis.aChains)
+        data.planes = []
+        for index in range(chainsPlug.numElements()):
+            chainPlug = chainsPlug.elementByPhysicalIndex(index)
+            positions = []
+            for attribute in [PoleVectorVis.aRootMatrix, PoleVectorVis.aMidMatrix, PoleVectorVis.aEndMatrix]:
+                matrix = om.MFnMatrixData(chainPlug.child(attribute).asMObject()).matrix()
+                positions.append([matrix.getElement(3, 0), matrix.getElement(3, 1), matrix.getElement(3, 2)])
+            data.planes.append(polePlane(*positions))
+
+        colorPlug = om.MPlug(node, PoleVectorVis.aColor)
+        opacity = om.MPlug(node, PoleVectorVis.aOpacity).asFloat()
+        data.color = omr.MColor([colorPlug.child(i).asFloat() for i in range(3)] + [opacity])
+        return data
+
+    def addUIDrawables(self, objPath, drawManager, frameContext, data):
+        if not isinstance(data, PoleVectorVisData) or not data.planes:
+            return
+        triangles = om.MPointArray()
+        lines = om.MPointArray()
+        for root, pole, end, mid in data.planes:
+            for point in [root, pole, mid, pole, end, mid]:
+                triangles.append(point)
+            for point in [root, pole, pole, end, root, mid, mid, end]:
+                lines.append(point)
+
+        drawManager.beginDrawable()
+        drawManager.setColor(data.color)
+        drawManager.mesh(omr.MUIDrawManager.kTriangles, triangles)
+        drawManager.setColor(omr.MColor([data.color.r, data.color.g, data.color.b, 1.0]))
+        drawManager.mesh(omr.MUIDrawManager.kLines, lines)
+        drawManager.endDrawable()
+
+
+def initializePlugin(obj):
+    fnPlugin = om.MFnPlugin(obj, "Lyz", "1.0", "Any")
+    fnPlugin.registerNode(PoleVectorVis.kTypeName, PoleVectorVis.kPluginNodeId, PoleVectorVis.creator,
+                          PoleVectorVis.initialize, om.MPxNode.kLocatorNode, PoleVectorVis.kDrawClassification)
+    omr.MDrawRegistry.registerDrawOverrideCreator(PoleVectorVis.kDrawClassification,
+                                                  PoleVectorVis.kDrawRegistrantId,
+                                                  PoleVectorVisDrawOverride.creator)
+
+
+def uninitializePlugin(obj):
+    fnPlugin = om.MFnPlugin(obj)
+    omr.MDrawRegistry.deregisterDrawOverrideCreator(PoleVectorVis.kDrawClassification,
+                                                    PoleVectorVis.kDrawRegistrantId)
+    fnPlugin.deregisterNode(PoleVectorVis.kPluginNodeId)
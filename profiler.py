@@ -0,0 +1,83 @@
+import csv
+import time
+import maya.cmds as cmds
+
+CATEGORIES = ("constraints", "sdkCurves", "jiggle")
+COLUMNS = ("group", "unit", "category", "nodes", "totalMs", "msPerFrame")
+
+
+def playbackRange():
+    return (cmds.playbackOptions(query=True, minTime=True), cmds.playbackOptions(query=True, maxTime=True))
+
+
+def profileGroups(groups, startFrame=None, endFrame=None, step=1.0):
+    """
+    time the nodes of every muscle unit over a frame range
+
+    every frame the input joints of all groups are evaluated first and not timed, then each unit
+    pulls its constraints, SDK curves and jiggle nodes in that order with dgeval. the numbers are
+    DG pull times, good for comparing groups with each other rather than against the frame rate
+    :param groups: list of BipedMuscles
+    :return: list of row dicts with the COLUMNS keys, one per unit and category
+    """
+    if startFrame is None or endFrame is None:
+        startFrame, endFrame = playbackRange()
+    frames = []
+    frame = startFrame
+    while frame <= endFrame:
+        frames.append(frame)
+        frame += step
+    if not frames:
+        raise RuntimeError("Empty frame range {0} - {1}".format(startFrame, endFrame))
+
+    units = [(group, muscleUnit, muscleUnit.evaluationNodes())
+             for group in groups for muscleUnit in group.muscleUnitGroup]
+    inputJoints = sorted(set(joint for group in groups for joint in group.attachJoints() if cmds.objExists(joint)))
+    timings = dict(((group.muscleName, muscleUnit.muscleName, category), 0.0)
+                   for group, muscleUnit, _ in units for category in CATEGORIES)
+
+    currentFrame = cmds.currentTime(query=True)
+    try:
+        for frame in frames:
+            cmds.currentTime(frame, update=False)
+            if inputJoints:
+                cmds.dgeval(inputJoints)
+            for group, muscleUnit, nodes in units:
+                for category in CATEGORIES:
+                    if not nodes[category]:
+                        continue
+                    start = time.time()
+                    cmds.dgeval(nodes[category])
+                    timings[(group.muscleName, muscleUnit.muscleName, category)] += time.time() - start
+    finally:
+        cmds.currentTime(currentFrame, update=True)
+
+    rows = []
+    for group, muscleUnit, nodes in units:
+        for category in CATEGORIES:
+            seconds = timings[(group.muscleName, muscleUnit.muscleName, category)]
+            rows.append({"group": group.muscleName, "unit": muscleUnit.muscleName, "category": category,
+                         "nodes": len(nodes[category]), "totalMs": seconds * 1000.0,
+                         "msPerFrame": seconds * 1000.0 / len(frames)})
+    return rows
+
+
+def groupTotals(rows):
+    """
+    :return: one row per group with unit and category set to "total", most expensive first
+    """
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row["group"], {"group": row["group"], "unit": "total", "category": "total",
+                                                 "nodes": 0, "totalMs": 0.0, "msPerFrame": 0.0})
+        for key in ["nodes", "totalMs", "msPerFrame"]:
+            total[key] += row[key]
+    return sorted(totals.values(), key=lambda row: row["totalMs"], reverse=True)
+
+
+def writeCsv(filePath, rows):
+    with open(filePath, "w", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
@@ -0,0 +1,70 @@
+"""
+in-memory stand-in for maya.cmds and maya.api.OpenMaya (plus the old maya.OpenMaya), so the tools run headless in tests and benchmarks
+
+install it before any JBDMuscle module is imported:
+
+    from JBDMuscle import testing
+    scene = testing.install()
+    from JBDMuscle import muscle_group
+"""
+import sys
+import types
+
+from . import cmds
+from . import openmaya
+from . import openmaya1
+from . import scene as _scene
+
+_MODULES = ("maya", "maya.cmds", "maya.api", "maya.api.OpenMaya", "maya.OpenMaya", "maya.OpenMayaMPx")
+_saved = {}
+
+
+def install(scene=None):
+    """
+    register the stand-in as maya and return a fresh active scene
+    """
+    if not _saved:
+        for name in _MODULES:
+            _saved[name] = sys.modules.get(name)
+    maya = types.ModuleType("maya")
+    api = types.ModuleType("maya.api")
+    maya.cmds = cmds
+    maya.api = api
+    maya.OpenMaya = openmaya1
+    maya.OpenMayaMPx = openmaya1.OpenMayaMPx
+    api.OpenMaya = openmaya
+    sys.modules.update({"maya": maya, "maya.cmds": cmds, "maya.api": api, "maya.api.OpenMaya": openmaya,
+                        "maya.OpenMaya": openmaya1, "maya.OpenMayaMPx": openmaya1.OpenMayaMPx})
+    return reset(scene)
+
+
+def uninstall():
+    for name, module in _saved.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+    _saved.clear()
+
+
+def reset(scene=None):
+    """
+    start a new empty scene and make it the active one
+    """
+    return cmds.setScene(scene or _scene.Scene())
+
+
+def currentScene():
+    return cmds.currentScene()
+
+
+def stats(scene=None):
+    """
+    :return: dict of commands run, command counts by name and nodes created, deleted and alive
+    """
+    scene = scene or currentScene()
+    return {"commands": sum(scene.commandCounts.values()),
+            "commandCounts": dict(scene.commandCounts),
+            "nodesCreated": scene.nodesCreated,
+            "nodesDeleted": scene.nodesDeleted,
+            "nodes": len(scene.nodes)}
@@ -0,0 +1,666 @@
+"""
+stand-in for maya.cmds working on testing.scene.Scene
+
+every command is counted on the active scene, commands the project never uses
+resolve to a counted no-op so code paths can still run
+"""
+import functools
+import os
+import tempfile
+
+from . import scene as sc
+
+_state = {"scene": None}
+
+
+def currentScene():
+    if _state["scene"] is None:
+        _state["scene"] = sc.Scene()
+    return _state["scene"]
+
+
+def setScene(scene):
+    _state["scene"] = scene
+    return scene
+
+
+def command(fn):
+    name = fn.__name__.rstrip("_")
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        currentScene().commandCounts[name] += 1
+        return fn(*args, **kwargs)
+    wrapper.__name__ = name
+    return wrapper
+
+
+def _flag(kwargs, *names, **default):
+    for name in names:
+        if name in kwargs:
+            return kwargs[name]
+    return default.get("default")
+
+
+def _flatten(args):
+    result = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            result.extend(_flatten(arg))
+        elif arg is not None:
+            result.append(arg)
+    return result
+
+
+def _split(plug):
+    node, _, attr = plug.partition(".")
+    return node.split("|")[-1], attr
+
+
+def _objects(args):
+    objects = _flatten(args)
+    if not objects:
+        objects = list(currentScene().selection)
+    return objects
+
+
+# scene queries
+
+@command
+def objExists(name):
+    scene = currentScene()
+    node, attr = _split(str(name))
+    if not scene.exists(node):
+        return False
+    if attr:
+        return _hasAttr(scene.node(node), attr)
+    return True
+
+
+def _hasAttr(node, attr):
+    attr = sc.longAttr(attr.split("[")[0])
+    return attr in node.attrs or attr in sc.VECTOR_ATTRS or attr in node.dynamic or attr in (
+        "worldMatrix", "worldInverseMatrix", "parentInverseMatrix", "parentMatrix", "matrix")
+
+
+@command
+def ls(*args, **kwargs):
+    scene = currentScene()
+    if _flag(kwargs, "sl", "selection"):
+        names = list(scene.selection)
+    elif args:
+        names = []
+        for pattern in _flatten(args):
+            pattern = str(pattern).split(".")[0]
+            if "*" in pattern:
+                import fnmatch
+                names.extend(n for n in scene.order if fnmatch.fnmatchcase(n, pattern))
+            elif scene.exists(pattern):
+                names.append(scene.node(pattern).name)
+    else:
+        names = list(scene.order)
+    types = _flag(kwargs, "type", "typ")
+    if types:
+        if isinstance(types, str):
+            types = [types]
+        names = [n for n in names if scene.nodes[n].type in types]
+    if _flag(kwargs, "long", "l"):
+        names = ["|" + n for n in names]
+    return names
+
+
+@command
+def nodeType(name):
+    return currentScene().node(name).type
+
+
+@command
+def listRelatives(*args, **kwargs):
+    scene = currentScene()
+    result = []
+    for name in _flatten(args):
+        node = scene.node(name)
+        if _flag(kwargs, "p", "parent"):
+            if node.parent is not None:
+                result.append(node.parent.name)
+            continue
+        if _flag(kwargs, "ad", "allDescendents"):
+            nodes = list(reversed(scene.descendants(node)))
+        else:
+            nodes = list(node.children)
+        if _flag(kwargs, "s", "shapes"):
+            nodes = [n for n in nodes if n.data.get("shape")]
+        types = _flag(kwargs, "type", "typ")
+        if types:
+            if isinstance(types, str):
+                types = [types]
+            nodes = [n for n in nodes if n.type in types]
+        result.extend(n.name for n in nodes)
+    return result or None
+
+
+@command
+def listConnections(*args, **kwargs):
+    scene = currentScene()
+    sources = _flag(kwargs, "s", "source", default=True)
+    destinations = _flag(kwargs, "d", "destination", default=True)
+    plugs = _flag(kwargs, "p", "plugs")
+    types = _flag(kwargs, "type", "t")
+    if isinstance(types, str):
+        types = [types]
+    result = []
+    for name in _flatten(args):
+        nodeName, attr = _split(str(name))
+        for dest, src in scene.nodeConnections(nodeName):
+            dNode, dAttr = _split(dest)
+            sNode, sAttr = _split(src)
+            if sources and dNode == nodeName and (not attr or sc.longAttr(dAttr) == sc.longAttr(attr)):
+                result.append(src if plugs else sNode)
+            if destinations and sNode == nodeName and (not attr or sc.longAttr(sAttr) == sc.longAttr(attr)):
+                result.append(dest if plugs else dNode)
+    if types:
+        result = [r for r in result if scene.nodes[_split(r)[0]].type in types]
+    return result or None
+
+
+@command
+def select(*args, **kwargs):
+    scene = currentScene()
+    if _flag(kwargs, "cl", "clear"):
+        scene.selection = []
+        return
+    names = [scene.node(n).name for n in _flatten(args)]
+    if _flag(kwargs, "add"):
+        scene.selection.extend(names)
+    else:
+        scene.selection = names
+
+
+# node creation
+
+@command
+def createNode(nodeType, name=None, parent=None, n=None, p=None, **kwargs):
+    node = currentScene().createNode(nodeType, name or n, parent=parent or p)
+    if (parent or p) and nodeType not in sc.TRANSFORM_TYPES:
+        node.data["shape"] = True
+    return node.name
+
+
+@command
+def joint(*args, **kwargs):
+    scene = currentScene()
+    parent = scene.nodes.get(scene.selection[-1]) if scene.selection else None
+    node = scene.createNode("joint", _flag(kwargs, "n", "name") or "joint1")
+    if parent is not None and parent.type == "joint":
+        scene.reparent(node, parent, keepWorld=False)
+    position = _flag(kwargs, "p", "position")
+    if position is not None:
+        scene.setWorldPosition(node, list(position))
+    radius = _flag(kwargs, "rad", "radius")
+    if radius is not None:
+        node.attrs["radius"] = radius
+    scene.selection = [node.name]
+    return node.name
+
+
+@command
+def spaceLocator(*args, **kwargs):
+    scene = currentScene()
+    node = scene.createNode("transform", _flag(kwargs, "n", "name") or "locator1")
+    shape = scene.createNode("locator", node.name + "Shape", parent=node, dag=True)
+    shape.data["shape"] = True
+    for axis in "XYZ":
+        shape.attrs["localScale" + axis] = 1.0
+        shape.attrs["localPosition" + axis] = 0.0
+    position = _flag(kwargs, "p", "position")
+    if position is not None:
+        scene.setVector(node, "translate", list(position))
+    scene.selection = [node.name]
+    return [node.name]
+
+
+@command
+def group(*args, **kwargs):
+    scene = currentScene()
+    node = scene.createNode("transform", _flag(kwargs, "n", "name") or "group1")
+    parent = _flag(kwargs, "p", "parent")
+    if parent:
+        scene.reparent(node, scene.node(parent), keepWorld=False)
+    if not _flag(kwargs, "em", "empty"):
+        for child in _objects(args):
+            scene.reparent(scene.node(child), node)
+    return node.name
+
+
+@command
+def duplicate(*args, **kwargs):
+    scene = currentScene()
+    result = []
+    for name in _objects(args):
+        source = scene.node(name)
+        copy = scene.createNode(source.type, _flag(kwargs, "n", "name") or source.name)
+        copy.attrs.update(source.attrs)
+        copy.dynamic = set(source.dynamic)
+        if source.parent is not None:
+            scene.reparent(copy, source.parent, keepWorld=False)
+        for child in source.children:
+            if child.data.get("shape"):
+                shape = scene.createNode(child.type, copy.name + "Shape", parent=copy, dag=True)
+                shape.data["shape"] = True
+                shape.attrs.update(child.attrs)
+        result.append(copy.name)
+    return result
+
+
+@command
+def rename(*args):
+    scene = currentScene()
+    if len(args) == 1:
+        return scene.rename(scene.selection[0], args[0])
+    return scene.rename(args[0], args[1])
+
+
+@command
+def delete(*args, **kwargs):
+    scene = currentScene()
+    for name in _objects(args):
+        if scene.exists(name):
+            scene.delete(name)
+
+
+@command
+def parent(*args, **kwargs):
+    scene = currentScene()
+    objects = _flatten(args)
+    if _flag(kwargs, "w", "world"):
+        children, newParent = objects, None
+    else:
+        if len(objects) < 2:
+            objects = list(scene.selection) + objects
+        children, newParent = objects[:-1], scene.node(objects[-1])
+    for child in children:
+        node = scene.node(child)
+        if node.parent is newParent:
+            raise RuntimeError("Object {0} is already a child of the given parent.".format(child))
+        scene.reparent(node, newParent, keepWorld=not _flag(kwargs, "r", "relative"))
+    return [scene.node(c).name for c in children]
+
+
+# attributes
+
+@command
+def setAttr(plug, *values, **kwargs):
+    scene = currentScene()
+    nodeName, attr = _split(plug)
+    node = scene.node(nodeName)
+    attr = sc.longAttr(attr)
+    if attr in sc.VECTOR_ATTRS and len(values) == 3:
+        scene.setVector(node, attr, [float(v) for v in values])
+    elif len(values) == 1:
+        node.attrs[attr] = values[0]
+    else:
+        node.attrs[attr] = list(values)
+    if not scene.evaluating:
+        scene.dirty = True
+
+
+@command
+def getAttr(plug, **kwargs):
+    scene = currentScene()
+    nodeName, attr = _split(plug)
+    node = scene.node(nodeName)
+    base = sc.longAttr(attr.split("[")[0])
+    if _flag(kwargs, "mi", "multiIndices"):
+        prefix = "{0}.{1}[".format(node.name, attr)
+        plugs = [dest for dest, src in scene.nodeConnections(node.name)] + ["{0}.{1}".format(node.name, key) for key in node.attrs]
+        indices = sorted(set(int(p[len(prefix):].split("]")[0]) for p in plugs if p.startswith(prefix)))
+        return indices or None
+    if base in ("worldMatrix", "worldInverseMatrix", "parentMatrix", "parentInverseMatrix", "matrix"):
+        if base == "matrix":
+            m = scene.localMatrix(node)
+        elif base.startswith("parent"):
+            scene.evaluate()
+            m = scene.parentMatrix(node)
+        else:
+            m = scene.worldMatrix(node)
+        if "Inverse" in base:
+            m = sc.inverse(m)
+        return [v for row in m for v in row]
+    scene.evaluate()
+    if "{0}.{1}".format(node.name, attr) in scene.connections or node.type not in sc.TRANSFORM_TYPES:
+        value = sc.plugValue(scene, node.name, attr)
+        if value is not None:
+            return [tuple(value)] if isinstance(value, list) and len(value) in (3, 4) else value
+    if base in sc.VECTOR_ATTRS:
+        return [tuple(float(node.attrs.get(c, 0.0)) for c in sc.VECTOR_ATTRS[base])]
+    if attr not in node.attrs and base not in node.attrs:
+        if base.endswith("W0") or base.endswith("W1") or "W" in base:
+            return 1.0
+        raise ValueError("No object matches name: {0}".format(plug))
+    return node.attrs.get(attr, node.attrs.get(base))
+
+
+@command
+def addAttr(*args, **kwargs):
+    scene = currentScene()
+    node = scene.node(_objects(args)[0])
+    name = _flag(kwargs, "ln", "longName")
+    node.dynamic.add(name)
+    dataType = _flag(kwargs, "dt", "dataType")
+    attrType = _flag(kwargs, "at", "attributeType")
+    if dataType == "string":
+        node.attrs[name] = ""
+    elif attrType == "message":
+        node.attrs[name] = None
+    else:
+        node.attrs[name] = _flag(kwargs, "dv", "defaultValue", default=0.0)
+
+
+@command
+def attributeQuery(attr, node=None, exists=False, **kwargs):
+    scene = currentScene()
+    target = scene.node(node)
+    return _hasAttr(target, attr)
+
+
+@command
+def connectAttr(src, dest, **kwargs):
+    currentScene().connect(src, dest)
+
+
+@command
+def disconnectAttr(src, dest, **kwargs):
+    currentScene().disconnect(src, dest)
+
+
+# transforms
+
+@command
+def xform(*args, **kwargs):
+    scene = currentScene()
+    objects = _objects(args)
+    node = scene.node(objects[0])
+    ws = _flag(kwargs, "ws", "worldSpace")
+    if _flag(kwargs, "q", "query"):
+        if _flag(kwargs, "m", "matrix"):
+            m = scene.worldMatrix(node) if ws else scene.localMatrix(node)
+            return [v for row in m for v in row]
+        if _flag(kwargs, "ro", "rotation"):
+            if ws:
+                return sc.matrixEuler(scene.worldMatrix(node))
+            return scene.vector(node, "rotate")
+        if ws:
+            return scene.worldMatrix(node)[3][:3]
+        scene.evaluate()
+        return scene.vector(node, "translate")
+    translate = _flag(kwargs, "t", "translation")
+    matrix = _flag(kwargs, "m", "matrix")
+    rotation = _flag(kwargs, "ro", "rotation")
+    for name in objects:
+        node = scene.node(name)
+        if translate is not None:
+            translate = [float(v) for v in translate]
+            if _flag(kwargs, "r", "relative"):
+                translate = [a + b for a, b in zip(scene.vector(node, "translate"), translate)]
+                scene.setVector(node, "translate", translate)
+            elif ws:
+                scene.evaluate()
+                scene.setWorldPosition(node, translate)
+            else:
+                scene.setVector(node, "translate", translate)
+        if matrix is not None:
+            m = [list(matrix[i * 4:i * 4 + 4]) for i in range(4)]
+            if ws:
+                scene.setWorldMatrix(node, m)
+            else:
+                scene.setVector(node, "translate", m[3][:3])
+                scene.setVector(node, "rotate", sc.matrixEuler(m))
+        if rotation is not None:
+            scene.setVector(node, "rotate", [float(v) for v in rotation])
+    scene.dirty = True
+
+
+@command
+def matchTransform(*args, **kwargs):
+    scene = currentScene()
+    objects = _flatten(args)
+    target = scene.worldMatrix(scene.node(objects[-1]))
+    for name in objects[:-1]:
+        node = scene.node(name)
+        scene.setWorldMatrix(node, sc.mult(sc.rotationPart(target), sc.translation(target[3][:3])))
+    scene.dirty = True
+
+
+@command
+def makeIdentity(*args, **kwargs):
+    scene = currentScene()
+    for name in _objects(args):
+        node = scene.node(name)
+        if node.type == "joint" and _flag(kwargs, "r", "rotate", default=True):
+            rot = sc.mult(sc.eulerMatrix(scene.vector(node, "rotate")),
+                          sc.eulerMatrix(scene.vector(node, "jointOrient")))
+            scene.setVector(node, "jointOrient", sc.matrixEuler(rot))
+            scene.setVector(node, "rotate", [0.0, 0.0, 0.0])
+        if _flag(kwargs, "s", "scale", default=True):
+            scene.setVector(node, "scale", [1.0, 1.0, 1.0])
+
+
+# constraints
+
+def _constraint(kind, args, kwargs):
+    scene = currentScene()
+    objects = _objects(args)
+    targets, driven = [scene.node(o).name for o in objects[:-1]], scene.node(objects[-1])
+    existing = [c for c in driven.children if c.type == kind]
+    if existing:
+        node = existing[0]
+        for target in targets:
+            if target not in node.data["targets"]:
+                node.data["targets"].append(target)
+    else:
+        node = scene.createNode(kind, _flag(kwargs, "n", "name") or "{0}_{1}1".format(driven.name, kind),
+                                parent=driven)
+        node.data.update({"driven": driven.name, "targets": list(targets)})
+        scene.addConstraint(node)
+    weight = _flag(kwargs, "w", "weight", default=1.0)
+    for i, target in enumerate(node.data["targets"]):
+        node.attrs.setdefault("{0}W{1}".format(target, i), float(weight))
+    node.attrs.setdefault("interpType", 1)
+    skip = _flag(kwargs, "sk", "skip", default=()) or ()
+    node.data.update({
+        "mo": bool(_flag(kwargs, "mo", "maintainOffset")),
+        "skip": tuple(skip) if not isinstance(skip, str) else (skip,),
+        "skipTranslate": tuple(_flag(kwargs, "st", "skipTranslate", default=()) or ()),
+        "skipRotate": tuple(_flag(kwargs, "sr", "skipRotate", default=()) or ()),
+        "aimVector": list(_flag(kwargs, "aim", "aimVector", default=(1.0, 0.0, 0.0))),
+        "upVector": list(_flag(kwargs, "u", "upVector", default=(0.0, 1.0, 0.0))),
+        "worldUpType": _flag(kwargs, "wut", "worldUpType", default="vector"),
+        "worldUpVector": list(_flag(kwargs, "wu", "worldUpVector", default=(0.0, 1.0, 0.0))),
+        "worldUpObject": _flag(kwargs, "wuo", "worldUpObject"),
+    })
+    scene.watch(node)
+    channels = {"pointConstraint": ["translate"], "orientConstraint": ["rotate"],
+                "aimConstraint": ["rotate"], "parentConstraint": ["translate", "rotate"]}[kind]
+    for attr in channels:
+        for channel in sc.VECTOR_ATTRS[attr]:
+            scene.connect("{0}.constraint{1}{2}".format(node.name, channel[0].upper(), channel[1:]),
+                          "{0}.{1}".format(driven.name, channel))
+    for i, target in enumerate(node.data["targets"]):
+        scene.connect("{0}.parentMatrix[0]".format(target), "{0}.target[{1}].targetParentMatrix".format(node.name, i))
+    scene.evaluate()
+    scene.solve(node, initial=True)
+    scene.dirty = True
+    return [node.name]
+
+
+@command
+def pointConstraint(*args, **kwargs):
+    return _constraint("pointConstraint", args, kwargs)
+
+
+@command
+def orientConstraint(*args, **kwargs):
+    return _constraint("orientConstraint", args, kwargs)
+
+
+@command
+def parentConstraint(*args, **kwargs):
+    return _constraint("parentConstraint", args, kwargs)
+
+
+@command
+def aimConstraint(*args, **kwargs):
+    return _constraint("aimConstraint", args, kwargs)
+
+
+# set driven keys
+
+@command
+def setDrivenKeyframe(*args, **kwargs):
+    scene = currentScene()
+    driver = _flag(kwargs, "cd", "currentDriver")
+    for plug in _flatten(args):
+        nodeName, attr = _split(plug)
+        attr = sc.longAttr(attr)
+        node = scene.node(nodeName)
+        dest = "{0}.{1}".format(node.name, attr)
+        src = scene.connections.get(dest)
+        curve = scene.nodes.get(_split(src)[0]) if src else None
+        if curve is None or curve.type not in sc.CURVE_TYPES:
+            kind = "animCurveUU" if attr.startswith("scale") else (
+                "animCurveUA" if attr.startswith("rotate") else "animCurveUL")
+            curve = scene.createNode(kind, "{0}_{1}".format(node.name, attr))
+            curve.data["keys"] = {}
+            curve.attrs.update({"preInfinity": 0, "postInfinity": 0})
+            scene.connect("{0}.output".format(curve.name), dest)
+        if driver:
+            scene.connect(driver, "{0}.input".format(curve.name))
+        driverPlug = scene.connections.get("{0}.input".format(curve.name))
+        driverValue = _flag(kwargs, "dv", "driverValue")
+        if driverValue is None:
+            driverValue = getAttr(driverPlug)
+        if isinstance(driverValue, (list, tuple)):
+            driverValue = driverValue[0]
+        value = _flag(kwargs, "v", "value")
+        if value is None:
+            value = node.attrs.get(attr, 0.0)
+        curve.data["keys"][round(float(driverValue), 9)] = float(value)
+        sc.Scene.changes += 1
+        sc.Scene.stale.add(curve)
+
+
+@command
+def keyframe(*args, **kwargs):
+    scene = currentScene()
+    curve = scene.node(_flatten(args)[0])
+    keys = sorted(curve.data.get("keys", {}).items())
+    if _flag(kwargs, "fc", "floatChange"):
+        return [k for k, _ in keys]
+    if _flag(kwargs, "vc", "valueChange"):
+        return [v for _, v in keys]
+    if _flag(kwargs, "kc", "keyframeCount"):
+        return len(keys)
+    return len(keys)
+
+
+@command
+def keyTangent(*args, **kwargs):
+    """
+    the stand-in curves are linear between keys and constant outside of them
+    """
+    if _flag(kwargs, "q", "query"):
+        return ["linear"] * len(currentScene().node(_flatten(args)[0]).data.get("keys", {}))
+
+
+# misc
+
+@command
+def undoInfo(*args, **kwargs):
+    scene = currentScene()
+    if _flag(kwargs, "ock", "openChunk"):
+        if not scene.undoDepth:
+            scene.undoName = _flag(kwargs, "cn", "chunkName", default="")
+        scene.undoDepth += 1
+    if _flag(kwargs, "cck", "closeChunk"):
+        scene.undoDepth -= 1
+    if _flag(kwargs, "q", "query"):
+        if _flag(kwargs, "un", "undoName"):
+            return scene.undoName
+        return True
+
+
+@command
+def currentTime(*args, **kwargs):
+    scene = currentScene()
+    if _flag(kwargs, "q", "query"):
+        return scene.currentTime
+    scene.currentTime = float(args[0])
+    return scene.currentTime
+
+
+@command
+def internalVar(**kwargs):
+    return tempfile.gettempdir() + os.sep
+
+
+_plugins = {"loaded": set(), "commands": {}}
+
+
+@command
+def loadPlugin(path, quiet=False, **kwargs):
+    """
+    python plugin files are executed and their commands registered, Maya plugins only get marked loaded
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith(".py") and os.path.exists(path):
+        import importlib.util
+        from . import openmaya
+        spec = importlib.util.spec_from_file_location("_plugin_" + name, path)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+        except ImportError:
+            # viewport plugins need maya.api.OpenMayaUI/Render, their nodes are created as plain nodes
+            module = None
+        if module is not None:
+            module.initializePlugin(openmaya.MObject(name))
+    _plugins["loaded"].add(name)
+    return [name]
+
+
+@command
+def pluginInfo(name, query=False, loaded=False, **kwargs):
+    return name in _plugins["loaded"]
+
+
+def registerCommand(name, creator):
+    _plugins["commands"][name] = creator
+
+
+def deregisterCommand(name):
+    _plugins["commands"].pop(name, None)
+
+
+def _pluginCommand(name, creator):
+    def fn(*args, **kwargs):
+        currentScene().commandCounts[name] += 1
+        instance = creator()
+        instance.doIt(args)
+        return instance
+    fn.__name__ = name
+    return fn
+
+
+def _noop(name):
+    def fn(*args, **kwargs):
+        currentScene().commandCounts[name] += 1
+    fn.__name__ = name
+    return fn
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    if name in _plugins["commands"]:
+        return _pluginCommand(name, _plugins["commands"][name])
+    return _noop(name)
@@ -0,0 +1,302 @@
+"""
+stand-in for the parts of maya.api.OpenMaya the project uses
+"""
+import math
+
+from . import scene as sc
+from .cmds import currentScene
+
+
+class MVector(object):
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        if len(args) == 0:
+            args = (0.0, 0.0, 0.0)
+        self.x, self.y, self.z = [float(v) for v in args[:3]]
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.z)[index]
+
+    def __len__(self):
+        return 3
+
+    def __add__(self, other):
+        return type(self)(self.x + other[0], self.y + other[1], self.z + other[2])
+
+    def __sub__(self, other):
+        return MVector(self.x - other[0], self.y - other[1], self.z - other[2])
+
+    def __neg__(self):
+        return type(self)(-self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        if isinstance(other, MVector):
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        if isinstance(other, MMatrix):
+            return type(self)(sc.transformVector(list(self), other.rows))
+        return type(self)(self.x * other, self.y * other, self.z * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        return type(self)(self.x / other, self.y / other, self.z / other)
+
+    def __xor__(self, other):
+        return MVector(sc.cross(list(self), list(other)))
+
+    def __eq__(self, other):
+        return all(abs(a - b) < 1e-9 for a, b in zip(self, other))
+
+    def __repr__(self):
+        return "{0}({1}, {2}, {3})".format(type(self).__name__, self.x, self.y, self.z)
+
+    def length(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def normal(self):
+        return MVector(sc.normalize(list(self)))
+
+    def normalize(self):
+        self.x, self.y, self.z = sc.normalize(list(self))
+        return self
+
+
+class MPoint(MVector):
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        super(MPoint, self).__init__(*args[:3])
+        self.w = 1.0
+
+    def __mul__(self, other):
+        if isinstance(other, MMatrix):
+            return MPoint(sc.transformPoint(list(self), other.rows))
+        return MPoint(self.x * other, self.y * other, self.z * other)
+
+
+class MMatrix(object):
+
+    def __init__(self, values=None):
+        if values is None:
+            self.rows = sc.identity()
+        elif isinstance(values, MMatrix):
+            self.rows = [list(r) for r in values.rows]
+        else:
+            values = list(values)
+            if values and isinstance(values[0], (list, tuple)):
+                values = [v for row in values for v in row]
+            self.rows = [[float(v) for v in values[i * 4:i * 4 + 4]] for i in range(4)]
+
+    def __mul__(self, other):
+        return MMatrix(sc.mult(self.rows, other.rows))
+
+    def __iter__(self):
+        return iter([v for row in self.rows for v in row])
+
+    def __getitem__(self, index):
+        return self.rows[index // 4][index % 4]
+
+    def getElement(self, row, column):
+        return self.rows[row][column]
+
+    def setElement(self, row, column, value):
+        self.rows[row][column] = value
+
+    def inverse(self):
+        return MMatrix(sc.inverse(self.rows))
+
+    def transpose(self):
+        return MMatrix([[self.rows[j][i] for j in range(4)] for i in range(4)])
+
+
+class MEulerRotation(object):
+    kXYZ = 0
+
+    def __init__(self, *args):
+        if len(args) == 1:
+            args = tuple(args[0])
+        values = list(args) + [0.0] * (3 - len(args))
+        self.x, self.y, self.z = [float(v) for v in values[:3]]
+        self.order = args[3] if len(args) > 3 else 0
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def asMatrix(self):
+        return MMatrix(sc.eulerMatrix([math.degrees(v) for v in (self.x, self.y, self.z)]))
+
+
+class MSpace(object):
+    kTransform = 1
+    kPreTransform = 2
+    kPostTransform = 3
+    kWorld = 4
+    kObject = 2
+
+
+class MTransformationMatrix(object):
+
+    def __init__(self, matrix=None):
+        self.matrix = MMatrix(matrix) if matrix is not None else MMatrix()
+
+    def translation(self, space=MSpace.kTransform):
+        return MVector(self.matrix.rows[3][:3])
+
+    def rotation(self, asQuaternion=False):
+        euler = sc.matrixEuler(self.matrix.rows)
+        return MEulerRotation(*[math.radians(v) for v in euler])
+
+    def asMatrix(self):
+        return MMatrix(self.matrix)
+
+
+class MGlobal(object):
+    messages = []
+
+    @classmethod
+    def displayInfo(cls, message):
+        cls.messages.append(("info", message))
+
+    @classmethod
+    def displayWarning(cls, message):
+        cls.messages.append(("warning", message))
+
+    @classmethod
+    def displayError(cls, message):
+        cls.messages.append(("error", message))
+
+
+class MObject(object):
+    kNullObj = None
+
+    def __init__(self, name=None):
+        self.name = name
+
+    def isNull(self):
+        return self.name is None
+
+
+class MSelectionList(object):
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        scene = currentScene()
+        self.items.append(scene.node(name).name)
+        return self
+
+    def length(self):
+        return len(self.items)
+
+    def getDependNode(self, index):
+        return MObject(self.items[index])
+
+
+class MPlug(object):
+
+    def __init__(self, node, attr):
+        self.nodeName = node
+        self.attr = attr
+
+
+class MFnDependencyNode(object):
+
+    def __init__(self, obj=None):
+        self.obj = obj
+
+    def name(self):
+        return self.obj.name
+
+    def findPlug(self, attr, wantNetworked=False):
+        return MPlug(self.obj, attr)
+
+
+class MFnDagNode(MFnDependencyNode):
+
+    def partialPathName(self):
+        return self.obj.name
+
+
+class MPxCommand(object):
+
+    def __init__(self):
+        pass
+
+
+class MFnPlugin(object):
+
+    def __init__(self, obj=None, *args):
+        self.obj = obj
+
+    def registerCommand(self, name, creator):
+        from . import cmds
+        cmds.registerCommand(name, creator)
+
+    def deregisterCommand(self, name):
+        from . import cmds
+        cmds.deregisterCommand(name)
+
+
+ANGLE_ATTRS = set("{0}{1}".format(attr, axis) for attr in ["rotate", "jointOrient", "rotateAxis"] for axis in "XYZ")
+
+
+class MDagModifier(object):
+    """
+    queues joint/transform creation and applies it on doIt, angles are given in radians
+    """
+
+    def __init__(self):
+        self.operations = []
+
+    def createNode(self, nodeType, parent=None):
+        obj = MObject()
+        self.operations.append(("create", obj, nodeType, parent))
+        return obj
+
+    def renameNode(self, obj, name):
+        self.operations.append(("rename", obj, name))
+
+    def newPlugValueDouble(self, plug, value):
+        self.operations.append(("set", plug, value))
+
+    def newPlugValueBool(self, plug, value):
+        self.operations.append(("set", plug, value))
+
+    def reparentNode(self, obj, parent=None):
+        self.operations.append(("parent", obj, parent))
+
+    def doIt(self):
+        scene = currentScene()
+        pending = {}
+        for operation in self.operations:
+            kind = operation[0]
+            if kind == "create":
+                _, obj, nodeType, parent = operation
+                parentNode = scene.node(parent.name) if parent is not None and parent.name else None
+                node = scene.createNode(nodeType, "{0}1".format(nodeType), parent=parentNode)
+                obj.name = node.name
+                pending[id(obj)] = obj
+            elif kind == "rename":
+                _, obj, name = operation
+                obj.name = scene.rename(obj.name, name)
+            elif kind == "set":
+                _, plug, value = operation
+                node = scene.node(plug.nodeName.name)
+                attr = sc.longAttr(plug.attr)
+                node.attrs[attr] = math.degrees(value) if attr in ANGLE_ATTRS else value
+            elif kind == "parent":
+                _, obj, parent = operation
+                scene.reparent(scene.node(obj.name), scene.node(parent.name) if parent else None, keepWorld=False)
+        currentScene().commandCounts["MDagModifier.doIt"] += 1
+        scene.dirty = True
+        self.operations = []
+
+    def undoIt(self):
+        pass
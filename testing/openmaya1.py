@@ -0,0 +1,68 @@
+"""
+stand-ins for the old maya.OpenMaya and maya.OpenMayaMPx modules, just enough for jiggle_joint
+to import and for its integrate() math to run on real points
+"""
+import types
+
+from .openmaya import MObject, MPoint, MVector
+
+kUnknownParameter = "kUnknownParameter"
+
+
+class MFloatVector(MVector):
+    pass
+
+
+class MTime(object):
+
+    def __init__(self, value=0.0):
+        self.time = float(value.value() if isinstance(value, MTime) else value)
+
+    def value(self):
+        return self.time
+
+
+class MTypeId(object):
+
+    def __init__(self, value):
+        self.id = value
+
+
+class MFnNumericData(object):
+    kFloat = "float"
+
+
+class MFnUnitAttribute(object):
+    kTime = "time"
+
+
+class MFnNumericAttribute(object):
+    pass
+
+
+class MFnMatrixAttribute(object):
+    pass
+
+
+class MPxNode(object):
+
+    def __init__(self):
+        pass
+
+
+class MFnPlugin(object):
+
+    def __init__(self, obj=None, *args):
+        self.obj = obj
+
+    def registerNode(self, *args):
+        pass
+
+    def deregisterNode(self, *args):
+        pass
+
+
+OpenMayaMPx = types.ModuleType("maya.OpenMayaMPx")
+OpenMayaMPx.MPxNode = MPxNode
+OpenMayaMPx.MFnPlugin = MFnPlugin
+OpenMayaMPx.asMPxPtr = lambda node: node
@@ -0,0 +1,930 @@
+"""
+in-memory scene graph behind the maya stand-in modules
+
+only what the JBDMuscle tools rely on is emulated: DAG hierarchy, transform and joint
+attributes and world matrices, plain connections, set driven keys, utility nodes and
+point/orient/parent/aim constraints, solved lazily on query
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+VECTOR_ATTRS = {
+    "translate": ("translateX", "translateY", "translateZ"),
+    "rotate": ("rotateX", "rotateY", "rotateZ"),
+    "scale": ("scaleX", "scaleY", "scaleZ"),
+    "jointOrient": ("jointOrientX", "jointOrientY", "jointOrientZ"),
+    "rotateAxis": ("rotateAxisX", "rotateAxisY", "rotateAxisZ"),
+    "localScale": ("localScaleX", "localScaleY", "localScaleZ"),
+    "color": ("colorR", "colorG", "colorB"),
+}
+
+SHORT_NAMES = {
+    "t": "translate", "tx": "translateX", "ty": "translateY", "tz": "translateZ",
+    "r": "rotate", "rx": "rotateX", "ry": "rotateY", "rz": "rotateZ",
+    "s": "scale", "sx": "scaleX", "sy": "scaleY", "sz": "scaleZ",
+    "jo": "jointOrient", "jox": "jointOrientX", "joy": "jointOrientY", "joz": "jointOrientZ",
+    "ra": "rotateAxis", "v": "visibility", "ro": "rotateOrder", "ssc": "segmentScaleCompensate",
+}
+
+TRANSFORM_TYPES = ("transform", "joint")
+CONSTRAINT_TYPES = ("pointConstraint", "orientConstraint", "parentConstraint", "aimConstraint")
+CURVE_TYPES = ("animCurveUU", "animCurveUL", "animCurveUA")
+
+
+def longAttr(attr):
+    return SHORT_NAMES.get(attr, attr)
+
+
+# matrix helpers, row-vector convention like Maya
+
+def identity():
+    return [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+
+def mult(a, b):
+    b0, b1, b2, b3 = b
+    return [[r[0] * b0[j] + r[1] * b1[j] + r[2] * b2[j] + r[3] * b3[j] for j in range(4)] for r in a]
+
+
+def inverse(m):
+    # affine inverse (rotation/scale part inverted with a general 3x3 inverse)
+    a = [row[:3] for row in m[:3]]
+    det = (a[0][0] * (a[1][1] * a[2][2] - a[1][2] * a[2][1])
+           - a[0][1] * (a[1][0] * a[2][2] - a[1][2] * a[2][0])
+           + a[0][2] * (a[1][0] * a[2][1] - a[1][1] * a[2][0]))
+    if abs(det) < 1e-12:
+        det = 1e-12
+    inv = [[(a[(j + 1) % 3][(i + 1) % 3] * a[(j + 2) % 3][(i + 2) % 3]
+             - a[(j + 1) % 3][(i + 2) % 3] * a[(j + 2) % 3][(i + 1) % 3]) / det for j in range(3)]
+           for i in range(3)]
+    t = m[3][:3]
+    it = [-sum(t[k] * inv[k][j] for k in range(3)) for j in range(3)]
+    return [inv[0] + [0.0], inv[1] + [0.0], inv[2] + [0.0], it + [1.0]]
+
+
+def translation(t):
+    m = identity()
+    m[3][0], m[3][1], m[3][2] = t
+    return m
+
+
+def scaling(s):
+    m = identity()
+    m[0][0], m[1][1], m[2][2] = s
+    return m
+
+
+def eulerMatrix(r):
+    x, y, z = [math.radians(v) for v in r]
+    cx, sx, cy, sy, cz, sz = math.cos(x), math.sin(x), math.cos(y), math.sin(y), math.cos(z), math.sin(z)
+    return [[cy * cz, cy * sz, -sy, 0.0],
+            [sx * sy * cz - cx * sz, sx * sy * sz + cx * cz, sx * cy, 0.0],
+            [cx * sy * cz + sx * sz, cx * sy * sz - sx * cz, cx * cy, 0.0],
+            [0.0, 0.0, 0.0, 1.0]]
+
+
+def matrixEuler(m):
+    r = rotationPart(m)
+    sy = max(-1.0, min(1.0, -r[0][2]))
+    y = math.asin(sy)
+    if abs(math.cos(y)) > 1e-9:
+        x = math.atan2(r[1][2], r[2][2])
+        z = math.atan2(r[0][1], r[0][0])
+    else:
+        z = 0.0
+        x = math.atan2(-r[2][1], r[1][1])
+    return [math.degrees(x), math.degrees(y), math.degrees(z)]
+
+
+ROTATE_ORDERS = ("xyz", "yzx", "zxy", "xzy", "yxz", "zyx")
+
+
+def matrixEulerOrder(m, rotateOrder=0):
+    """
+    euler angles for one of Maya's rotate orders (index into ROTATE_ORDERS)
+    """
+    if not rotateOrder:
+        return matrixEuler(m)
+    axes = ["xyz".index(a) for a in ROTATE_ORDERS[rotateOrder]]
+    r = rotationPart(m)
+    permuted = [[r[axes[p]][axes[q]] for q in range(3)] for p in range(3)]
+    permuted.append([0.0, 0.0, 0.0])
+    for row in permuted:
+        row.append(0.0)
+    permuted[3][3] = 1.0
+    angles = matrixEuler(permuted)
+    sign = 1.0 if rotateOrder in (1, 2) else -1.0
+    result = [0.0, 0.0, 0.0]
+    for axis, angle in zip(axes, angles):
+        result[axis] = sign * angle
+    return result
+
+
+def normalize(v):
+    length = math.sqrt(sum(c * c for c in v))
+    if length < 1e-12:
+        return [0.0, 0.0, 0.0]
+    return [c / length for c in v]
+
+
+def cross(a, b):
+    return [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]
+
+
+def dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def rotationPart(m):
+    rows = [normalize(m[i][:3]) for i in range(3)]
+    return [rows[0] + [0.0], rows[1] + [0.0], rows[2] + [0.0], [0.0, 0.0, 0.0, 1.0]]
+
+
+def transformPoint(p, m):
+    return [sum(p[k] * m[k][j] for k in range(3)) + m[3][j] for j in range(3)]
+
+
+def transformVector(v, m):
+    return [sum(v[k] * m[k][j] for k in range(3)) for j in range(3)]
+
+
+def matrixQuat(m):
+    r = rotationPart(m)
+    trace = r[0][0] + r[1][1] + r[2][2]
+    if trace > 0:
+        s = math.sqrt(trace + 1.0) * 2
+        q = [(r[1][2] - r[2][1]) / s, (r[2][0] - r[0][2]) / s, (r[0][1] - r[1][0]) / s, 0.25 * s]
+    elif r[0][0] > r[1][1] and r[0][0] > r[2][2]:
+        s = math.sqrt(1.0 + r[0][0] - r[1][1] - r[2][2]) * 2
+        q = [0.25 * s, (r[1][0] + r[0][1]) / s, (r[2][0] + r[0][2]) / s, (r[1][2] - r[2][1]) / s]
+    elif r[1][1] > r[2][2]:
+        s = math.sqrt(1.0 + r[1][1] - r[0][0] - r[2][2]) * 2
+        q = [(r[1][0] + r[0][1]) / s, 0.25 * s, (r[2][1] + r[1][2]) / s, (r[2][0] - r[0][2]) / s]
+    else:
+        s = math.sqrt(1.0 + r[2][2] - r[0][0] - r[1][1]) * 2
+        q = [(r[2][0] + r[0][2]) / s, (r[2][1] + r[1][2]) / s, 0.25 * s, (r[0][1] - r[1][0]) / s]
+    return q
+
+
+def quatMatrix(q):
+    x, y, z, w = q
+    return [[1 - 2 * (y * y + z * z), 2 * (x * y + z * w), 2 * (x * z - y * w), 0.0],
+            [2 * (x * y - z * w), 1 - 2 * (x * x + z * z), 2 * (y * z + x * w), 0.0],
+            [2 * (x * z + y * w), 2 * (y * z - x * w), 1 - 2 * (x * x + y * y), 0.0],
+            [0.0, 0.0, 0.0, 1.0]]
+
+
+def blendQuats(quats, weights):
+    total = [0.0, 0.0, 0.0, 0.0]
+    for q, w in zip(quats, weights):
+        if dot(q, quats[0]) < 0:
+            q = [-c for c in q]
+        total = [t + c * w for t, c in zip(total, q)]
+    length = math.sqrt(sum(c * c for c in total)) or 1.0
+    return [c / length for c in total]
+
+
+# nodes
+
+class Attrs(dict):
+    """
+    attribute values; every write bumps the owner's version for matrix caching
+    and marks the owner as touched for the next constraint solve and propagate pass
+    """
+
+    def __init__(self, owner, values=()):
+        super(Attrs, self).__init__(values)
+        self.owner = owner
+
+    def __setitem__(self, key, value):
+        if key in self:
+            old = dict.__getitem__(self, key)
+            if old is value or (isinstance(value, float) and isinstance(old, float) and abs(old - value) < 1e-10):
+                return
+        self.owner.version += 1
+        Scene.changes += 1
+        Scene.touched.add(self.owner)
+        Scene.stale.add(self.owner)
+        super(Attrs, self).__setitem__(key, value)
+
+
+class Node(object):
+
+    def __init__(self, name, nodeType, parent=None):
+        self.name = name
+        self.type = nodeType
+        self.parent = parent
+        self.children = []
+        self.version = 0
+        self.localCache = None
+        self.worldCache = None
+        self.attrs = Attrs(self)
+        self.dynamic = set()
+        self.data = {}
+
+    @property
+    def isDag(self):
+        return self.type in TRANSFORM_TYPES or self.type in CONSTRAINT_TYPES or self.data.get("dag", False)
+
+    def __repr__(self):
+        return "<Node {0} ({1})>".format(self.name, self.type)
+
+
+class Scene(object):
+    """
+    flat name -> node store with lazily solved constraints
+    connections and constraints are indexed per node name so that queries and deletes
+    stay linear in the size of the edit, not of the scene
+    """
+
+    changes = 0
+    # nodes written or reparented since the last constraint solve / propagate pass
+    touched = set()
+    stale = set()
+
+    def __init__(self):
+        self.nodes = {}
+        # node names in creation order, a dict so deletes stay cheap
+        self.order = {}
+        self.connections = {}
+        # node name -> {dest plug: sequence} of every connection it takes part in
+        self.plugs = {}
+        self.sequence = 0
+        self.connectionVersion = 0
+        # dest plug -> push of a utility node output into a transform channel, see propagate()
+        self.pushes = {}
+        self.evaluatedState = None
+        # constraint node -> None, kept in creation order
+        self.constraints = {}
+        # node name -> constraints reading or driving it
+        self.watchers = {}
+        self.selection = []
+        self.dirty = False
+        self.evaluating = False
+        self.currentTime = 1.0
+        self.undoDepth = 0
+        self.undoName = ""
+        self.commandCounts = Counter()
+        self.nodesCreated = 0
+        self.nodesDeleted = 0
+        Scene.touched = set()
+        Scene.stale = set()
+        self.createNode("time", "time1")
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def uniqueName(self, name):
+        name = name.split("|")[-1]
+        if name not in self.nodes:
+            return name
+        base = re.sub(r"\d+$", "", name)
+        index = 1
+        while "{0}{1}".format(base, index) in self.nodes:
+            index += 1
+        return "{0}{1}".format(base, index)
+
+    def createNode(self, nodeType, name=None, parent=None, dag=None):
+        name = self.uniqueName(name or "{0}1".format(nodeType))
+        node = Node(name, nodeType)
+        if dag:
+            node.data["dag"] = True
+        self.nodes[name] = node
+        self.order[name] = None
+        self.nodesCreated += 1
+        if node.type in TRANSFORM_TYPES:
+            for attr in ("translate", "rotate", "scale", "rotateAxis"):
+                for i, channel in enumerate(VECTOR_ATTRS[attr]):
+                    node.attrs[channel] = 1.0 if attr == "scale" else 0.0
+            node.attrs["visibility"] = True
+            node.attrs["rotateOrder"] = 0
+            node.attrs["inheritsTransform"] = True
+        if node.type == "joint":
+            for channel in VECTOR_ATTRS["jointOrient"]:
+                node.attrs[channel] = 0.0
+            node.attrs["radius"] = 1.0
+            node.attrs["segmentScaleCompensate"] = True
+        if parent:
+            self.reparent(node, self.node(parent), keepWorld=False)
+        self.dirty = True
+        return node
+
+    def node(self, name):
+        if isinstance(name, Node):
+            return name
+        key = str(name).split(".")[0].split("|")[-1]
+        try:
+            return self.nodes[key]
+        except KeyError:
+            raise ValueError("No object matches name: {0}".format(name))
+
+    def exists(self, name):
+        key = str(name).split(".")[0].split("|")[-1]
+        return key in self.nodes
+
+    def rename(self, node, newName):
+        node = self.node(node)
+        newName = self.uniqueName(newName)
+        del self.nodes[node.name]
+        old = node.name
+        node.name = newName
+        self.nodes[newName] = node
+        self.order = dict((newName if name == old else name, None) for name in self.order)
+        renamed = {}
+        for dest, src in self.connections.items():
+            d = dest.replace(old + ".", newName + ".", 1) if dest.startswith(old + ".") else dest
+            s = src.replace(old + ".", newName + ".", 1) if src.startswith(old + ".") else src
+            renamed[d] = s
+        self.connections = {}
+        self.plugs = {}
+        self.pushes = {}
+        for dest, src in renamed.items():
+            self.connect(src, dest)
+        if old in self.watchers:
+            for constraint in list(self.watchers[old]):
+                data = constraint.data
+                data["targets"] = [newName if t == old else t for t in data["targets"]]
+                for key in ("driven", "worldUpObject"):
+                    if data.get(key) == old:
+                        data[key] = newName
+                self.watch(constraint)
+        return newName
+
+    def delete(self, name):
+        node = self.node(name)
+        for child in list(node.children):
+            if child.name in self.nodes:
+                self.delete(child)
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        upstream = set()
+        self.connectionVersion += 1
+        for dest, src in self.nodeConnections(node.name):
+            if dest.split(".")[0] == node.name:
+                upstream.add(src.split(".")[0])
+            self.disconnect(src, dest)
+        self.plugs.pop(node.name, None)
+        if node in self.constraints:
+            del self.constraints[node]
+            for name in node.data.get("watching", ()):
+                self.watchers[name].discard(node)
+        for constraint in self.watchers.get(node.name, ()):
+            constraint.data["targets"] = [t for t in constraint.data["targets"] if t != node.name]
+            Scene.touched.add(constraint)
+        del self.nodes[node.name]
+        del self.order[node.name]
+        self.nodesDeleted += 1
+        if node.name in self.selection:
+            self.selection.remove(node.name)
+        # animation curves only feeding the deleted node go with it
+        for other in upstream:
+            if other in self.nodes and self.nodes[other].type in CURVE_TYPES:
+                if not any(src.split(".")[0] == other for dest, src in self.nodeConnections(other)):
+                    self.delete(other)
+        self.dirty = True
+
+    # -- hierarchy ---------------------------------------------------------
+
+    def reparent(self, node, parent, keepWorld=True):
+        world = self.worldMatrix(node) if keepWorld else None
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        node.version += 1
+        Scene.changes += 1
+        Scene.touched.add(node)
+        Scene.stale.add(node)
+        if parent is not None:
+            parent.children.append(node)
+        if keepWorld and node.type in TRANSFORM_TYPES:
+            self.setWorldMatrix(node, world, rotateToOrient=node.type == "joint")
+        self.dirty = True
+
+    def descendants(self, node):
+        result = []
+        for child in node.children:
+            result.append(child)
+            result.extend(self.descendants(child))
+        return result
+
+    # -- attributes --------------------------------------------------------
+
+    def vector(self, node, attr):
+        return [float(node.attrs.get(c, 0.0)) for c in VECTOR_ATTRS[attr]]
+
+    def setVector(self, node, attr, values):
+        for channel, value in zip(VECTOR_ATTRS[attr], values):
+            node.attrs[channel] = float(value)
+
+    def localMatrix(self, node):
+        if node.type not in TRANSFORM_TYPES:
+            return identity()
+        if node.localCache is not None and node.localCache[0] == node.version:
+            return node.localCache[1]
+        m = scaling(self.vector(node, "scale"))
+        m = mult(m, eulerMatrix(self.vector(node, "rotateAxis")))
+        m = mult(m, eulerMatrix(self.vector(node, "rotate")))
+        if node.type == "joint":
+            m = mult(m, eulerMatrix(self.vector(node, "jointOrient")))
+        m = mult(m, translation(self.vector(node, "translate")))
+        node.localCache = (node.version, m)
+        return m
+
+    def worldMatrix(self, node, evaluate=True):
+        if evaluate:
+            self.evaluate()
+        key = []
+        current = node
+        while current is not None:
+            key.append((id(current), current.version))
+            current = current.parent
+        if node.worldCache is not None and node.worldCache[0] == key:
+            return node.worldCache[1]
+        m = self.localMatrix(node)
+        if node.parent is not None:
+            m = mult(m, self.worldMatrix(node.parent, evaluate=False))
+        node.worldCache = (key, m)
+        return m
+
+    def parentMatrix(self, node):
+        if node.parent is None:
+            return identity()
+        return self.worldMatrix(node.parent, evaluate=False)
+
+    def setWorldMatrix(self, node, world, rotateToOrient=False, translate=True, rotate=True):
+        local = mult(world, inverse(self.parentMatrix(node)))
+        if translate:
+            self.setVector(node, "translate", local[3][:3])
+        if rotate:
+            rot = rotationPart(local)
+            if node.type == "joint" and rotateToOrient:
+                rot = mult(inverse(eulerMatrix(self.vector(node, "rotate"))), rot)
+                self.setVector(node, "jointOrient", matrixEuler(rot))
+            else:
+                if node.type == "joint":
+                    rot = mult(rot, inverse(eulerMatrix(self.vector(node, "jointOrient"))))
+                self.setVector(node, "rotate", matrixEuler(rot))
+
+    def setWorldPosition(self, node, position, skip=()):
+        local = transformPoint(position, inverse(self.parentMatrix(node)))
+        for axis, value in zip("xyz", local):
+            if axis not in skip:
+                node.attrs["translate" + axis.upper()] = float(value)
+
+    # -- connections -------------------------------------------------------
+
+    def connect(self, src, dest):
+        old = self.connections.get(dest)
+        if old is None:
+            self.sequence += 1
+            sequence = self.sequence
+        else:
+            sequence = self.plugs[dest.split(".")[0]][dest]
+            self.plugs.get(old.split(".")[0], {}).pop(dest, None)
+        self.connections[dest] = src
+        for plug in (dest, src):
+            self.plugs.setdefault(plug.split(".")[0], {})[dest] = sequence
+        self.indexPush(src, dest)
+        self.markStale(dest)
+        self.connectionVersion += 1
+        self.dirty = True
+
+    def disconnect(self, src, dest):
+        if self.connections.get(dest) != src:
+            return
+        del self.connections[dest]
+        for plug in (dest, src):
+            self.plugs.get(plug.split(".")[0], {}).pop(dest, None)
+        self.pushes.pop(dest, None)
+        self.markStale(dest)
+        self.connectionVersion += 1
+        self.dirty = True
+
+    def indexPush(self, src, dest):
+        destNode, destAttr = dest.split(".", 1)
+        srcNode = self.nodes.get(src.split(".")[0])
+        target = self.nodes.get(destNode)
+        push = None
+        if target is not None and srcNode is not None and target.type in TRANSFORM_TYPES:
+            if srcNode.type not in CURVE_TYPES + CONSTRAINT_TYPES + TRANSFORM_TYPES:
+                push = (target, destAttr, src.split(".", 1))
+        if push is not None:
+            self.pushes[dest] = push
+        else:
+            self.pushes.pop(dest, None)
+
+    def markStale(self, plug):
+        node = self.nodes.get(plug.split(".")[0])
+        if node is not None:
+            Scene.stale.add(node)
+
+    def stalePushes(self):
+        """
+        pushes into or downstream of anything stale since the last call, in connection order
+        stale transforms move their subtree; the walk follows every connection forward
+        """
+        stale, Scene.stale = Scene.stale, set()
+        roots = [n for n in stale if self.nodes.get(n.name) is n]
+        seen = set()
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(node.children)
+        found = {}
+        stack = list(seen)
+        while stack:
+            node = stack.pop()
+            for dest, src in self.nodeConnections(node.name):
+                if dest in self.pushes:
+                    found[dest] = self.plugs[node.name][dest]
+                if src.split(".")[0] != node.name:
+                    continue
+                target = self.nodes.get(dest.split(".")[0])
+                if target is not None and target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return [self.pushes[dest] for dest in sorted(found, key=found.get)]
+
+    def nodeConnections(self, name):
+        """
+        (dest, src) pairs the node takes part in, in connection order
+        """
+        plugs = self.plugs.get(name, {})
+        return [(dest, self.connections[dest]) for dest in sorted(plugs, key=plugs.get)]
+
+    def sources(self, node):
+        return [src for dest, src in self.nodeConnections(node.name) if dest.split(".")[0] == node.name]
+
+    def destinations(self, node):
+        return [dest for dest, src in self.nodeConnections(node.name) if src.split(".")[0] == node.name]
+
+    # -- constraints -------------------------------------------------------
+
+    def addConstraint(self, node):
+        node.data["order"] = self.nodesCreated
+        self.constraints[node] = None
+        self.watch(node)
+
+    def watch(self, constraint):
+        """
+        register the constraint under every node name it reads or drives
+        """
+        data = constraint.data
+        for name in data.get("watching", ()):
+            self.watchers[name].discard(constraint)
+        data["watching"] = set(data["targets"] + [data["driven"], data.get("worldUpObject") or ""])
+        for name in data["watching"]:
+            self.watchers.setdefault(name, set()).add(constraint)
+        Scene.touched.add(constraint)
+
+    def pending(self):
+        """
+        constraints that may read something touched since the last call
+        a touched node moves its whole subtree, so watchers of every descendant are included
+        """
+        touched, Scene.touched = Scene.touched, set()
+        found = set()
+        seen = set()
+        stack = [n for n in touched if self.nodes.get(n.name) is n]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node in self.constraints:
+                found.add(node)
+            found.update(self.watchers.get(node.name, ()))
+            stack.extend(node.children)
+        return found
+
+    def evaluate(self):
+        if not self.dirty or self.evaluating:
+            return
+        # nothing was written or connected since the last solve, e.g. only nodes were created
+        if self.evaluatedState == (Scene.changes, self.connectionVersion):
+            self.dirty = False
+            return
+        self.evaluating = True
+        try:
+            for _ in range(3):
+                before = Scene.changes
+                propagate(self)
+                # constraints solve in creation order; one touched by an earlier solve waits for
+                # the next pass, exactly like walking the whole list each pass
+                queue = [(c.data["order"], c) for c in self.pending()]
+                heapq.heapify(queue)
+                queued = set(c for _, c in queue)
+                later = set()
+                while queue:
+                    order, constraint = heapq.heappop(queue)
+                    self.solve(constraint)
+                    for other in self.pending():
+                        if other.data["order"] > order:
+                            if other not in queued:
+                                queued.add(other)
+                                heapq.heappush(queue, (other.data["order"], other))
+                        else:
+                            later.add(other)
+                Scene.touched.update(later)
+                if Scene.changes == before:
+                    break
+        finally:
+            self.evaluating = False
+            self.dirty = False
+            self.evaluatedState = (Scene.changes, self.connectionVersion)
+
+    def weights(self, constraint):
+        return [float(constraint.attrs.get("{0}W{1}".format(t, i), 1.0))
+                for i, t in enumerate(constraint.data["targets"])]
+
+    def chainKey(self, node):
+        key = []
+        while node is not None:
+            key.append((id(node), node.version))
+            node = node.parent
+        return key
+
+    def solve(self, constraint, initial=False):
+        data = constraint.data
+        driven = self.nodes.get(data["driven"])
+        targets = [self.nodes[t] for t in data["targets"] if t in self.nodes]
+        if driven is None or not targets:
+            return
+        watched = targets + [driven, self.nodes.get(data.get("worldUpObject") or "")]
+        key = [self.chainKey(n) for n in watched] + [constraint.version]
+        if not initial and data.get("key") == key:
+            return
+        weights = self.weights(constraint)[:len(targets)]
+        if sum(weights) <= 0:
+            return
+        kind = constraint.type
+        drivenWorld = self.worldMatrix(driven, evaluate=False)
+        if kind == "pointConstraint":
+            pos = [0.0, 0.0, 0.0]
+            for target, w in zip(targets, weights):
+                p = self.worldMatrix(target, evaluate=False)[3][:3]
+                pos = [a + b * w / sum(weights) for a, b in zip(pos, p)]
+            if initial:
+                data["offset"] = ([a - b for a, b in zip(drivenWorld[3][:3], pos)]
+                                  if data["mo"] else [0.0, 0.0, 0.0])
+            pos = [a + b for a, b in zip(pos, data.get("offset", [0.0, 0.0, 0.0]))]
+            self.setWorldPosition(driven, pos, skip=data["skip"])
+        elif kind in ("orientConstraint", "aimConstraint"):
+            if kind == "aimConstraint":
+                rotation = self.aimRotation(constraint, driven, targets, weights)
+            else:
+                quats = [matrixQuat(self.worldMatrix(t, evaluate=False)) for t in targets]
+                rotation = quatMatrix(blendQuats(quats, weights))
+            if initial:
+                data["offset"] = (mult(rotationPart(drivenWorld), inverse(rotation))
+                                  if data["mo"] else identity())
+            rotation = mult(data.get("offset", identity()), rotation)
+            world = mult(rotation, translation(drivenWorld[3][:3]))
+            self.setWorldMatrix(driven, world, translate=False)
+        elif kind == "parentConstraint":
+            worlds = [self.worldMatrix(t, evaluate=False) for t in targets]
+            if initial:
+                data["offsets"] = [mult(drivenWorld, inverse(w)) if data["mo"] else identity() for w in worlds]
+            candidates = [mult(o, w) for o, w in zip(data.get("offsets", [identity()] * len(worlds)), worlds)]
+            total = sum(weights)
+            pos = [sum(c[3][j] * w for c, w in zip(candidates, weights)) / total for j in range(3)]
+            quat = blendQuats([matrixQuat(c) for c in candidates], weights)
+            world = mult(quatMatrix(quat), translation(pos))
+            if not data["skipTranslate"] or len(data["skipTranslate"]) < 3:
+                self.setWorldPosition(driven, pos, skip=data["skipTranslate"])
+            if len(data["skipRotate"]) < 3:
+                self.setWorldMatrix(driven, world, translate=False)
+        data["key"] = [self.chainKey(n) for n in watched] + [constraint.version]
+
+    def aimRotation(self, constraint, driven, targets, weights):
+        data = constraint.data
+        drivenPos = self.worldMatrix(driven, evaluate=False)[3][:3]
+        total = sum(weights)
+        targetPos = [sum(self.worldMatrix(t, evaluate=False)[3][j] * w for t, w in zip(targets, weights)) / total
+                     for j in range(3)]
+        aimWorld = normalize([a - b for a, b in zip(targetPos, drivenPos)])
+        upType = data.get("worldUpType", "vector")
+        upObject = self.nodes.get(data.get("worldUpObject") or "")
+        worldUpVector = data.get("worldUpVector", [0.0, 1.0, 0.0])
+        if upType == "scene" or upType == "none":
+            upWorld = [0.0, 1.0, 0.0]
+        elif upType == "object" and upObject is not None:
+            upWorld = normalize([a - b for a, b in zip(self.worldMatrix(upObject, evaluate=False)[3][:3], drivenPos)])
+        elif upType == "objectrotation" and upObject is not None:
+            upWorld = normalize(transformVector(worldUpVector, self.worldMatrix(upObject, evaluate=False)))
+        else:
+            upWorld = normalize(worldUpVector)
+        return frameRotation(data["aimVector"], data["upVector"], aimWorld, upWorld)
+
+
+def frameRotation(aimLocal, upLocal, aimWorld, upWorld):
+    def frame(aim, up):
+        a = normalize(aim)
+        c = normalize(cross(a, up))
+        if c == [0.0, 0.0, 0.0]:
+            c = normalize(cross(a, [0.0, 0.0, 1.0] if abs(a[2]) < 0.9 else [1.0, 0.0, 0.0]))
+        u = cross(c, a)
+        return [a + [0.0], u + [0.0], c + [0.0], [0.0, 0.0, 0.0, 1.0]]
+
+    local = frame(aimLocal, upLocal)
+    world = frame(aimWorld, upWorld)
+    transposed = [[local[j][i] for j in range(4)] for i in range(4)]
+    return mult(transposed, world)
+
+
+# utility node evaluation (pull based, used by getAttr on node outputs)
+
+COMPOUND_SUFFIXES = {"X": 0, "Y": 1, "Z": 2, "W": 3, "R": 0, "G": 1, "B": 2}
+MATRIX_ATTRS = ("worldMatrix", "worldInverseMatrix", "parentMatrix", "parentInverseMatrix", "matrix")
+
+
+def _matrix16(m):
+    return [v for row in m for v in row]
+
+
+def _rows(values):
+    return [list(values[i * 4:i * 4 + 4]) for i in range(4)]
+
+
+def _indexed(node, scene, prefix):
+    keys = set()
+    for key in list(node.attrs) + [d.split(".", 1)[1] for d, s in scene.nodeConnections(node.name)
+                                   if d.split(".")[0] == node.name]:
+        if key.startswith(prefix + "["):
+            keys.add(int(key[len(prefix) + 1:].split("]")[0]))
+    return sorted(keys)
+
+
+def _curveValue(keys, x):
+    points = sorted(keys.items())
+    if not points:
+        return 0.0
+    if x <= points[0][0]:
+        return points[0][1]
+    if x >= points[-1][0]:
+        return points[-1][1]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if x0 <= x <= x1:
+            return y0 + (y1 - y0) * (x - x0) / ((x1 - x0) or 1.0)
+
+
+def computeOutput(scene, node, attr):
+    get = lambda a: plugValue(scene, node.name, a)
+    vec = lambda a: [float(get(a + s) or 0.0) for s in "XYZ"]
+    kind = node.type
+    if kind == "multMatrix" and attr == "matrixSum":
+        m = identity()
+        for i in _indexed(node, scene, "matrixIn"):
+            m = mult(m, _rows(get("matrixIn[{0}]".format(i))))
+        return _matrix16(m)
+    if kind == "decomposeMatrix" and attr.startswith("output"):
+        m = _rows(get("inputMatrix") or _matrix16(identity()))
+        if attr == "outputTranslate":
+            return m[3][:3]
+        if attr == "outputRotate":
+            return matrixEuler(m)
+        if attr == "outputQuat":
+            return matrixQuat(m)
+        if attr == "outputScale":
+            return [math.sqrt(sum(c * c for c in m[i][:3])) for i in range(3)]
+    if kind == "vectorProduct" and attr == "output":
+        a, b = vec("input1"), vec("input2")
+        op = int(node.attrs.get("operation", 1))
+        if op == 1:
+            if node.attrs.get("normalizeOutput"):
+                a, b = normalize(a), normalize(b)
+            return [dot(a, b)] * 3
+        if op == 2:
+            out = cross(a, b)
+            return normalize(out) if node.attrs.get("normalizeOutput") else out
+        m = _rows(get("matrix") or _matrix16(identity()))
+        out = transformVector(a, m) if op == 3 else transformPoint(a, m)
+        return normalize(out) if node.attrs.get("normalizeOutput") else out
+    if kind == "multiplyDivide" and attr == "output":
+        a, b = vec("input1"), vec("input2")
+        op = int(node.attrs.get("operation", 1))
+        if op == 1:
+            return [x * y for x, y in zip(a, b)]
+        if op == 2:
+            return [x / y if y else 0.0 for x, y in zip(a, b)]
+        return [math.copysign(abs(x) ** y, 1.0) if x >= 0 or float(y).is_integer() else float("nan")
+                for x, y in zip(a, b)]
+    if kind == "plusMinusAverage" and attr in ("output1D", "output3D"):
+        dims = "1D" if attr == "output1D" else "3D"
+        values = [get("input{0}[{1}]".format(dims, i)) for i in _indexed(node, scene, "input" + dims)]
+        if dims == "3D":
+            values = [v if isinstance(v, (list, tuple)) else vec("input3D[{0}].input3D".format(i))
+                      for i, v in zip(_indexed(node, scene, "input3D"), values)]
+        op = int(node.attrs.get("operation", 1))
+        if not values:
+            return 0.0 if dims == "1D" else [0.0, 0.0, 0.0]
+        if dims == "1D":
+            values = [float(v or 0.0) for v in values]
+            if op == 2:
+                return values[0] - sum(values[1:])
+            total = sum(values)
+            return total / len(values) if op == 3 else total
+        total = [0.0, 0.0, 0.0]
+        for i, v in enumerate(values):
+            sign = -1.0 if op == 2 and i else 1.0
+            total = [t + sign * c for t, c in zip(total, v)]
+        return [t / len(values) for t in total] if op == 3 else total
+    if kind == "clamp" and attr == "output":
+        lo, hi, value = [float(get("min" + s) or 0.0) for s in "RGB"], \
+            [float(get("max" + s) or 0.0) for s in "RGB"], [float(get("input" + s) or 0.0) for s in "RGB"]
+        return [min(max(v, a), b) for v, a, b in zip(value, lo, hi)]
+    if kind == "quatNormalize" and attr == "outputQuat":
+        q = [float(get("inputQuat" + s) or 0.0) for s in "XYZW"]
+        length = math.sqrt(sum(c * c for c in q)) or 1.0
+        return [c / length for c in q]
+    if kind == "quatToEuler" and attr == "outputRotate":
+        q = [float(get("inputQuat" + s) or 0.0) for s in "XYZW"]
+        return matrixEulerOrder(quatMatrix(q), int(get("inputRotateOrder") or 0))
+    if kind in ("multDoubleLinear", "addDoubleLinear") and attr == "output":
+        a, b = float(get("input1") or 0.0), float(get("input2") or 0.0)
+        return a * b if kind == "multDoubleLinear" else a + b
+    if kind == "distanceBetween" and attr == "distance":
+        p1 = transformPoint(vec("point1"), _rows(get("inMatrix1") or _matrix16(identity())))
+        p2 = transformPoint(vec("point2"), _rows(get("inMatrix2") or _matrix16(identity())))
+        return math.sqrt(sum((a - b) ** 2 for a, b in zip(p1, p2)))
+    if kind in CURVE_TYPES and attr == "output":
+        return _curveValue(node.data.get("keys", {}), float(get("input") or 0.0))
+    if kind in TRANSFORM_TYPES and attr in MATRIX_ATTRS:
+        if attr == "matrix":
+            m = scene.localMatrix(node)
+        elif attr.startswith("parent"):
+            m = scene.parentMatrix(node)
+        else:
+            m = scene.worldMatrix(node, evaluate=False)
+        return _matrix16(inverse(m) if "Inverse" in attr else m)
+    return None
+
+
+# plug values of the running propagate() pass, None outside of it
+_passValues = None
+
+
+def plugValue(scene, nodeName, attr):
+    if _passValues is not None:
+        key = (nodeName, attr)
+        if key not in _passValues:
+            _passValues[key] = _plugValue(scene, nodeName, attr)
+        return _passValues[key]
+    return _plugValue(scene, nodeName, attr)
+
+
+def _plugValue(scene, nodeName, attr):
+    node = scene.node(nodeName)
+    attr = longAttr(attr)
+    base = attr.split("[")[0]
+    if base in MATRIX_ATTRS and node.type in TRANSFORM_TYPES:
+        attr = base
+    source = scene.connections.get("{0}.{1}".format(node.name, attr))
+    if source:
+        return plugValue(scene, *source.split(".", 1))
+    if attr and attr[-1] in COMPOUND_SUFFIXES:
+        parentSource = scene.connections.get("{0}.{1}".format(node.name, attr[:-1]))
+        if parentSource:
+            value = plugValue(scene, *parentSource.split(".", 1))
+            return value[COMPOUND_SUFFIXES[attr[-1]]]
+        computed = computeOutput(scene, node, attr[:-1])
+        if isinstance(computed, (list, tuple)):
+            return computed[COMPOUND_SUFFIXES[attr[-1]]]
+        # compound set in one go, e.g. setAttr("vp.input2", 1, 0, 0)
+        stored = node.attrs.get(attr[:-1])
+        if isinstance(stored, (list, tuple)) and attr not in node.attrs and \
+                len(stored) > COMPOUND_SUFFIXES[attr[-1]]:
+            return stored[COMPOUND_SUFFIXES[attr[-1]]]
+    computed = computeOutput(scene, node, attr)
+    if computed is not None:
+        return computed
+    if attr in VECTOR_ATTRS:
+        return [plugValue(scene, node.name, c) for c in VECTOR_ATTRS[attr]]
+    if attr in node.attrs:
+        return node.attrs[attr]
+    children = [attr + s for s in "XYZ"]
+    if any(c in node.attrs or "{0}.{1}".format(node.name, c) in scene.connections for c in children):
+        return [plugValue(scene, node.name, c) for c in children]
+    return node.attrs.get(attr)
+
+
+def propagate(scene):
+    """
+    push utility-node outputs into transform channels (animation curves excluded)
+    only pushes downstream of a stale node are recomputed, values are computed once per pass and
+    evaluate() runs another pass while anything still changes
+    """
+    global _passValues
+    _passValues = {}
+    try:
+        for target, destAttr, source in scene.stalePushes():
+            value = plugValue(scene, *source)
+            if destAttr in VECTOR_ATTRS and isinstance(value, (list, tuple)):
+                scene.setVector(target, destAttr, value)
+            elif value is not None and not isinstance(value, (list, tuple)):
+                target.attrs[longAttr(destAttr)] = value
+    finally:
+        _passValues = None
@@ -0,0 +1,57 @@
+"""
+every test runs on a new empty scene, in mayapy or on the maya stand-in, see testing.install()
+"""
+import pytest
+
+try:
+    import maya.standalone
+except ImportError:
+    from .. import testing
+
+    STAND_IN = True
+    testing.install()
+else:
+    STAND_IN = False
+    maya.standalone.initialize(name="python")
+
+SKELETON = "JBD"
+
+
+def newScene():
+    if STAND_IN:
+        testing.reset()
+    else:
+        import maya.cmds as cmds
+        cmds.file(new=True, force=True)
+
+
+def buildSkeleton():
+    from .. import animJoint_cons as aj
+
+    return aj.AnimationJoint(SKELETON, mirror=True)
+
+
+def buildRig():
+    """
+    both sides of the skeleton with scapula, twist and elbow/knee fix helpers
+    """
+    from .. import helper_joints as hj
+
+    animJoint = buildSkeleton()
+    hj.createLimbHelpers(hj.characterLimbSpecs(SKELETON, legs=True))
+    return animJoint
+
+
+@pytest.fixture(autouse=True)
+def scene():
+    newScene()
+
+
+@pytest.fixture
+def skeleton():
+    return buildSkeleton()
+
+
+@pytest.fixture
+def rig():
+    return buildRig()
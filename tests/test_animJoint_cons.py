@@ -0,0 +1,90 @@
+import math
+
+import maya.cmds as cmds
+import pytest
+
+from .. import animJoint_cons as aj
+
+
+def rotationZ(degrees, position):
+    c, s = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    return [c, s, 0.0, 0.0, -s, c, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0] + list(position) + [1.0]
+
+
+def determinant3(matrix):
+    a, b, c = matrix[0:3], matrix[4:7], matrix[8:11]
+    return (a[0] * (b[1] * c[2] - b[2] * c[1]) - a[1] * (b[0] * c[2] - b[2] * c[0]) +
+            a[2] * (b[0] * c[1] - b[1] * c[0]))
+
+
+def test_mirrorMatrix_position():
+    assert aj.mirrorMatrix(rotationZ(0, [2.0, 3.0, 4.0]))[12:15] == [-2.0, 3.0, 4.0]
+    assert aj.mirrorMatrix(rotationZ(0, [2.0, 3.0, 4.0]), "y")[12:15] == [2.0, -3.0, 4.0]
+
+
+def test_mirrorMatrix_behavior():
+    matrix = rotationZ(30, [2.0, 3.0, 4.0])
+    mirrored = aj.mirrorMatrix(matrix)
+    # the axes are flipped back after the mirror so the result stays right handed
+    assert mirrored[:3] == pytest.approx([matrix[0], -matrix[1], -matrix[2]])
+    assert determinant3(mirrored) == pytest.approx(1.0)
+    assert aj.mirrorMatrix(mirrored) == pytest.approx(matrix)
+
+
+def test_skeletonTemplates():
+    assert {"biped", "biped_lite"}.issubset(aj.skeletonTemplates())
+
+
+def test_loadSkeletonTemplate_unknown():
+    with pytest.raises(RuntimeError, match="Skeleton template 'quadruped' not found"):
+        aj.loadSkeletonTemplate("quadruped")
+
+
+def test_skeleton_from_template():
+    template = aj.loadSkeletonTemplate("biped_lite")
+    animJoint = aj.AnimationJoint("LITE", template="biped_lite", height=template["height"] * 2)
+    assert animJoint.allJoints == ["LITE_{0}".format(joint["name"]) for joint in template["joints"]]
+    assert animJoint.shoulder == "LITE_L_shoulder"
+    assert animJoint.armJointGrp == ["LITE_L_clavicle", "LITE_L_shoulder", "LITE_L_elbow", "LITE_L_wrist"]
+    assert cmds.listRelatives("LITE_L_shoulder", parent=True) == ["LITE_L_clavicle"]
+    # positions are scaled to the height
+    assert cmds.xform("LITE_L_elbow", query=True, translation=True, worldSpace=True) == \
+        pytest.approx([9.0, 29.0, -0.4])
+
+
+def test_mirror_skeleton(skeleton):
+    for left in ["JBD_L_shoulder", "JBD_L_elbow", "JBD_L_wrist", "JBD_L_hip"]:
+        right = left.replace("_L_", "_R_")
+        leftMatrix = cmds.xform(left, query=True, matrix=True, worldSpace=True)
+        assert cmds.xform(right, query=True, matrix=True, worldSpace=True) == \
+            pytest.approx(aj.mirrorMatrix(leftMatrix), abs=1e-6)
+
+
+ARMS = [["JBD_L_shoulder", "JBD_L_elbow", "JBD_L_wrist"], ["JBD_R_shoulder", "JBD_R_elbow", "JBD_R_wrist"]]
+LEG = ["JBD_L_hip", "JBD_L_knee", "JBD_L_ankle"]
+
+
+def drawnChains(visShape):
+    return dict((index, [cmds.listConnections("{0}.chains[{1}].{2}".format(visShape, index, attr),
+                                              source=True, destination=False)[0]
+                         for attr in ["rootMatrix", "midMatrix", "endMatrix"]])
+                for index in cmds.getAttr("{0}.chains".format(visShape), multiIndices=True))
+
+
+def test_visPoleVectors(skeleton):
+    visShape = aj.visPoleVectors(ARMS)
+    assert cmds.ls(type="poleVectorVis") == [visShape]
+    # later chains go on the same locator
+    assert aj.visPoleVectors([LEG]) == visShape
+    assert drawnChains(visShape) == {0: ARMS[0], 1: ARMS[1], 2: LEG}
+
+
+def test_visPoleVectors_appends_after_the_last_index(skeleton):
+    visShape = aj.visPoleVectors(ARMS[:1])
+    # a chain connected by hand leaves a gap
+    cmds.connectAttr("JBD_R_hip.worldMatrix[0]", "{0}.chains[3].rootMatrix".format(visShape))
+    cmds.connectAttr("JBD_R_knee.worldMatrix[0]", "{0}.chains[3].midMatrix".format(visShape))
+    cmds.connectAttr("JBD_R_ankle.worldMatrix[0]", "{0}.chains[3].endMatrix".format(visShape))
+    # the arm already drawn is skipped
+    aj.visPoleVectors(ARMS + [LEG])
+    assert drawnChains(visShape) == {0: ARMS[0], 3: ["JBD_R_hip", "JBD_R_knee", "JBD_R_ankle"], 4: ARMS[1], 5: LEG}
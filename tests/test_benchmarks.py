@@ -0,0 +1,34 @@
+import maya.cmds as cmds
+
+from .. import benchmarks
+
+BASE = {"seconds": 0.1, "relative": 2.0, "commands": 100, "nodes": 10}
+
+
+def createTwo(state):
+    cmds.createNode("transform", name="a")
+    cmds.createNode("transform", name="b")
+    cmds.setAttr("a.translateX", 1.0)
+
+
+def test_measure():
+    result = benchmarks.measure(benchmarks.Case("two", createTwo, repeat=2))
+    assert (result["commands"], result["nodes"]) == (3, 2)
+    assert result["seconds"] >= 0.0
+
+
+def test_regressions_compare_counts_only():
+    assert benchmarks.regressions(dict(BASE), BASE) == []
+    assert benchmarks.regressions({"seconds": 1.0, "commands": 101, "nodes": 10}, BASE) == ["commands"]
+    assert benchmarks.regressions({"seconds": 0.1, "commands": 110, "nodes": 11}, BASE, countTolerance=0.1) == []
+    # a baseline from the other mode only has comparable commands
+    assert benchmarks.regressions({"seconds": 0.1, "commands": 100, "nodes": 20}, BASE, metrics=["commands"]) == []
+    assert benchmarks.regressions(dict(BASE), None) == []
+
+
+def test_slower_scales_the_baseline():
+    # this session runs the reference work in 0.1s, the baseline expects 0.2s for the case
+    assert not benchmarks.slower({"seconds": 0.24}, BASE, 0.1)
+    assert benchmarks.slower({"seconds": 0.26}, BASE, 0.1)
+    assert not benchmarks.slower({"seconds": 0.26}, BASE, 0.2)
+    assert not benchmarks.slower({"seconds": 10.0}, {"seconds": 0.1, "commands": 1, "nodes": 1}, 0.1)
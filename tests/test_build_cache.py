@@ -0,0 +1,41 @@
+import maya.cmds as cmds
+
+from .. import build_cache
+from .. import build_plan
+from .conftest import buildRig
+from .conftest import newScene
+
+TRAP_INPUTS = {"back2Joint": "JBD_back2", "clavicleJoint": "JBD_L_clavicle", "acromionJoint": "L_acromion"}
+
+
+def buildTrap(cache):
+    plan = build_plan.BuildPlan(cache=cache)
+    plan.addGroup("L_trap", "TrapGroup", TRAP_INPUTS)
+    return plan.execute()[0]
+
+
+def test_hit_after_the_same_build(rig, tmp_path):
+    cache = build_cache.BuildCache(str(tmp_path / "cache.json"))
+    group = buildTrap(cache)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+    entry = list(cache.entries.values())[0]
+    assert sorted(entry) == ["muscleName", "positions", "sdkKeys"]
+    assert entry["sdkKeys"] == [muscleUnit.sdkKeys for muscleUnit in group.muscleUnitGroup]
+
+    newScene()
+    buildRig()
+    # execute() saved the cache, a new one reads the file
+    cache = build_cache.BuildCache(str(tmp_path / "cache.json"))
+    group = buildTrap(cache)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 0, 1)
+    assert [muscleUnit.sdkKeys for muscleUnit in group.muscleUnitGroup] == entry["sdkKeys"]
+
+
+def test_miss_when_the_skeleton_moved(rig):
+    cache = build_cache.BuildCache()
+    buildTrap(cache)
+    newScene()
+    buildRig()
+    cmds.xform("JBD_L_clavicle", translation=[0, 0.5, 0], relative=True)
+    buildTrap(cache)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 2)
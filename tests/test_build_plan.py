@@ -0,0 +1,76 @@
+import maya.cmds as cmds
+import pytest
+
+from .. import build_plan
+from .. import muscle_group as mg
+
+
+def namedBatches(plan):
+    return [sorted(buildStep.name for buildStep in batch) for batch in plan.resolve()]
+
+
+def test_resolve_orders_groups_after_their_inputs():
+    plan = build_plan.BuildPlan()
+    # lats needs a joint the trapezius makes, the deltoid needs nothing from the plan
+    plan.addGroup("L_lats", "LatsGroup", {"back1Joint": "JBD_back1", "twist2Joint": "JBD_L_shoulder_Twist2",
+                                           "scapulaJoint": "L_scapula", "trapCJoint": "L_trapC_JOmuscle"})
+    plan.addGroup("L_trap", "TrapGroup", {"back2Joint": "JBD_back2", "clavicleJoint": "JBD_L_clavicle",
+                                          "acromionJoint": "L_acromion"})
+    plan.addHelperLimb("JBD_L_shoulder", "JBD_L_elbow", "JBD_L_wrist", name="L_arm")
+    assert namedBatches(plan) == [["L_arm", "L_trap"], ["L_lats"]]
+
+
+def test_resolve_cycle():
+    plan = build_plan.BuildPlan()
+    plan.addStep(build_plan.BuildStep("a", "group", requires=["b_joint"], provides=["a_joint"], data={}))
+    plan.addStep(build_plan.BuildStep("b", "group", requires=["a_joint"], provides=["b_joint"], data={}))
+    plan.addStep(build_plan.BuildStep("c", "group", requires=[], provides=["c_joint"], data={}))
+    with pytest.raises(RuntimeError, match="Cyclic build dependency between: a, b"):
+        plan.resolve()
+
+
+def test_addStep_duplicate_name():
+    plan = build_plan.BuildPlan()
+    plan.addHelperLimb("JBD_L_shoulder", "JBD_L_elbow", "JBD_L_wrist", name="L_arm")
+    with pytest.raises(RuntimeError, match="already exists"):
+        plan.addHelperLimb("JBD_R_shoulder", "JBD_R_elbow", "JBD_R_wrist", name="L_arm")
+
+
+def test_addGroup_unknown_tag():
+    with pytest.raises(RuntimeError, match="Unknown muscle group type"):
+        build_plan.BuildPlan().addGroup("L_foo", "FooGroup", {})
+
+
+def builtGroups():
+    trap = mg.groupClass("TrapGroup")("L_trap", "JBD_back2", "JBD_L_clavicle", "L_acromion")
+    lats = mg.groupClass("LatsGroup")("L_lats", "JBD_back1", "JBD_L_shoulder_Twist2", "L_scapula", "L_trapC_JOmuscle")
+    for group in [trap, lats]:
+        group.add()
+        group.build()
+    return trap, lats
+
+
+def test_job_builds_one_step_per_call(rig):
+    trap, lats = builtGroups()
+    job = build_plan.BuildJob(mg.mirrorPlan([lats, trap]))
+    assert len(job) == 2
+    assert job.nextStep().name == "R_trap"
+    assert job.eta() is None
+    job.step()
+    assert cmds.objExists("R_trapC_JOmuscle") and not cmds.objExists("R_latsA_JOmuscle")
+    assert job.eta() is not None
+    job.step()
+    assert job.done and job.nextStep() is None
+    # in plan order, not build order
+    assert [group.muscleName for group in job.finish()] == ["R_lats", "R_trap"]
+
+
+def test_job_rollback_removes_built_steps(rig):
+    trap, lats = builtGroups()
+    before = set(cmds.ls())
+    job = build_plan.BuildJob(mg.mirrorPlan([lats, trap]))
+    while not job.done:
+        job.step()
+    assert "R_trapA_JOmuscle" in cmds.ls()
+    job.rollback()
+    assert set(cmds.ls()) == before
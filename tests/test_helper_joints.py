@@ -0,0 +1,167 @@
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+import pytest
+
+from .. import helper_joints as hj
+from .conftest import SKELETON
+
+
+def jointChain(*namedPositions):
+    """
+    joints at world positions, each parented to the one before, the chain aims down y
+    """
+    joints = []
+    for name, position in namedPositions:
+        cmds.select(clear=True)
+        joints.append(cmds.joint(name=name, position=position))
+        if len(joints) > 1:
+            cmds.parent(joints[-1], joints[-2])
+    return joints
+
+
+def forearmChain():
+    return jointChain(("elbow", [0.0, 0.0, 0.0]), ("wrist", [0.0, 3.0, 0.0]))
+
+
+def test_twistWeights():
+    assert hj.twistWeights(4) == pytest.approx([0.25, 0.5, 0.75, 1.0])
+    # the first upper arm joint stays near the shoulder
+    assert hj.twistWeights(4, upper=True) == pytest.approx([0.1, 0.25, 0.5, 0.75])
+
+
+def test_twistError():
+    assert hj.twistError(hj.twistWeights(3), 180.0) == pytest.approx(60.0)
+    assert hj.twistError(hj.twistWeights(6), 180.0) == pytest.approx(30.0)
+
+
+def test_twistJointCount():
+    assert hj.twistJointCount(180.0, 45.0) == 4
+    assert hj.twistJointCount(180.0, 60.0) == 3
+    for twistRange in [90.0, 150.0, 180.0, 240.0]:
+        count = hj.twistJointCount(twistRange, 45.0)
+        assert hj.twistError(hj.twistWeights(count), twistRange) <= 45.0 + 1e-9
+        if count > 1:
+            assert hj.twistError(hj.twistWeights(count - 1), twistRange) > 45.0
+
+
+def test_twistJointCount_maxSegmentLength():
+    assert hj.twistJointCount(180.0, 45.0, length=10.0, maxSegmentLength=2.0) == 5
+    # the twist budget alone already needs more joints
+    assert hj.twistJointCount(180.0, 45.0, length=10.0, maxSegmentLength=5.0) == 4
+
+
+def test_limbTwistPlan():
+    clavicle, upperArm, lowerArm, wrist = armChain()
+    forearm, upper = hj.limbTwistPlan(upperArm, lowerArm, wrist)
+    # no rotate limits on the joints, the default ranges are used
+    assert forearm["twistRange"] == hj.FOREARM_TWIST_RANGE
+    assert forearm["jointCount"] == hj.twistJointCount(hj.FOREARM_TWIST_RANGE)
+    assert upper["jointCount"] == hj.twistJointCount(hj.UPPER_ARM_TWIST_RANGE, upper=True)
+    assert upper["maxError"] <= hj.TWIST_BUDGET + 1e-6
+    assert [segment["length"] for segment in (forearm, upper)] == pytest.approx([3.0, 3.0])
+    # nothing is created
+    assert sorted(cmds.ls(type="joint")) == sorted([clavicle, upperArm, lowerArm, wrist])
+
+
+def test_limbTwistPlan_maxSegmentLength():
+    clavicle, upperArm, lowerArm, wrist = armChain()
+    forearm, upper = hj.limbTwistPlan(upperArm, lowerArm, wrist, maxSegmentLength=0.5)
+    assert forearm["jointCount"] == upper["jointCount"] == 6
+    hj.forArmTwist(lowerArm=lowerArm, wrist=wrist, jointCount=None, maxSegmentLength=0.5)
+    # base and value joints plus the twist joints
+    assert len(cmds.ls(type="joint")) == 4 + 2 + 6
+
+
+def test_vectorAxis():
+    assert hj.vectorAxis([0, 1, 0]) == "y"
+    assert hj.vectorAxis([-1, 0.5, 0]) == "x"
+
+
+def test_twistNetwork_reads_the_twist_only():
+    elbow, wrist = forearmChain()
+    twistPlug = hj.twistNetwork(wrist, elbow, aimAxis="y")
+    assert cmds.getAttr(twistPlug) == pytest.approx(0.0, abs=1e-6)
+    cmds.setAttr("{0}.rotateY".format(wrist), 60)
+    assert cmds.getAttr(twistPlug) == pytest.approx(60.0)
+    # the swing around x is dropped
+    cmds.setAttr("{0}.rotateX".format(wrist), 30)
+    assert cmds.getAttr(twistPlug) == pytest.approx(60.0)
+    # past 90 degrees the angle does not fold back
+    cmds.setAttr("{0}.rotateX".format(wrist), 0)
+    cmds.setAttr("{0}.rotateY".format(wrist), 150)
+    assert cmds.getAttr(twistPlug) == pytest.approx(150.0)
+
+
+def test_distributeTwist():
+    joints = [cmds.createNode("joint", name="twist{0}".format(index)) for index in range(4)]
+    source = cmds.createNode("transform", name="source")
+    nodes = hj.distributeTwist("{0}.rotateY".format(source), joints, [0.25, 0.5, 0.75, 1.0], name="test")
+    # one multiplyDivide per three joints
+    assert len(nodes) == 2
+    cmds.setAttr("{0}.rotateY".format(source), 40)
+    assert [cmds.getAttr("{0}.rotateY".format(joint)) for joint in joints] == pytest.approx([10, 20, 30, 40])
+
+
+def test_forArmTwist_matrix_mode():
+    elbow, wrist = forearmChain()
+    hj.forArmTwist(lowerArm=elbow, wrist=wrist, jointCount=3, mode="matrix")
+    assert not cmds.ls(type="orientConstraint")
+    cmds.setAttr("{0}.rotateY".format(wrist), 90)
+    assert cmds.getAttr("elbow_TwistValue.rotateY") == pytest.approx(90.0)
+    assert [cmds.getAttr("elbow_Twist{0}.rotateY".format(index)) for index in range(1, 4)] == \
+        pytest.approx([30.0, 60.0, 90.0])
+
+
+def test_forArmTwist_unknown_mode():
+    elbow, wrist = forearmChain()
+    with pytest.raises(RuntimeError, match="Invalid twist mode"):
+        hj.forArmTwist(lowerArm=elbow, wrist=wrist, mode="blend")
+
+
+def armChain():
+    """
+    clavicle, shoulder, elbow and wrist, the arm swings in the xy plane around z
+    """
+    return jointChain(("clavicle", [0.0, 10.0, 0.0]), ("shoulder", [1.0, 10.0, 0.0]), ("elbow", [1.0, 13.0, 0.0]),
+                      ("wrist", [1.0, 16.0, 0.0]))
+
+
+def upJointPosition(upLocal, upperArm):
+    matrix = upLocal * om.MMatrix(cmds.xform(upperArm, query=True, matrix=True, ws=True))
+    return [matrix[12], matrix[13], matrix[14]]
+
+
+def test_counterFlipNetwork_matches_the_posed_arm():
+    """
+    at -90, 0 and 90 degrees the up joint sits where it would if it was parented to the arm,
+    in between it rides the circle through those three points
+    """
+    clavicle, upperArm, lowerArm, wrist = armChain()
+    upJoint = hj.upperArmTwist(upperArm=upperArm, lowerArm=lowerArm)
+    upLocal = om.MMatrix(cmds.xform(upJoint, query=True, matrix=True, ws=True)) * \
+        om.MMatrix(cmds.xform(upperArm, query=True, matrix=True, ws=True)).inverse()
+    hj.counterFlipNetwork(upperArm, lowerArm, upJoint, rotationAxis="z")
+
+    positions = {}
+    for angle in [-90, -45, 0, 45, 90]:
+        cmds.setAttr("{0}.rz".format(upperArm), angle)
+        positions[angle] = cmds.xform(upJoint, query=True, translation=True, ws=True)
+        if angle % 90 == 0:
+            assert positions[angle] == pytest.approx(upJointPosition(upLocal, upperArm), abs=1e-6), angle
+    center = [(a + b) * 0.5 for a, b in zip(positions[-90], positions[90])]
+    radius = om.MVector([a - b for a, b in zip(positions[0], center)]).length()
+    for angle in [-45, 45]:
+        assert om.MVector([a - b for a, b in zip(positions[angle], center)]).length() == pytest.approx(radius)
+
+
+def test_createLimbHelpers_returns_the_created_nodes(skeleton):
+    before = set(cmds.ls())
+    created = hj.createLimbHelpers(hj.characterLimbSpecs(SKELETON, sides=["L"]))
+    assert list(created) == ["L_arm"]
+    assert sorted(created["L_arm"]) == sorted(set(cmds.ls()) - before)
+    assert "L_acromion" in created["L_arm"]
+
+
+def test_createLimbHelpers_missing_joints():
+    with pytest.raises(RuntimeError, match="Limb joints not found"):
+        hj.createLimbHelpers(hj.characterLimbSpecs(SKELETON, sides=["L"]))
@@ -0,0 +1,110 @@
+import maya.cmds as cmds
+import pytest
+
+from .. import muscle_group as mg
+from .conftest import buildRig
+from .conftest import newScene
+
+TRAP = ("TrapGroup", "L_trap", ["JBD_back2", "JBD_L_clavicle", "L_acromion"])
+LATS = ("LatsGroup", "L_lats", ["JBD_back1", "JBD_L_shoulder_Twist2", "L_scapula", "L_trapC_JOmuscle"])
+
+
+def buildGroup(tag, muscleName, inputs):
+    group = mg.groupClass(tag)(muscleName, *inputs)
+    group.add()
+    group.build()
+    return group
+
+
+def unitJoints(groups):
+    return [joint for group in groups for muscleUnit in group.muscleUnitGroup for joint in muscleUnit.allJoints]
+
+
+def worldMatrices(nodes):
+    return dict((node, cmds.xform(node, query=True, matrix=True, worldSpace=True)) for node in nodes)
+
+
+def test_sideTable(rig):
+    trap = buildGroup(*TRAP)
+    lats = buildGroup(*LATS)
+    table = mg.sideTable([trap, lats])
+    assert table["JBD_L_clavicle"] == "JBD_R_clavicle"
+    assert table["JBD_back2"] == "JBD_back2"
+    # made by the mirrored trapezius, not in the scene yet
+    assert table["L_trapC_JOmuscle"] == "R_trapC_JOmuscle"
+
+
+def test_sideTable_missing_joints(rig):
+    trap = buildGroup(*TRAP)
+    lats = buildGroup(*LATS)
+    # the trapezius is not mirrored with the lats, nothing makes its R_ side
+    with pytest.raises(RuntimeError, match="Mirror joints not found: R_trapC_JOmuscle"):
+        mg.sideTable([lats])
+    cmds.delete("JBD_R_clavicle")
+    with pytest.raises(RuntimeError, match="Mirror joints not found: JBD_R_clavicle"):
+        mg.sideTable([trap, lats])
+
+
+def test_mirrorAll_names(rig):
+    trap = buildGroup(*TRAP)
+    named = mg.mirrorAll([trap], names=["R_trapezius"])[0]
+    assert named.muscleName == "R_trapezius"
+    assert "JBD_R_clavicle" in named.inputs().values()
+    result = worldMatrices(unitJoints([named]))
+    for joint, matrix in worldMatrices(unitJoints([trap])).items():
+        mirrorJoint = joint.replace("L_trap", "R_trapezius", 1)
+        assert result[mirrorJoint][12:15] == pytest.approx([-matrix[12], matrix[13], matrix[14]], abs=1e-4), joint
+    # an empty name swaps the side prefix
+    assert mg.mirrorAll([trap], names=[""])[0].muscleName == "R_trap"
+
+
+def test_rehydrate(rig):
+    trap = buildGroup(*TRAP)
+    groups = mg.rehydrate()
+    assert len(groups) == 1
+    group = groups[0]
+    assert isinstance(group, mg.groupClass("TrapGroup"))
+    assert group.metadataNode == trap.metadataNode
+    assert group.metadata() == trap.metadata()
+    assert [muscleUnit.metadata() for muscleUnit in group.muscleUnitGroup] == \
+        [muscleUnit.metadata() for muscleUnit in trap.muscleUnitGroup]
+
+
+def test_rehydrate_skips_deleted_groups(rig):
+    trap = buildGroup(*TRAP)
+    cmds.delete(trap.muscleUnitGroup[0].allJoints[-1])
+    assert mg.rehydrate() == []
+
+
+def test_rehydrate_skips_groups_with_deleted_inputs(rig):
+    buildGroup(*TRAP)
+    buildGroup("TrapGroup", "R_trap", ["JBD_back2", "JBD_R_clavicle", "R_acromion"])
+    cmds.delete("L_acromion")
+    assert [group.muscleName for group in mg.rehydrate()] == ["R_trap"]
+
+
+def test_fromMetadata(rig):
+    trap = buildGroup(*TRAP)
+    group = mg.groupClass("TrapGroup").fromMetadata(trap.metadata(), trap.metadataNode)
+    assert group.muscleName == "L_trap"
+    assert group.inputs() == trap.inputs()
+    assert group.muscleCons == trap.muscleCons
+    assert [muscleUnit.JOmuscle for muscleUnit in group.muscleUnitGroup] == \
+        [muscleUnit.JOmuscle for muscleUnit in trap.muscleUnitGroup]
+
+
+def test_export_import_round_trip(rig, tmp_path):
+    groups = [buildGroup(*TRAP), buildGroup(*LATS)]
+    expected = worldMatrices(unitJoints(groups))
+    filePath = str(tmp_path / "muscles.json")
+    mg.exportMuscles(filePath, *reversed(groups))
+
+    newScene()
+    buildRig()
+    # file order is lats first, the plan still builds the trapezius before it
+    imported = mg.importMuscles(filePath)
+    assert sorted(group.muscleName for group in imported) == ["L_lats", "L_trap"]
+    result = worldMatrices(unitJoints(imported))
+    assert sorted(result) == sorted(expected)
+    for joint, matrix in expected.items():
+        assert result[joint] == pytest.approx(matrix, abs=1e-4), joint
@@ -0,0 +1,47 @@
+import copy
+
+import pytest
+
+from .. import muscle_templates as mt
+
+
+def test_compileTemplate():
+    template = mt.compileTemplate("TrapGroup")
+    assert template is mt.compileTemplate("TrapGroup")
+    assert template.inputNames == ["back2Joint", "clavicleJoint", "acromionJoint"]
+    assert template.unitSuffixes == ("A", "B", "C")
+    # derived joints come after the joint they are found from
+    derivedNames = [name for name, source, relation in template.derived]
+    assert derivedNames.index("back3Joint") < derivedNames.index("neckJoint") < derivedNames.index("headJoint")
+    assert template.aims == [(0, "back3Joint", [0, 1, 0])]
+    assert template.constraints[0][:4] == ("trapAParentCons", "parentConstraint",
+                                           [("joint", "neckJoint"), ("joint", "headJoint")], ("unit", 0, "muscleOrigin"))
+
+
+def test_every_template_compiles():
+    for tag in mt.TEMPLATES:
+        assert mt.compileTemplate(tag).tag == tag
+
+
+def test_compileTemplate_unknown_tag():
+    with pytest.raises(RuntimeError, match="No muscle template named 'FooGroup'"):
+        mt.compileTemplate("FooGroup")
+
+
+def brokenTemplate(edit):
+    template = copy.deepcopy(mt.TEMPLATES["TrapGroup"])
+    edit(template)
+    return template
+
+
+@pytest.mark.parametrize("edit, message", [
+    (lambda t: t["derived"].update(neckJoint=["spineJoint", "child"]), "cannot resolve derived joints"),
+    (lambda t: t["derived"].update(neckJoint=["back3Joint", "sibling"]), "should be 'child' or 'parent'"),
+    (lambda t: t["units"][0].update(origin=["chinJoint", "headJoint", 0.5]), "unknown joint 'chinJoint'"),
+    (lambda t: t["aims"][0].update(unit="D"), "no muscle unit 'D'"),
+    (lambda t: t["constraints"][0].update(driven="D.muscleOrigin"), "no muscle unit 'D'"),
+])
+def test_addTemplate_errors(edit, message):
+    with pytest.raises(RuntimeError, match=message):
+        mt.addTemplate("BrokenGroup", brokenTemplate(edit))
+    assert "BrokenGroup" not in mt.TEMPLATES
@@ -0,0 +1,22 @@
+import maya.cmds as cmds
+import pytest
+
+from .. import muscle_units as mu
+
+# 90 degrees around z, then the identity, both in world space
+TURNED = [0.0, 1.0, 0.0, 0.0, -1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 1.0, 2.0, 3.0, 1.0]
+STRAIGHT = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 1.0, 5.0, 3.0, 1.0]
+
+
+def test_createJoints():
+    joints = mu.createJoints([{"name": "root", "matrix": TURNED, "parent": None},
+                              {"name": "tip", "matrix": STRAIGHT, "parent": "root", "radius": 0.5}])
+    assert joints == ["root", "tip"]
+    assert cmds.listRelatives("tip", parent=True) == ["root"]
+    for joint, matrix in zip(joints, [TURNED, STRAIGHT]):
+        assert cmds.xform(joint, query=True, matrix=True, worldSpace=True) == pytest.approx(matrix, abs=1e-6)
+        # the orientation goes to jointOrient, rotate stays clean
+        assert cmds.getAttr("{0}.rotate".format(joint))[0] == pytest.approx((0.0, 0.0, 0.0))
+    assert cmds.getAttr("root.jointOrientZ") == pytest.approx(90.0)
+    assert cmds.getAttr("tip.jointOrientZ") == pytest.approx(-90.0)
+    assert cmds.getAttr("tip.radius") == pytest.approx(0.5)
@@ -0,0 +1,70 @@
+import maya.cmds as cmds
+import pytest
+
+from .. import muscle_group as mg
+from .. import optimizer
+
+POSES = [("JBD_L_clavicle.rotateZ", 20.0), ("JBD_L_shoulder.rotateZ", -45.0), ("JBD_back2.rotateX", 15.0)]
+
+
+def buildGroups():
+    trap = mg.groupClass("TrapGroup")("L_trap", "JBD_back2", "JBD_L_clavicle", "L_acromion")
+    lats = mg.groupClass("LatsGroup")("L_lats", "JBD_back1", "JBD_L_shoulder_Twist2", "L_scapula", "L_trapC_JOmuscle")
+    for group in [trap, lats]:
+        group.add()
+        group.build()
+    return [trap, lats]
+
+
+def posedMatrices(groups):
+    """
+    unit joint world matrices at rest and with every pose applied in turn
+    """
+    result = [optimizer.snapshot(groups)]
+    for plug, value in POSES:
+        cmds.setAttr(plug, value)
+        result.append(optimizer.snapshot(groups))
+    for plug, value in POSES:
+        cmds.setAttr(plug, 0.0)
+    return result
+
+
+def test_optimizeGroups(rig):
+    groups = buildGroups()
+    expected = posedMatrices(groups)
+    result = optimizer.optimizeGroups(groups, startFrame=1, endFrame=1)
+    removed = result["deadConstraints"] + result["flatCurves"] + result["duplicateCurves"]
+    # scaleX and scaleZ of every JOmuscle share a curve
+    assert len(result["duplicateCurves"]) >= 6
+    assert not [node for node in removed if cmds.objExists(node)]
+    assert result["nodesSaved"] == len(removed)
+    for before, after in zip(expected, posedMatrices(groups)):
+        for joint, matrix in before.items():
+            assert after[joint] == pytest.approx(matrix, abs=1e-6), joint
+
+
+def test_optimizeGroups_dryRun(rig):
+    groups = buildGroups()
+    nodes = set(cmds.ls())
+    result = optimizer.optimizeGroups(groups, dryRun=True, startFrame=1, endFrame=1)
+    assert result["duplicateCurves"]
+    assert "nodesAfter" not in result
+    assert set(cmds.ls()) == nodes
+
+
+def test_optimizeGroups_is_one_undo_step(rig):
+    groups = buildGroups()
+    optimizer.optimizeGroups(groups, startFrame=1, endFrame=1)
+    assert cmds.undoInfo(query=True, undoName=True) == "optimizeGroups"
+
+
+def test_optimizeGroups_undoes_a_failed_verify(rig, monkeypatch):
+    groups = buildGroups()
+    snapshots = [{"L_trapA_JOmuscle": [0.0] * 16}, {"L_trapA_JOmuscle": [1.0] * 16}]
+    undone = []
+    monkeypatch.setattr(optimizer, "snapshot", lambda groups: snapshots.pop(0))
+    monkeypatch.setattr(cmds, "undo", lambda *args, **kwargs: undone.append(
+        cmds.undoInfo(query=True, undoName=True)))
+    with pytest.raises(RuntimeError, match="Optimizing moved 1 joints: L_trapA_JOmuscle"):
+        optimizer.optimizeGroups(groups, startFrame=1, endFrame=1)
+    assert undone == ["optimizeGroups"]
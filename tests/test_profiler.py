@@ -0,0 +1,52 @@
+import csv
+
+import maya.cmds as cmds
+import pytest
+
+from .. import muscle_group as mg
+from .. import profiler
+
+
+def buildTrap():
+    group = mg.groupClass("TrapGroup")("L_trap", "JBD_back2", "JBD_L_clavicle", "L_acromion")
+    group.add()
+    group.build()
+    return group
+
+
+def test_profileGroups(rig):
+    group = buildTrap()
+    cmds.currentTime(5)
+    rows = profiler.profileGroups([group], startFrame=1, endFrame=3)
+    assert cmds.currentTime(query=True) == 5
+    assert [(row["unit"], row["category"]) for row in rows] == \
+        [(unit, category) for unit in ["L_trapA", "L_trapB", "L_trapC"] for category in profiler.CATEGORIES]
+    for row in rows:
+        assert row["group"] == "L_trap"
+        assert row["msPerFrame"] == pytest.approx(row["totalMs"] / 3)
+    nodes = dict(((row["unit"], row["category"]), row["nodes"]) for row in rows)
+    assert nodes[("L_trapB", "sdkCurves")] == 6
+    assert nodes[("L_trapB", "constraints")] > 0
+    # no jiggle joint was added
+    assert nodes[("L_trapB", "jiggle")] == 0
+
+
+def test_profileGroups_empty_range(rig):
+    with pytest.raises(RuntimeError, match="Empty frame range 5 - 1"):
+        profiler.profileGroups([buildTrap()], startFrame=5, endFrame=1)
+
+
+def test_groupTotals_and_csv(tmp_path):
+    rows = [{"group": "a", "unit": "a1", "category": "sdkCurves", "nodes": 6, "totalMs": 1.0, "msPerFrame": 0.5},
+            {"group": "b", "unit": "b1", "category": "sdkCurves", "nodes": 6, "totalMs": 4.0, "msPerFrame": 2.0},
+            {"group": "a", "unit": "a2", "category": "constraints", "nodes": 4, "totalMs": 2.0, "msPerFrame": 1.0}]
+    totals = profiler.groupTotals(rows)
+    assert [(row["group"], row["nodes"], row["totalMs"]) for row in totals] == [("b", 6, 4.0), ("a", 10, 3.0)]
+    assert totals[0]["unit"] == totals[0]["category"] == "total"
+
+    filePath = str(tmp_path / "profile.csv")
+    profiler.writeCsv(filePath, rows)
+    with open(filePath) as fp:
+        written = list(csv.DictReader(fp))
+    assert [row["unit"] for row in written] == ["a1", "b1", "a2"]
+    assert list(written[0]) == list(profiler.COLUMNS)
@@ -0,0 +1,45 @@
+import maya.cmds as cmds
+import pytest
+
+from ..benchmarks import scaling
+from ..benchmarks import synthetic
+
+SMALL = synthetic.SkeletonSpec(spineJoints=3, limbs=2, limbJoints=2)
+
+
+def test_skeletonSpecs():
+    specs = synthetic.skeletonSpecs("C0", SMALL, offset=100.0)
+    assert len(specs) == 3 + 2 * 2
+    assert specs[0]["name"] == "C0_spine0" and specs[0]["parent"] is None
+    assert specs[0]["matrix"][12] == 100.0
+    # every limb hangs from the spine joints in turn
+    assert [spec["parent"] for spec in specs if spec["name"].endswith("_0")] == ["C0_spine0", "C0_spine1"]
+    pairs = synthetic.attachPairs(specs)
+    assert ("C0_spine0", "C0_spine2") in pairs
+    assert ("C0_spine0", "C0_limb0_1") in pairs
+    assert all(origin != insertion for origin, insertion in pairs)
+
+
+def test_buildCharacter_cycles_over_the_pairs():
+    pairCount = len(synthetic.attachPairs(synthetic.skeletonSpecs("C0", SMALL)))
+    root, units = synthetic.buildCharacter("C0", pairCount + 1, spec=SMALL)
+    assert root == "C0_spine0"
+    assert len(units) == pairCount + 1
+    assert all(cmds.objExists(unit.JOmuscle) for unit in units)
+
+
+def test_buildCharacter_without_pairs():
+    with pytest.raises(RuntimeError, match="has no joint two links down a chain"):
+        synthetic.buildCharacter("C0", 1, spec=synthetic.SkeletonSpec(spineJoints=1, limbs=1, limbJoints=1))
+
+
+def test_scalingCurve():
+    rows = synthetic.scalingCurve([2, 1], [3], spec=SMALL, frames=2)
+    # smallest rig first, the marginal cost needs a previous point
+    assert [(row["characters"], row["units"]) for row in rows] == [(1, 3), (2, 6)]
+    assert rows[0]["marginalMsPerUnit"] is None
+    assert rows[1]["marginalMsPerUnit"] is not None
+    assert rows[1]["nodes"] == 2 * rows[0]["nodes"]
+    assert rows[0]["fps.serial"] > 0
+    table = scaling.report(rows, synthetic.COLUMNS)
+    assert len(table.split("\n")) == 3
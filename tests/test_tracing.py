@@ -0,0 +1,61 @@
+import json
+
+import maya.cmds as cmds
+import pytest
+
+from .. import muscle_group as mg
+from .. import muscle_units as mu
+from .. import tracing
+
+
+def buildTrap():
+    group = mg.groupClass("TrapGroup")("L_trap", "JBD_back2", "JBD_L_clavicle", "L_acromion")
+    group.add()
+    group.build()
+    return group
+
+
+def test_tracing_groups_commands_by_operation(rig, tmp_path):
+    with tracing.tracing() as tracer:
+        assert tracing.isTracing()
+        assert mg.cmds is not cmds
+        buildTrap()
+    assert not tracing.isTracing()
+    # the modules get the real cmds back
+    assert mg.cmds is cmds and mu.cmds is cmds
+
+    paths = set(tracer.operationTotals)
+    assert "TemplateGroup.add/createMuscleUnit/MuscleJoint.createFromAttachObj" in paths
+    calls, seconds, commandCalls = tracer.operationTotals["TemplateGroup.build/MuscleJoint.update/MuscleJoint.addSDK"]
+    assert calls == 3 and commandCalls > 0
+    # an operation counts the commands of the operations under it
+    assert tracer.operationTotals["TemplateGroup.build"][2] >= \
+        tracer.operationTotals["TemplateGroup.build/MuscleJoint.update"][2] >= commandCalls
+    rows = [row for row in tracer.rows() if row["command"] == "setDrivenKeyframe"]
+    assert rows and all(row["caller"] == "MuscleJoint.addSDK" for row in rows)
+    assert "TemplateGroup.build" in tracer.report()
+
+    filePath = str(tmp_path / "trace.json")
+    tracer.writeChromeTrace(filePath)
+    with open(filePath) as fp:
+        events = json.load(fp)["traceEvents"]
+    assert len(events) == len(tracer.events)
+    assert set(event["ph"] for event in events) == {"X"}
+
+
+def test_start_twice():
+    with tracing.tracing():
+        with pytest.raises(RuntimeError, match="already running"):
+            tracing.start()
+    assert tracing.stop() is None
+
+
+def test_operation_without_tracing():
+    @tracing.operation
+    def double(value):
+        return value * 2
+
+    assert double(2) == 4
+    with tracing.tracing() as tracer:
+        assert double(3) == 6
+    assert tracer.operationTotals["test_operation_without_tracing.<locals>.double"][:1] == [1]
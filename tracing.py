@@ -0,0 +1,200 @@
+"""
+opt-in tracing of the maya.cmds calls made by the tools
+
+start() swaps the cmds module of the traced modules for a proxy that times every call, stop() puts
+the real module back. functions decorated with @operation group the calls they make, nested
+operations make a path like "TemplateGroup.add/MuscleJoint.edit". when tracing is off the modules
+hold the real cmds and an operation costs one dict lookup
+
+    from JBDMuscle import tracing
+    with tracing.tracing() as tracer:
+        group.build()
+    print(tracer.report())
+    tracer.writeChromeTrace("build.json")    # open in chrome://tracing or ui.perfetto.dev
+"""
+import functools
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+MODULES = ("muscle_units", "muscle_group", "helper_joints", "animJoint_cons", "build_plan")
+COLUMNS = ("operation", "command", "caller", "calls", "totalMs", "meanUs")
+
+_state = {"tracer": None, "modules": {}}
+
+
+class Tracer(object):
+
+    def __init__(self):
+        self.start = time.time()
+        self.operations = []
+        # (operation path, command, caller) -> [calls, seconds]
+        self.commands = {}
+        # operation path -> [calls, seconds, command calls]
+        self.operationTotals = {}
+        self.events = []
+
+    def path(self):
+        return "/".join(self.operations)
+
+    def call(self, name, caller, fn, args, kwargs):
+        start = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            seconds = time.time() - start
+            path = self.path()
+            entry = self.commands.setdefault((path, name, caller), [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            for depth in range(len(self.operations)):
+                self.operationTotals["/".join(self.operations[:depth + 1])][2] += 1
+            self.events.append(("cmds", name, start, seconds, {"caller": caller}))
+
+    @contextmanager
+    def operation(self, name):
+        self.operations.append(name)
+        path = self.path()
+        self.operationTotals.setdefault(path, [0, 0.0, 0])
+        start = time.time()
+        try:
+            yield
+        finally:
+            seconds = time.time() - start
+            self.operations.pop()
+            self.operationTotals[path][0] += 1
+            self.operationTotals[path][1] += seconds
+            self.events.append(("operation", name, start, seconds, {"path": path}))
+
+    def rows(self):
+        """
+        :return: list of row dicts with the COLUMNS keys, slowest first
+        """
+        rows = [{"operation": path or "-", "command": name, "caller": caller, "calls": calls,
+                 "totalMs": seconds * 1000.0, "meanUs": seconds * 1000000.0 / calls}
+                for (path, name, caller), (calls, seconds) in self.commands.items()]
+        return sorted(rows, key=lambda row: row["totalMs"], reverse=True)
+
+    def report(self, limit=None):
+        """
+        :param limit: only the slowest limit command rows
+        :return: operation tree and commands by caller as a text table
+        """
+        tree = [("  " * path.count("/") + path.split("/")[-1], totals)
+                for path, totals in sorted(self.operationTotals.items())]
+        width = max([len(name) for name, totals in tree] + [len("operation")])
+        lines = ["{0:<{width}} {1:>7} {2:>10} {3:>9}".format("operation", "calls", "totalMs", "commands",
+                                                             width=width)]
+        for name, (calls, seconds, commandCalls) in tree:
+            lines.append("{0:<{width}} {1:>7} {2:>10.2f} {3:>9}".format(name, calls, seconds * 1000.0,
+                                                                        commandCalls, width=width))
+        byCaller = {}
+        for (path, name, caller), (calls, seconds) in self.commands.items():
+            entry = byCaller.setdefault((name, caller), [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        rows = sorted(byCaller.items(), key=lambda item: item[1][1], reverse=True)
+        width = max([len(caller) for (name, caller), totals in rows] + [len("caller")])
+        lines.append("")
+        lines.append("{0:<20} {1:<{width}} {2:>7} {3:>10} {4:>9}".format(*COLUMNS[1:], width=width))
+        for (name, caller), (calls, seconds) in rows[:limit]:
+            lines.append("{0:<20} {1:<{width}} {2:>7} {3:>10.2f} {4:>9.1f}".format(
+                name, caller, calls, seconds * 1000.0, seconds * 1000000.0 / calls, width=width))
+        return "\n".join(lines)
+
+    def chromeTrace(self):
+        """
+        :return: dict in the Chrome trace event format, operations and commands as complete events
+        """
+        events = [{"name": name, "cat": category, "ph": "X", "pid": 0, "tid": 0,
+                   "ts": (start - self.start) * 1000000.0, "dur": seconds * 1000000.0, "args": args}
+                  for category, name, start, seconds, args in self.events]
+        return {"traceEvents": sorted(events, key=lambda event: (event["ts"], -event["dur"])),
+                "displayTimeUnit": "ms"}
+
+    def writeChromeTrace(self, filePath):
+        with open(filePath, "w") as fp:
+            json.dump(self.chromeTrace(), fp)
+
+
+class CommandProxy(object):
+    """
+    stands in for maya.cmds in a traced module, commands are wrapped once on first use
+    """
+
+    def __init__(self, cmds, tracer):
+        self._cmds = cmds
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        fn = getattr(self._cmds, name)
+        if not callable(fn):
+            return fn
+        tracer = self._tracer
+
+        def traced(*args, **kwargs):
+            code = sys._getframe(1).f_code
+            return tracer.call(name, getattr(code, "co_qualname", code.co_name), fn, args, kwargs)
+        traced.__name__ = name
+        setattr(self, name, traced)
+        return traced
+
+
+def start(modules=MODULES):
+    """
+    start tracing the cmds calls of the given JBDMuscle modules
+    :return: Tracer
+    """
+    import importlib
+
+    if _state["tracer"] is not None:
+        raise RuntimeError("Tracing is already running")
+    tracer = Tracer()
+    for moduleName in modules:
+        module = importlib.import_module("{0}.{1}".format(__package__, moduleName))
+        _state["modules"][module] = module.cmds
+        module.cmds = CommandProxy(module.cmds, tracer)
+    _state["tracer"] = tracer
+    return tracer
+
+
+def stop():
+    """
+    :return: the Tracer of the run, None if tracing was not running
+    """
+    tracer = _state["tracer"]
+    for module, cmds in _state["modules"].items():
+        module.cmds = cmds
+    _state["modules"] = {}
+    _state["tracer"] = None
+    return tracer
+
+
+def isTracing():
+    return _state["tracer"] is not None
+
+
+@contextmanager
+def tracing(modules=MODULES):
+    tracer = start(modules)
+    try:
+        yield tracer
+    finally:
+        stop()
+
+
+def operation(fn):
+    """
+    decorator grouping the commands a function runs under its name while tracing
+    """
+    name = getattr(fn, "__qualname__", fn.__name__)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        tracer = _state["tracer"]
+        if tracer is None:
+            return fn(*args, **kwargs)
+        with tracer.operation(name):
+            return fn(*args, **kwargs)
+    return wrapper
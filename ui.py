@@ -1,3 +1,9 @@
+import importlib
+import os.path
+import time
+
+_importStart = time.time()
+
 try:
     from PySide2.QtGui import *
     from PySide2.QtCore import *
@@ -10,9 +16,26 @@ except ImportError:
     from shiboken6 import wrapInstance
 
 import maya.OpenMayaUI as omui
+import maya.api.OpenMaya as om
 import maya.cmds as cm
-from . import helper_joints
-from . import muscle_group
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def dataPath(fileName):
+    """
+    :param fileName: file name inside the package data directory, absolute paths are kept
+    """
+    return fileName if os.path.isabs(fileName) else os.path.join(DATA_DIR, fileName)
+
+
+def lazyModule(name):
+    """
+    package module imported on first use, so importing ui does not load the rig modules
+    :param name: module name inside the package, e.g. "muscle_group"
+    """
+    return importlib.import_module("." + name, __package__)
 
 
 def mayaMainWindow():
@@ -21,27 +44,27 @@ def mayaMainWindow():
 
 
 def createMuscleGroup(groupType, inputs):
-    if groupType == "Trapezius":
-        return muscle_group.TrapGroup(inputs[0], inputs[1], inputs[2], inputs[3])
-    elif groupType == "Lats":
-        return muscle_group.LatsGroup(inputs[0], inputs[1], inputs[2], inputs[3], inputs[4])
-    elif groupType == "Deltoid":
-        return muscle_group.DeltoidGroup(inputs[0], inputs[1], inputs[2], inputs[3], inputs[4], inputs[5])
-    elif groupType == "Arm":
-        return muscle_group.ArmMuscleGroup(inputs[0], inputs[1], inputs[2], inputs[3], inputs[4], inputs[5])
-    elif groupType == "Pectoralis":
-        return muscle_group.PectoralisGroup(inputs[0], inputs[1], inputs[2], inputs[3], inputs[4])
+    """
+    :param groupType: group tag, see muscle_templates.TEMPLATES
+    :param inputs: muscle name followed by the template input joints
+    """
+    return lazyModule("muscle_group").groupClass(groupType)(*inputs)
 
 
 class CollapsibleHeader(QWidget):
 
-    COLLAPSED_PIXMAP = QPixmap(":teRightArrow.png")
-    EXPENDED_PIXMAP = QPixmap(":teDownArrow.png")
-    COLOR = QPushButton().palette().color(QPalette.Button)
+    # pixmaps and the button color are made by the first header, not when ui is imported
+    COLLAPSED_PIXMAP = None
+    EXPENDED_PIXMAP = None
+    COLOR = None
     clicked = Signal()
 
     def __init__(self, text, parent=None):
         super(CollapsibleHeader, self).__init__(parent)
+        if CollapsibleHeader.COLOR is None:
+            CollapsibleHeader.COLLAPSED_PIXMAP = QPixmap(":teRightArrow.png")
+            CollapsibleHeader.EXPENDED_PIXMAP = QPixmap(":teDownArrow.png")
+            CollapsibleHeader.COLOR = QPushButton().palette().color(QPalette.Button)
 
         self.setAutoFillBackground(True)
         palette = self.palette()
@@ -432,101 +455,212 @@ class HelperJointWindow(QDialog):
         mainLayout.addWidget(self.bodyScrollArea)
 
 
-class MuscleCreateWidget(QWidget):
-    def __init__(self, listItem, listWidget, create=None, mirror=None, rebuild=None,
-                 muscleUnit=None, groupType=None, inputs=None, parent=None):
+class MuscleTreeItem(object):
+    """
+    one row of MuscleGroupModel, a muscle group, one of its units or a unit joint
+    """
 
-        super(MuscleCreateWidget, self).__init__(parent)
-        self.parentWidget = listWidget
-        self.listItem = listItem
+    def __init__(self, text, parent=None, group=None, joint=None):
+        self.text = text
+        self.parent = parent
+        self.group = group
+        self.joint = joint
+        self.row = 0
+        self.children = []
 
-        if create:
-            self.skeleton_group = createMuscleGroup(groupType, inputs)
-            self.skeleton_group.add()
-        if mirror:
-            self.skeleton_group = muscleUnit.mirror()
-        if rebuild:
-            self.skeleton_group = muscleUnit
+    def addChild(self, child):
+        child.parent = self
+        child.row = len(self.children)
+        self.children.append(child)
+        return child
 
-        mainLayout = QVBoxLayout()
-        groupBox = QGroupBox(self.skeleton_group.muscleName)
-        groupBoxLayout = QVBoxLayout(groupBox)
-        mainLayout.addWidget(groupBox)
-        self.setLayout(mainLayout)
 
-        self.treeWidget = QTreeWidget()
-        self.treeWidget.setFixedHeight(100)
-        self.treeWidget.setHeaderLabels(["Muscle Units"])
-        groupBoxLayout.addWidget(self.treeWidget)
-        self.populateTreeWidget()
-
-        # add right click event
-        self.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.customContextMenuRequested.connect(self.open_menu)
-
-        self.treeWidget.itemSelectionChanged.connect(self.onItemSelectionChanged)
-        self.treeWidget.itemDoubleClicked.connect(self.onItemDoubleClicked)
-
-    def populateTreeWidget(self):
-        icon_path = QPixmap(":kinJoint.png")
-        bone_icon = QIcon(icon_path)
-
-        for unit in self.skeleton_group.muscleUnitGroup:
-            muscleGroup = unit.muscleName
-            muscleOrigin = unit.muscleOrigin
-            muscleInsertion = unit.muscleInsertion
-            muscleOffset = unit.muscleOffset
-            Jomuscle = unit.JOmuscle
-
-            muscleGroup = QTreeWidgetItem(self.treeWidget, [muscleGroup])
-
-            origin_item = QTreeWidgetItem(muscleGroup, [muscleOrigin])
-            origin_item.setData(0, Qt.UserRole, muscleOrigin)
-            origin_item.setIcon(0, bone_icon)
-
-            insertion_item = QTreeWidgetItem(muscleGroup, [muscleInsertion])
-            insertion_item.setData(0, Qt.UserRole, muscleInsertion)
-            insertion_item.setIcon(0, bone_icon)
-
-            offset_item = QTreeWidgetItem(muscleGroup, [muscleOffset])
-            offset_item.setData(0, Qt.UserRole, muscleOffset)
-            offset_item.setIcon(0, bone_icon)
-
-            jomuscle_item = QTreeWidgetItem(muscleGroup, [Jomuscle])
-            jomuscle_item.setData(0, Qt.UserRole, Jomuscle)
-            jomuscle_item.setIcon(0, bone_icon)
-
-    def open_menu(self, position):
-        menu = QMenu(self)
-        edit_action = menu.addAction("Edit")
-        build_action = menu.addAction("Build")
-        delete_action = menu.addAction("Delete")
-
-        edit_action.triggered.connect(self.skeleton_group.edit)
-        build_action.triggered.connect(self.skeleton_group.build)
-        delete_action.triggered.connect(self.deleteItem)
-
-        menu.exec_(self.mapToGlobal(position))
-
-    def deleteItem(self):
-        self.skeleton_group.delete()
-        if self.parentWidget and self.listItem:
-            row = self.parentWidget.row(self.listItem)
-            self.parentWidget.takeItem(row)
-        self.deleteLater()
-
-    def onItemSelectionChanged(self):
-        cm.select(clear=True)
-        selected_items = self.treeWidget.selectedItems()
-        if selected_items:
-            selected_item = selected_items[0]
-            joint = selected_item.data(0, Qt.UserRole)
-            cm.select(joint)
+class MuscleGroupModel(QAbstractItemModel):
+    """
+    every muscle group of the scene in one model, groups hold their units and units their joints
+    """
 
-    def onItemDoubleClicked(self, item):  # 添加处理双击事件的方法
-        joint = item.data(0, Qt.UserRole)
-        cm.select(joint)
-        cm.GraphEditor()
+    JOINT_ICON = ":kinJoint.png"
+    _icons = {}
+
+    def __init__(self, parent=None):
+        super(MuscleGroupModel, self).__init__(parent)
+        self.root = MuscleTreeItem("")
+        # joint name to its rows, looked up by every scene message
+        self.jointItems = {}
+        self.groupNodes = None
+
+    @classmethod
+    def icon(cls, path):
+        if path not in cls._icons:
+            cls._icons[path] = QIcon(QPixmap(path))
+        return cls._icons[path]
+
+    @property
+    def groups(self):
+        return [item.group for item in self.root.children]
+
+    def item(self, index):
+        if index.isValid():
+            return index.internalPointer()
+        return self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.item(parent).children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parentItem = index.internalPointer().parent
+        if parentItem is None or parentItem is self.root:
+            return QModelIndex()
+        return self.createIndex(parentItem.row, 0, parentItem)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.item(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return item.text
+        if role == Qt.DecorationRole and item.joint:
+            return self.icon(self.JOINT_ICON)
+        if role == Qt.UserRole:
+            return item.joint
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return "Muscle Groups"
+        return None
+
+    def groupItem(self, group):
+        groupItem = MuscleTreeItem(group.muscleName, group=group)
+        for unit in group.muscleUnitGroup:
+            unitItem = groupItem.addChild(MuscleTreeItem(unit.muscleName, group=group))
+            for joint in [unit.muscleOrigin, unit.muscleInsertion, unit.muscleOffset, unit.JOmuscle]:
+                unitItem.addChild(MuscleTreeItem(joint, group=group, joint=joint))
+        return groupItem
+
+    def indexJoints(self, groupItem, add=True):
+        for unitItem in groupItem.children:
+            for jointItem in unitItem.children:
+                if add:
+                    self.jointItems.setdefault(jointItem.joint, []).append(jointItem)
+                elif jointItem in self.jointItems.get(jointItem.joint, []):
+                    self.jointItems[jointItem.joint].remove(jointItem)
+                    if not self.jointItems[jointItem.joint]:
+                        del self.jointItems[jointItem.joint]
+
+    def addGroups(self, groups):
+        """
+        :param groups: muscle groups appended as one insert, the view lays out only the visible rows
+                       groups already listed, or stored on a metadata node already listed, are skipped
+        """
+        known = set(id(group) for group in self.groups)
+        known.update(group.metadataNode for group in self.groups if group.metadataNode)
+        groupItems = [self.groupItem(group) for group in groups
+                      if id(group) not in known and group.metadataNode not in known]
+        if not groupItems:
+            return
+        first = len(self.root.children)
+        self.beginInsertRows(QModelIndex(), first, first + len(groupItems) - 1)
+        for groupItem in groupItems:
+            self.root.addChild(groupItem)
+            self.indexJoints(groupItem)
+        self.groupNodes = None
+        self.endInsertRows()
+
+    def removeGroup(self, group):
+        for groupItem in self.root.children:
+            if groupItem.group is group:
+                break
+        else:
+            return
+        self.beginRemoveRows(QModelIndex(), groupItem.row, groupItem.row)
+        del self.root.children[groupItem.row]
+        for row, item in enumerate(self.root.children):
+            item.row = row
+        self.indexJoints(groupItem, add=False)
+        self.groupNodes = None
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.root.children = []
+        self.jointItems = {}
+        self.groupNodes = None
+        self.endResetModel()
+
+    def resetTrackedNodes(self):
+        """
+        gather the group nodes again on the next tracks() call, after a listed group made or lost its metadata node
+        """
+        self.groupNodes = None
+
+    def tracks(self, nodeName):
+        """
+        :return: True if a listed group uses the node, cheap enough to run on every scene message
+        """
+        if nodeName in self.jointItems:
+            return True
+        if self.groupNodes is None:
+            # input joints and metadata nodes, gathered again after groups are added, removed, renamed or built
+            self.groupNodes = set()
+            for group in self.groups:
+                self.groupNodes.update(group.inputs().values())
+                self.groupNodes.add(group.metadataNode)
+        return nodeName in self.groupNodes
+
+    def renameNode(self, oldName, newName):
+        """
+        :return: groups that used oldName, they now use newName
+        """
+        groups = [group for group in self.groups if group.renameNode(oldName, newName)]
+        self.groupNodes = None
+        for jointItem in self.jointItems.pop(oldName, []):
+            jointItem.text = jointItem.joint = newName
+            self.jointItems.setdefault(newName, []).append(jointItem)
+            index = self.createIndex(jointItem.row, 0, jointItem)
+            self.dataChanged.emit(index, index)
+        return groups
+
+    def syncGroups(self, sceneGroups):
+        """
+        drop groups whose joints are gone and add the ones found in the scene but not listed yet
+        :param sceneGroups: groups rehydrated from the scene metadata
+        """
+        for group in self.groups:
+            if not all(cm.objExists(muscleUnit.JOmuscle) for muscleUnit in group.muscleUnitGroup):
+                self.removeGroup(group)
+        self.addGroups(sceneGroups)
+
+    def group(self, index):
+        if not index.isValid():
+            return None
+        return index.internalPointer().group
+
+    def selectedGroups(self, indexes):
+        groups = []
+        for index in indexes:
+            group = self.group(index)
+            if group is not None and group not in groups:
+                groups.append(group)
+        return groups
 
 
 class MuscleCreateSubWindow(QDialog):
@@ -542,93 +676,16 @@ class MuscleCreateSubWindow(QDialog):
     def createWidgets(self):
         self.mainLabel = QLabel("Select Layout Type:")
         self.mainCmb = QComboBox()
-        self.mainCmb.addItems(["Trapezius", "Lats", "Deltoid", "Arm", "Pectoralis"])
+        for tag, label in lazyModule("muscle_templates").templateLabels():
+            self.mainCmb.addItem(label, tag)
         self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
 
-        self.trapMuscleNameLe = QLineEdit()
-        self.trapBack2JointLe = QLineEdit()
-        self.trapClavicleJointLe = QLineEdit()
-        self.trapAcromionJointLe = QLineEdit()
-
-        self.LatsMuscleNameLe = QLineEdit()
-        self.LatsBack1JointLe = QLineEdit()
-        self.LatsTwist2JointLe = QLineEdit()
-        self.LatsScapulaJointLe = QLineEdit()
-        self.LatsTrapCJointLe = QLineEdit()
-
-        self.DeltoidMuscleNameLe = QLineEdit()
-        self.DeltoidClavicleJointLe = QLineEdit()
-        self.DeltoidUpperArmJointLe = QLineEdit()
-        self.DeltoidTwist1JointLe = QLineEdit()
-        self.DeltoidTwist2JointLe = QLineEdit()
-        self.DeltoidAcromionJointLe = QLineEdit()
-
-        self.ArmMuscleNameLe = QLineEdit()
-        self.ArmUppearmTwistJointLe = QLineEdit()
-        self.ArmLowerarmTwistJointLe = QLineEdit()
-        self.ArmTwistBaseJointLe = QLineEdit()
-        self.ArmTwistValueJointLe = QLineEdit()
-        self.ArmAcromionJointLe = QLineEdit()
-
-        self.PectoralisMuscleNameLe = QLineEdit()
-        self.PectoralisBack3JointLe = QLineEdit()
-        self.PectoralisClavicleJointLe = QLineEdit()
-        self.PectoralisUpperarmJointLe = QLineEdit()
-        self.PectoralisTwist2JointLe = QLineEdit()
-
     def createLayout(self):
-        self.trapWidget = QWidget()
-        self.trapFormLayout = QFormLayout()
-        self.trapFormLayout.addRow("Muscle Name:", self.trapMuscleNameLe)
-        self.trapFormLayout.addRow("Back2 Joint:", self.trapBack2JointLe)
-        self.trapFormLayout.addRow("Clavicle Joint:", self.trapClavicleJointLe)
-        self.trapFormLayout.addRow("Acromion Joint:", self.trapAcromionJointLe)
-        self.trapWidget.setLayout(self.trapFormLayout)
-
-        self.LatsWidget = QWidget()
-        self.LatsFormLayout = QFormLayout()
-        self.LatsFormLayout.addRow("Muscle Name:", self.LatsMuscleNameLe)
-        self.LatsFormLayout.addRow("Back1 Joint:", self.LatsBack1JointLe)
-        self.LatsFormLayout.addRow("UpperArm Twist2 Joint:", self.LatsTwist2JointLe)
-        self.LatsFormLayout.addRow("Scapula Joint:", self.LatsScapulaJointLe)
-        self.LatsFormLayout.addRow("TrapC Joint:", self.LatsTrapCJointLe)
-        self.LatsWidget.setLayout(self.LatsFormLayout)
-
-        self.DeltoidWidget = QWidget()
-        self.DeltoidFormLayout = QFormLayout()
-        self.DeltoidFormLayout.addRow("Muscle Name:", self.DeltoidMuscleNameLe)
-        self.DeltoidFormLayout.addRow("Clavicle Joint:", self.DeltoidClavicleJointLe)
-        self.DeltoidFormLayout.addRow("UpperArm Joint:", self.DeltoidUpperArmJointLe)
-        self.DeltoidFormLayout.addRow("UpperArm Twist1 Joint:", self.DeltoidTwist1JointLe)
-        self.DeltoidFormLayout.addRow("UpperArm Twist2 Joint:", self.DeltoidTwist2JointLe)
-        self.DeltoidFormLayout.addRow("Acromion Joint:", self.DeltoidAcromionJointLe)
-        self.DeltoidWidget.setLayout(self.DeltoidFormLayout)
-
-        self.ArmWidget = QWidget()
-        self.ArmFormLayout = QFormLayout()
-        self.ArmFormLayout.addRow("Muscle Name:", self.ArmMuscleNameLe)
-        self.ArmFormLayout.addRow("UpperArm Twist1 Joint:", self.ArmUppearmTwistJointLe)
-        self.ArmFormLayout.addRow("LowerArm Twist1 Joint:", self.ArmLowerarmTwistJointLe)
-        self.ArmFormLayout.addRow("UpperArm TwistBase Joint:", self.ArmTwistBaseJointLe)
-        self.ArmFormLayout.addRow("UpperArm TwistValue Joint:", self.ArmTwistValueJointLe)
-        self.ArmFormLayout.addRow("Acromion Joint:", self.ArmAcromionJointLe)
-        self.ArmWidget.setLayout(self.ArmFormLayout)
-
-        self.PectoralisWidget = QWidget()
-        self.PectoralisFormLayout = QFormLayout()
-        self.PectoralisFormLayout.addRow("Muscle Name:", self.PectoralisMuscleNameLe)
-        self.PectoralisFormLayout.addRow("Back3 Joint:", self.PectoralisBack3JointLe)
-        self.PectoralisFormLayout.addRow("Clavicle Joint:", self.PectoralisClavicleJointLe)
-        self.PectoralisFormLayout.addRow("UpperArm Joint:", self.PectoralisUpperarmJointLe)
-        self.PectoralisFormLayout.addRow("UpperArm Twist2 Joint:", self.PectoralisTwist2JointLe)
-        self.PectoralisWidget.setLayout(self.PectoralisFormLayout)
-
+        # one empty page per template, the form is filled in when its template is first picked
         self.stackedWidget = QStackedWidget()
-        self.stackedWidget.addWidget(self.trapWidget)
-        self.stackedWidget.addWidget(self.LatsWidget)
-        self.stackedWidget.addWidget(self.DeltoidWidget)
-        self.stackedWidget.addWidget(self.ArmWidget)
-        self.stackedWidget.addWidget(self.PectoralisWidget)
+        for _ in range(self.mainCmb.count()):
+            self.stackedWidget.addWidget(QWidget())
+        self.showForm(self.mainCmb.currentIndex())
 
         self.mainLayout = QVBoxLayout(self)
         self.mainLayout.addWidget(self.mainLabel)
@@ -641,7 +698,17 @@ class MuscleCreateSubWindow(QDialog):
     def createConnections(self):
         self.buttons.accepted.connect(self.accept)
         self.buttons.rejected.connect(self.reject)
-        self.mainCmb.currentIndexChanged.connect(self.stackedWidget.setCurrentIndex)
+        self.mainCmb.currentIndexChanged.connect(self.showForm)
+
+    def showForm(self, index):
+        formWidget = self.stackedWidget.widget(index)
+        if formWidget is not None and formWidget.layout() is None:
+            formLayout = QFormLayout()
+            formLayout.addRow("Muscle Name:", QLineEdit())
+            for inputLabel in lazyModule("muscle_templates").compileTemplate(self.mainCmb.itemData(index)).inputLabels:
+                formLayout.addRow("{0}:".format(inputLabel), QLineEdit())
+            formWidget.setLayout(formLayout)
+        self.stackedWidget.setCurrentIndex(index)
 
     def getInputText(self, formLayout):
         texts = []
@@ -660,7 +727,7 @@ class MuscleCreateSubWindow(QDialog):
         return texts
 
     def getSelectedMuscleType(self):
-        return self.mainCmb.currentText()
+        return self.mainCmb.currentData()
 
     def getSelectedMuscleInputs(self):
         currentWidget = self.stackedWidget.currentWidget()
@@ -671,7 +738,10 @@ class MuscleCreateSubWindow(QDialog):
 
 
 class MuscleMirrorSubWindow(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, groupCount=1, parent=None):
+        """
+        :param groupCount: selected groups, the name only applies when one group is mirrored
+        """
         super(MuscleMirrorSubWindow, self).__init__(parent)
         self.setWindowTitle("Mirror")
         self.setGeometry(300, 300, 200, 150)
@@ -679,6 +749,8 @@ class MuscleMirrorSubWindow(QDialog):
         mainLayout = QVBoxLayout()
 
         self.muscleName = QLineEdit()
+        self.muscleName.setPlaceholderText("side prefix swapped")
+        self.muscleName.setEnabled(groupCount == 1)
         self.axisCBX = QComboBox()
         self.axisCBX.addItems(["x", "y", "z"])
         self.sideCBX = QComboBox()
@@ -705,19 +777,291 @@ class MuscleMirrorSubWindow(QDialog):
         return([self.muscleName.text(), self.axisCBX.currentText(), self.sideCBX.currentText()])
 
 
+class MuscleProfilerWindow(QDialog):
+    """
+    per unit and per group evaluation times over a frame range, see profiler.profileGroups
+    """
+
+    def __init__(self, groups, parent=None):
+        super(MuscleProfilerWindow, self).__init__(parent)
+        self.setWindowTitle("Muscle Profiler")
+        self.resize(QSize(620, 400))
+        self.groups = groups
+        self.rows = []
+
+        self.createWidgets()
+        self.createLayout()
+        self.createConnections()
+
+    def createWidgets(self):
+        profiler = lazyModule("profiler")
+        startFrame, endFrame = profiler.playbackRange()
+        self.startSpn = QDoubleSpinBox()
+        self.endSpn = QDoubleSpinBox()
+        for spinBox, value in [(self.startSpn, startFrame), (self.endSpn, endFrame)]:
+            spinBox.setRange(-100000.0, 100000.0)
+            spinBox.setDecimals(1)
+            spinBox.setValue(value)
+        self.totalsCbx = QCheckBox("Group totals only")
+
+        self.table = QTableWidget(0, len(profiler.COLUMNS))
+        self.table.setHorizontalHeaderLabels(["Group", "Unit", "Category", "Nodes", "Total ms", "ms / Frame"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        self.runBtn = QPushButton("Profile")
+        self.optimizeBtn = QPushButton("Optimize")
+        self.exportBtn = QPushButton("Export CSV")
+
+    def createLayout(self):
+        rangeLayout = QHBoxLayout()
+        rangeLayout.addWidget(QLabel("Start:"))
+        rangeLayout.addWidget(self.startSpn)
+        rangeLayout.addWidget(QLabel("End:"))
+        rangeLayout.addWidget(self.endSpn)
+        rangeLayout.addWidget(self.totalsCbx)
+        rangeLayout.addStretch()
+
+        buttonLayout = QHBoxLayout()
+        buttonLayout.addStretch()
+        buttonLayout.addWidget(self.runBtn)
+        buttonLayout.addWidget(self.optimizeBtn)
+        buttonLayout.addWidget(self.exportBtn)
+
+        mainLayout = QVBoxLayout(self)
+        mainLayout.addLayout(rangeLayout)
+        mainLayout.addWidget(self.table)
+        mainLayout.addLayout(buttonLayout)
+
+    def createConnections(self):
+        self.runBtn.clicked.connect(self.runProfile)
+        self.optimizeBtn.clicked.connect(self.optimize)
+        self.exportBtn.clicked.connect(self.exportCsv)
+        self.totalsCbx.toggled.connect(self.fillTable)
+
+    def runProfile(self):
+        self.rows = lazyModule("profiler").profileGroups(self.groups, self.startSpn.value(), self.endSpn.value())
+        self.fillTable()
+
+    def optimize(self):
+        result = lazyModule("optimizer").optimizeGroups(self.groups, startFrame=self.startSpn.value(),
+                                                        endFrame=self.endSpn.value())
+        QMessageBox.information(self, "Optimize", "Removed {0} dead constraints, {1} flat and {2} duplicate SDK curves"
+                                "\nNodes: {3} -> {4}\nms / frame: {5:.3f} -> {6:.3f}".format(
+                                    len(result["deadConstraints"]), len(result["flatCurves"]),
+                                    len(result["duplicateCurves"]), result["nodesBefore"], result["nodesAfter"],
+                                    result["msPerFrameBefore"], result["msPerFrameAfter"]))
+        self.runProfile()
+
+    def shownRows(self):
+        return lazyModule("profiler").groupTotals(self.rows) if self.totalsCbx.isChecked() else self.rows
+
+    def fillTable(self, *args):
+        columns = lazyModule("profiler").COLUMNS
+        rows = self.shownRows()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for rowIndex, row in enumerate(rows):
+            for column, key in enumerate(columns):
+                item = QTableWidgetItem()
+                # numbers go in as numbers so the columns sort by value
+                item.setData(Qt.DisplayRole, round(row[key], 3) if isinstance(row[key], float) else row[key])
+                self.table.setItem(rowIndex, column, item)
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(columns.index("totalMs"), Qt.DescendingOrder)
+
+    def exportCsv(self):
+        if not self.rows:
+            return
+        filePath, _ = QFileDialog.getSaveFileName(self, "Export Profile", cm.internalVar(userAppDir=True),
+                                                  "CSV Files (*.csv)")
+        if filePath:
+            lazyModule("profiler").writeCsv(filePath, self.shownRows())
+
+
+class BuildJobDialog(QProgressDialog):
+    """
+    run a build_plan.BuildJob one step per maya idle event, with progress, time left and cancel
+    cancelling or a failing step rolls back every step built so far
+    """
+    completed = Signal(list)
+
+    def __init__(self, job, title="Building", parent=None):
+        super(BuildJobDialog, self).__init__("", "Cancel", 0, len(job), parent)
+        self.job = job
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.WindowModal)
+        self.setMinimumDuration(0)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self.canceled.connect(self.cancelJob)
+
+    def start(self):
+        self.updateLabel()
+        self.show()
+        self.scheduleStep()
+
+    def scheduleStep(self):
+        cm.evalDeferred(self.runStep, lowestPriority=True)
+
+    def updateLabel(self):
+        buildStep = self.job.nextStep()
+        text = "Building {0} ({1}/{2})".format(buildStep.name if buildStep else "",
+                                               self.job.index + 1, len(self.job))
+        eta = self.job.eta()
+        if eta is not None:
+            text += "\nAbout {0:.0f}s left".format(eta)
+        self.setLabelText(text)
+
+    def runStep(self):
+        if self.wasCanceled() or self.job.done:
+            return
+        try:
+            self.job.step()
+        except Exception:
+            self.job.rollback()
+            self.close()
+            raise
+        self.setValue(self.job.index)
+        if self.job.done:
+            self.close()
+            self.completed.emit(self.job.finish())
+            return
+        self.updateLabel()
+        self.scheduleStep()
+
+    def cancelJob(self):
+        if not self.job.done:
+            self.job.rollback()
+            om.MGlobal.displayWarning("Build cancelled, built steps were removed")
+        self.close()
+
+
+class SceneListener(QObject):
+    """
+    collect node removed, node renamed and undo/redo messages and hand them on in one debounced batch
+
+    the messages only come with scene edits, nothing runs while the timeline plays. renames
+    are kept only for nodes isTracked() knows, the callbacks do no other work
+    """
+    changed = Signal(list, bool)
+    DELAY = 100
+
+    def __init__(self, isTracked, parent=None):
+        """
+        :param isTracked: function taking a node name, True if the name is worth reporting
+        """
+        super(SceneListener, self).__init__(parent)
+        self.isTracked = isTracked
+        self.callbackIds = []
+        self.renames = []
+        self.structureChanged = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DELAY)
+        self.timer.timeout.connect(self.flush)
+
+    def register(self):
+        if self.callbackIds:
+            return
+        self.callbackIds = [om.MDGMessage.addNodeRemovedCallback(self.onNodeRemoved, "joint"),
+                            om.MNodeMessage.addNameChangedCallback(om.MObject(), self.onNameChanged),
+                            om.MEventMessage.addEventCallback("Undo", self.onUndoRedo),
+                            om.MEventMessage.addEventCallback("Redo", self.onUndoRedo)]
+
+    def unregister(self):
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+        self.callbackIds = []
+        self.timer.stop()
+        self.renames = []
+        self.structureChanged = False
+
+    def onNodeRemoved(self, node, *args):
+        if self.isTracked(om.MFnDependencyNode(node).name()):
+            self.structureChanged = True
+            self.timer.start()
+
+    def onNameChanged(self, node, prevName, *args):
+        if prevName and self.isTracked(prevName):
+            self.renames.append((prevName, om.MFnDependencyNode(node).name()))
+            self.timer.start()
+
+    def onUndoRedo(self, *args):
+        self.structureChanged = True
+        self.timer.start()
+
+    def flush(self):
+        renames, structureChanged = self.renames, self.structureChanged
+        self.renames = []
+        self.structureChanged = False
+        self.changed.emit(renames, structureChanged)
+
+
 class MuscleGroupWindow(QDialog):
     def __init__(self, parent=None):
         super(MuscleGroupWindow, self).__init__(parent)
+        self.callbackIds = []
 
         self.createWidgets()
         self.createLayout()
         self.createConnections()
+        self.reloadMuscleWidgets(lazyModule("muscle_group").rehydrate())
+        self.sceneListener = SceneListener(self.muscleModel.tracks, self)
+        self.sceneListener.changed.connect(self.onSceneChanged)
+        self.addCallbacks()
+
+    def addCallbacks(self):
+        if self.callbackIds:
+            return
+        self.sceneListener.register()
+        self.callbackIds.append(om.MSceneMessage.addCallback(om.MSceneMessage.kAfterOpen, self.onSceneOpened))
+        self.callbackIds.append(om.MSceneMessage.addCallback(om.MSceneMessage.kAfterNew, self.onSceneOpened))
+
+    def removeCallbacks(self):
+        for callbackId in self.callbackIds:
+            om.MMessage.removeCallback(callbackId)
+        self.callbackIds = []
+        self.sceneListener.unregister()
+
+    def onSceneChanged(self, renames, structureChanged):
+        renamedGroups = []
+        for oldName, newName in renames:
+            renamedGroups.extend(group for group in self.muscleModel.renameNode(oldName, newName)
+                                 if group not in renamedGroups)
+        # keep the metadata in step with the names, outside the undo queue the rename is part of
+        with lazyModule("muscle_units").withoutUndo():
+            for group in renamedGroups:
+                if group.metadataNode and cm.objExists(group.metadataNode):
+                    group.writeMetadata()
+        if renamedGroups:
+            self.muscleModel.resetTrackedNodes()
+        if structureChanged:
+            self.muscleModel.syncGroups(lazyModule("muscle_group").rehydrate())
+
+    def onSceneOpened(self, *args):
+        self.muscleModel.clear()
+        self.reloadMuscleWidgets(lazyModule("muscle_group").rehydrate())
 
     def createWidgets(self):
-        self.listWidget = QListWidget()
+        self.muscleModel = MuscleGroupModel(self)
+        self.muscleView = QTreeView()
+        self.muscleView.setModel(self.muscleModel)
+        self.muscleView.setUniformRowHeights(True)
+        self.muscleView.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.muscleView.setContextMenuPolicy(Qt.CustomContextMenu)
+
+        self.muscleMenu = QMenu(self)
+        self.editAction = self.muscleMenu.addAction("Edit")
+        self.buildAction = self.muscleMenu.addAction("Build")
+        self.deleteAction = self.muscleMenu.addAction("Delete")
+        self.menuGroup = None
 
         self.addMuscleBtn = QPushButton("Add Muscle Group")
         self.mirrorBtn = QPushButton("Mirror")
+        self.profileBtn = QPushButton("Profile")
 
         self.fileLabel = QLabel("File Path:")
         self.filePathLe = QLineEdit()
@@ -731,6 +1075,7 @@ class MuscleGroupWindow(QDialog):
         self.buttonHLO = QHBoxLayout()
         self.buttonHLO.addWidget(self.addMuscleBtn)
         self.buttonHLO.addWidget(self.mirrorBtn)
+        self.buttonHLO.addWidget(self.profileBtn)
 
         self.fileLayout = QHBoxLayout()
         self.fileLayout.addWidget(self.fileLabel)
@@ -743,7 +1088,7 @@ class MuscleGroupWindow(QDialog):
         self.fileSaveLayout.addWidget(self.exportFileBtn)
 
         mainLayout = QVBoxLayout()
-        mainLayout.addWidget(self.listWidget)
+        mainLayout.addWidget(self.muscleView)
         mainLayout.addLayout(self.buttonHLO)
         mainLayout.addLayout(self.fileLayout)
         mainLayout.addLayout(self.fileSaveLayout)
@@ -752,10 +1097,49 @@ class MuscleGroupWindow(QDialog):
     def createConnections(self):
         self.addMuscleBtn.clicked.connect(self.openSubWindow)
         self.mirrorBtn.clicked.connect(self.openMirrorWindow)
+        self.profileBtn.clicked.connect(self.openProfilerWindow)
         self.selectPathBtn.clicked.connect(self.setFilePath)
         self.exportFileBtn.clicked.connect(self.openFilfExportWindow)
         self.importFileBtn.clicked.connect(self.openFileImportWindow)
 
+        self.muscleView.customContextMenuRequested.connect(self.openMuscleMenu)
+        self.muscleView.selectionModel().selectionChanged.connect(self.onMuscleSelectionChanged)
+        self.muscleView.doubleClicked.connect(self.onMuscleDoubleClicked)
+        self.editAction.triggered.connect(lambda: self.menuGroup.edit())
+        self.buildAction.triggered.connect(self.buildMenuGroup)
+        self.deleteAction.triggered.connect(self.deleteMenuGroup)
+
+    def openMuscleMenu(self, position):
+        index = self.muscleView.indexAt(position)
+        self.menuGroup = self.muscleModel.group(index)
+        if self.menuGroup is None:
+            return
+        self.muscleMenu.exec_(self.muscleView.viewport().mapToGlobal(position))
+
+    def buildMenuGroup(self):
+        # build() makes the metadata node of a group built for the first time
+        self.menuGroup.build()
+        self.muscleModel.resetTrackedNodes()
+
+    def deleteMenuGroup(self):
+        self.menuGroup.delete()
+        self.muscleModel.removeGroup(self.menuGroup)
+        self.menuGroup = None
+
+    def onMuscleSelectionChanged(self, *args):
+        joints = [index.data(Qt.UserRole) for index in self.muscleView.selectionModel().selectedIndexes()]
+        joints = [joint for joint in joints if joint and cm.objExists(joint)]
+        if joints:
+            cm.select(joints, replace=True)
+        else:
+            cm.select(clear=True)
+
+    def onMuscleDoubleClicked(self, index):
+        joint = index.data(Qt.UserRole)
+        if joint and cm.objExists(joint):
+            cm.select(joint)
+            cm.GraphEditor()
+
     def setFilePath(self):
         filePath = self.filePathLe.text()
         if not filePath:
@@ -770,14 +1154,8 @@ class MuscleGroupWindow(QDialog):
         if not filePath:
             filePath = cm.internalVar(userAppDir=True)
 
-        muscleList = []
         filePath, _ = QFileDialog.getSaveFileName(self, "Save File As", filePath, "JSON Files (*.json)")
-        for i in range(self.listWidget.count()):
-            listItem = self.listWidget.item(i)
-            muscleWidget = self.listWidget.itemWidget(listItem)
-            muscleList.append(muscleWidget.skeleton_group)
-
-        muscle_group.exportMuscles(filePath, *muscleList)
+        lazyModule("muscle_group").exportMuscles(filePath, *self.muscleModel.groups)
 
     def openFileImportWindow(self):
         filePath = self.filePathLe.text()
@@ -785,18 +1163,17 @@ class MuscleGroupWindow(QDialog):
             filePath = cm.internalVar(userAppDir=True)
 
         filePath, self.selectedFilter = QFileDialog.getOpenFileName(self, "Select File", filePath)
-        muscleInstances = muscle_group.importMuscles(filePath)
-        self.reloadMuscleWidgets(muscleInstances)
+        if not filePath:
+            return
+        self.runBuildJob(lazyModule("muscle_group").importPlan(filePath), "Import Muscles")
 
-    def reloadMuscleWidgets(self, muscleInstances):
-        for muscleUnit in muscleInstances:
-            listItem = QListWidgetItem(self.listWidget)
-            listItemWidget = MuscleCreateWidget(rebuild=True, muscleUnit=muscleUnit,
-                                                listItem=listItem, listWidget=self.listWidget)
-            listItem.setSizeHint(listItemWidget.sizeHint())
+    def runBuildJob(self, plan, title):
+        self.buildDialog = BuildJobDialog(lazyModule("build_plan").BuildJob(plan), title, self)
+        self.buildDialog.completed.connect(self.reloadMuscleWidgets)
+        self.buildDialog.start()
 
-            self.listWidget.addItem(listItem)
-            self.listWidget.setItemWidget(listItem, listItemWidget)
+    def reloadMuscleWidgets(self, muscleInstances):
+        self.muscleModel.addGroups(muscleInstances)
 
     def openSubWindow(self):
         self.subWindow = MuscleCreateSubWindow(self)
@@ -804,22 +1181,26 @@ class MuscleGroupWindow(QDialog):
         self.subWindow.accepted.connect(self.getSubWindowAccept)
 
     def openMirrorWindow(self):
-        self.mirrorWindow = MuscleMirrorSubWindow(self)
+        muscleGroups = self.muscleModel.selectedGroups(self.muscleView.selectionModel().selectedIndexes())
+        self.mirrorWindow = MuscleMirrorSubWindow(len(muscleGroups), self)
         self.mirrorWindow.show()
         self.mirrorWindow.accepted.connect(self.getMirrorWindowAccept)
 
-    def getMirrorWindowAccept(self):
-        selectedItems = self.listWidget.selectedItems()
-        if not selectedItems:
-            return
+    def openProfilerWindow(self):
+        # the selected groups, or every group when nothing is selected
+        muscleGroups = self.muscleModel.selectedGroups(self.muscleView.selectionModel().selectedIndexes())
+        self.profilerWindow = MuscleProfilerWindow(muscleGroups or self.muscleModel.groups, self)
+        self.profilerWindow.show()
 
-        selectedItem = selectedItems[0]
-        listItemWidget = self.listWidget.itemWidget(selectedItem)
-        if not listItemWidget:
+    def getMirrorWindowAccept(self):
+        muscleGroups = self.muscleModel.selectedGroups(self.muscleView.selectionModel().selectedIndexes())
+        if not muscleGroups:
             return
 
-        mirrorInputs = self.mirrorWindow.getMirrorInputs()
-        self.addMirrorItem(listItemWidget.skeleton_group, mirrorInputs)
+        muscleName, mirrorAxis, side = self.mirrorWindow.getMirrorInputs()
+        names = [muscleName.strip()] if len(muscleGroups) == 1 else None
+        plan = lazyModule("muscle_group").mirrorPlan(muscleGroups, mirrorAxis=mirrorAxis, side=side, names=names)
+        self.runBuildJob(plan, "Mirror Muscles")
 
     def getSubWindowAccept(self):
         selectedMuscleType = self.subWindow.getSelectedMuscleType()
@@ -827,22 +1208,9 @@ class MuscleGroupWindow(QDialog):
         self.addLayoutItem(selectedMuscleType, dataInputs)
 
     def addLayoutItem(self, selectedMuscleType, dataInputs):
-        listItem = QListWidgetItem(self.listWidget)
-        listItemWidget = MuscleCreateWidget(create=True, groupType=selectedMuscleType, inputs=dataInputs,
-                                            listItem=listItem, listWidget=self.listWidget)
-        listItem.setSizeHint(listItemWidget.sizeHint())
-
-        self.listWidget.addItem(listItem)
-        self.listWidget.setItemWidget(listItem, listItemWidget)
-
-    def addMirrorItem(self, muscleUnit, dataInputs):
-        listItem = QListWidgetItem(self.listWidget)
-        listItemWidget = MuscleCreateWidget(mirror=True, muscleUnit=muscleUnit, inputs=dataInputs,
-                                            listItem=listItem, listWidget=self.listWidget)
-        listItem.setSizeHint(listItemWidget.sizeHint())
-
-        self.listWidget.addItem(listItem)
-        self.listWidget.setItemWidget(listItem, listItemWidget)
+        muscleGroup = createMuscleGroup(selectedMuscleType, dataInputs)
+        muscleGroup.add()
+        self.muscleModel.addGroups([muscleGroup])
 
 
 class CustomButton(QPushButton):
@@ -877,32 +1245,53 @@ class CustomButton(QPushButton):
 
 
 class ImageBackgroundWidget(QWidget):
+    # decoded image of every path shared by the widgets, with its last scaled size: path to [source, size, scaled]
+    PIXMAP_CACHE = {}
+
     def __init__(self, image_path, parent=None):
         super(ImageBackgroundWidget, self).__init__(parent)
         self.setFixedSize(372, 1025)
         self.setGeometry(100, 100, 372, 1025)
-        self.image_path = image_path
+        self.image_path = dataPath(image_path)
+        self.scaled_pixmap = None
+
+    @classmethod
+    def cachedPixmap(cls, image_path, size):
+        """
+        the file is read once per path, only the last scaled size is kept so resizing does not grow the cache
+        """
+        entry = cls.PIXMAP_CACHE.get(image_path)
+        if entry is None:
+            entry = cls.PIXMAP_CACHE[image_path] = [QPixmap(image_path), None, None]
+        if entry[1] != (size.width(), size.height()):
+            entry[1] = (size.width(), size.height())
+            entry[2] = entry[0].scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        return entry[2]
 
     def set_image(self, image_path):
         """Update the background image."""
-        self.image_path = image_path
+        self.image_path = dataPath(image_path)
+        self.scaled_pixmap = None
         self.update()  # Request a repaint to apply the new image
 
+    def resizeEvent(self, event):
+        self.scaled_pixmap = None
+        super(ImageBackgroundWidget, self).resizeEvent(event)
+
     def paintEvent(self, event):
         """Override the paint event to draw the background image."""
+        # the file is read once per path and scaled again only when the size changes, repaints only draw
+        if self.scaled_pixmap is None:
+            self.scaled_pixmap = self.cachedPixmap(self.image_path, self.size())
         painter = QPainter(self)
-        pixmap = QPixmap(self.image_path)
-
-        # Scale the pixmap to fit the widget's size
-        scaled_pixmap = pixmap.scaled(self.size(), Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-        painter.drawPixmap(self.rect(), scaled_pixmap)
+        painter.drawPixmap(0, 0, self.scaled_pixmap)
 
 
 
 class AnimationJointWindow(QWidget):
     def __init__(self, parent=None):
         super(AnimationJointWindow, self).__init__(parent)
-        image_path = 'C:/Users/zenzl/Documents/maya/scripts/JBDMuscle/data/qwe.png'
+        image_path = "qwe.png"
         background_widget = ImageBackgroundWidget(image_path)
 
         # Create buttons
@@ -922,22 +1311,34 @@ class AnimationJointWindow(QWidget):
 
 
 class MainWindow(QDialog):
-    def __init__(self, parent=mayaMainWindow()):
-        super(MainWindow, self).__init__(parent)
+    """
+    the tool window, every tab page is built the first time it is shown
+    """
+    PAGES = [("Animation Joint", "animationJointPage", AnimationJointWindow),
+             ("Helper Joints", "helpJointPage", HelperJointWindow),
+             ("Muscle Group", "muscleGroupPage", MuscleGroupWindow)]
+
+    def __init__(self, parent=None):
+        start = time.time()
+        super(MainWindow, self).__init__(parent or mayaMainWindow())
         self.setWindowTitle("JBDMuscle")
         self.resize(QSize(500, 600))
+        self.timings = [("import ui", IMPORT_SECONDS)]
 
+        for _, attribute, _ in self.PAGES:
+            setattr(self, attribute, None)
         self.createWidgets()
         self.createLayout()
+        self.createConnections()
+        self.timings.append(("MainWindow", time.time() - start))
 
     def createWidgets(self):
         self.tabWidget = QTabWidget()
-        self.animationJointPage = AnimationJointWindow()
-        self.helpJointPage = HelperJointWindow()
-        self.muscleGroupPage = MuscleGroupWindow()
-        self.tabWidget.addTab(self.animationJointPage, "Animation Joint")
-        self.tabWidget.addTab(self.helpJointPage, "Helper Joints")
-        self.tabWidget.addTab(self.muscleGroupPage, "Muscle Group")
+        for label, _, _ in self.PAGES:
+            placeholder = QWidget()
+            QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+            self.tabWidget.addTab(placeholder, label)
+        self.buildPage(self.tabWidget.currentIndex())
 
     def createLayout(self):
         self.mainLayout = QVBoxLayout()
@@ -945,7 +1346,57 @@ class MainWindow(QDialog):
         self.mainLayout.addWidget(self.tabWidget)
         self.setLayout(self.mainLayout)
 
+    def createConnections(self):
+        self.tabWidget.currentChanged.connect(self.buildPage)
 
-
-
-
+    def buildPage(self, index):
+        label, attribute, pageClass = self.PAGES[index]
+        if getattr(self, attribute) is not None:
+            return
+        start = time.time()
+        page = pageClass()
+        setattr(self, attribute, page)
+        self.tabWidget.widget(index).layout().addWidget(page)
+        self.timings.append((label, time.time() - start))
+
+    def startupReport(self):
+        """
+        :return: seconds spent importing ui, making the window and building each page shown so far
+        """
+        lines = ["{0:<20} {1:8.1f} ms".format(name, seconds * 1000.0) for name, seconds in self.timings]
+        return "\n".join(["JBDMuscle startup:"] + lines)
+
+    def showEvent(self, event):
+        # the scene may have changed while the window was hidden, the page is read again with its callbacks
+        page = self.muscleGroupPage
+        if page is not None and not page.callbackIds:
+            page.addCallbacks()
+            page.onSceneOpened()
+        super(MainWindow, self).showEvent(event)
+
+    def hideEvent(self, event):
+        # close, Esc (reject) and accept all hide the dialog, minimizing is a spontaneous hide and keeps them
+        if self.muscleGroupPage is not None and not event.spontaneous():
+            self.muscleGroupPage.removeCallbacks()
+        super(MainWindow, self).hideEvent(event)
+
+
+MAIN_WINDOW = None
+
+
+def showMainWindow():
+    """
+    shelf entry point, the window is made once and shown again after, reports where the startup time went
+    in the script editor
+    """
+    global MAIN_WINDOW
+    if MAIN_WINDOW is None:
+        MAIN_WINDOW = MainWindow()
+        om.MGlobal.displayInfo(MAIN_WINDOW.startupReport())
+    MAIN_WINDOW.show()
+    MAIN_WINDOW.raise_()
+    MAIN_WINDOW.activateWindow()
+    return MAIN_WINDOW
+
+
+IMPORT_SECONDS = time.time() - _importStart